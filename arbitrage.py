@@ -7,13 +7,27 @@ regardless of the outcome.
 
 Condition:  sum(1 / odds_i  for each outcome i) < 1.0
 Profit %:   (1 - sum_of_implied_probs) * 100
+
+Every (event, market, line) group is scanned on its own: the moneyline, each
+spread and each total of a game are separate markets.
 """
+import bisect
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
-from config import MIN_PROFIT_PCT, MAX_PROFIT_PCT
+import config
+from config import OUTLIER_FILTER
 from message import message
 
+# Upper bin edges of the per-event implied-sum histogram kept in ScanCounters.
+# The last bin collects everything at or above the final edge.
+IMPLIED_SUM_EDGES = (0.95, 0.98, 0.99, 0.995, 1.0, 1.005, 1.01, 1.02, 1.03, 1.05, 1.10)
+
+# Market types (same keys as The Odds API)
+MARKET_MONEYLINE = 'h2h'
+MARKET_SPREAD = 'spreads'
+MARKET_TOTAL = 'totals'
+
 
 # ---------------------------------------------------------------------------
 # Data classes
@@ -31,6 +45,8 @@ class OddsEntry:
     outcome: str          # e.g. "Toronto Maple Leafs"
     decimal_odds: float   # e.g. 1.85
     url: str = ''
+    market: str = MARKET_MONEYLINE
+    line: Optional[float] = None   # spread applied to this outcome, or the total
 
 
 @dataclass
@@ -45,6 +61,114 @@ class ArbitrageOpportunity:
     profit_pct: float
     stakes: Dict[str, float]            # outcome -> stake amount
     returns: Dict[str, float]           # outcome -> guaranteed return
+    market: str = MARKET_MONEYLINE
+    line: Optional[float] = None        # see market_point()
+    survival: Optional[float] = None    # see lifetimes.LifetimeTracker
+
+
+@dataclass
+class GroupedOdds:
+    """Odds grouped per market, shared by the arbitrage and value-bet engines."""
+    events: Dict[tuple, Dict[str, List[OddsEntry]]]   # market_key -> outcome -> entries
+    meta: Dict[tuple, tuple]                          # market_key -> (name, sport, time)
+
+
+@dataclass
+class ScanCounters:
+    """Why entries and events did or did not become opportunities."""
+    entries: int = 0
+    dropped_bad_odds: int = 0       # decimal odds <= 1.0
+    dropped_outliers: int = 0       # out of line with the other books
+    events: int = 0                 # events examined by find_arbitrage
+    single_outcome: int = 0         # fewer than 2 outcomes quoted
+    no_arb: int = 0                 # implied sum >= 1.0
+    below_min_profit: int = 0
+    above_max_profit: int = 0
+    opportunities: int = 0
+    implied_sum_hist: List[int] = field(
+        default_factory=lambda: [0] * (len(IMPLIED_SUM_EDGES) + 1)
+    )
+
+    def merge(self, other: 'ScanCounters') -> None:
+        for name in ('entries', 'dropped_bad_odds', 'dropped_outliers', 'events',
+                     'single_outcome', 'no_arb', 'below_min_profit',
+                     'above_max_profit', 'opportunities'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for i, count in enumerate(other.implied_sum_hist):
+            self.implied_sum_hist[i] += count
+
+
+@dataclass
+class ScanStats:
+    """Per-sport ScanCounters for one scan."""
+    by_sport: Dict[str, ScanCounters] = field(default_factory=dict)
+
+    def sport(self, name: str) -> ScanCounters:
+        counters = self.by_sport.get(name)
+        if counters is None:
+            counters = self.by_sport[name] = ScanCounters()
+        return counters
+
+    def totals(self) -> ScanCounters:
+        total = ScanCounters()
+        for counters in self.by_sport.values():
+            total.merge(counters)
+        return total
+
+    def format_summary(self) -> str:
+        """One line per sport plus a total, for the log."""
+        lines = []
+        for label, c in sorted(self.by_sport.items()) + [('ALL', self.totals())]:
+            lines.append(
+                '{}: {} entries ({} bad odds, {} outliers) | {} events: '
+                '{} single-outcome, {} no arb, {} below min, {} above max, {} found'.format(
+                    label, c.entries, c.dropped_bad_odds, c.dropped_outliers,
+                    c.events, c.single_outcome, c.no_arb, c.below_min_profit,
+                    c.above_max_profit, c.opportunities,
+                )
+            )
+        return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Market helpers
+# ---------------------------------------------------------------------------
+
+def market_point(entry: OddsEntry) -> Optional[float]:
+    """
+    Line shared by every side of a market.
+
+    Totals: the total itself. Spreads: the line from the home team's point of
+    view (event names are "Home vs Away"), so "Home -1.5" and "Away +1.5"
+    land in the same group. Moneyline: None.
+    """
+    if entry.market == MARKET_SPREAD and entry.line is not None:
+        home = entry.event_name.split(' vs ')[0]
+        return entry.line if entry.outcome == home else -entry.line
+    return entry.line
+
+
+def market_key(entry: OddsEntry) -> tuple:
+    """Grouping key for complementary quotes: (event_id, market, point)."""
+    return entry.event_id, entry.market, market_point(entry)
+
+
+def outcome_label(entry: OddsEntry) -> str:
+    """Outcome with its line, e.g. 'Maple Leafs -1.5' or 'Over 6.5'."""
+    if entry.line is None:
+        return entry.outcome
+    if entry.market == MARKET_SPREAD:
+        return '{} {:+g}'.format(entry.outcome, entry.line)
+    return '{} {:g}'.format(entry.outcome, entry.line)
+
+
+def market_label(market: str, line: Optional[float]) -> str:
+    """Short market description, e.g. 'Moneyline', 'Spread -1.5', 'Total 6.5'."""
+    if market == MARKET_SPREAD and line is not None:
+        return 'Spread {:+g}'.format(line)
+    if market == MARKET_TOTAL and line is not None:
+        return 'Total {:g}'.format(line)
+    return 'Moneyline'
 
 
 # ---------------------------------------------------------------------------
@@ -64,6 +188,11 @@ def find_arbitrage(
     commence_time: str,
     outcomes: Dict[str, List[OddsEntry]],
     total_stake: float,
+    stats: Optional[ScanCounters] = None,
+    min_profit_pct: Optional[float] = None,
+    max_profit_pct: Optional[float] = None,
+    market: str = MARKET_MONEYLINE,
+    line: Optional[float] = None,
 ) -> Optional[ArbitrageOpportunity]:
     """
     Check a single event for an arbitrage opportunity.
@@ -74,12 +203,23 @@ def find_arbitrage(
         All available odds grouped by outcome label.
     total_stake : float
         Total amount to wager in CAD.
+    stats : ScanCounters, optional
+        Incremented with the reason this event was or was not reported.
+    min_profit_pct, max_profit_pct : float, optional
+        Thresholds; default to config.MIN_PROFIT_PCT / config.MAX_PROFIT_PCT
+        as they are at call time, so --min-profit overrides apply.
+    market, line : optional
+        Market the outcomes belong to; copied onto the opportunity.
 
     Returns
     -------
     ArbitrageOpportunity if one exists, otherwise None.
     """
+    if stats is not None:
+        stats.events += 1
     if len(outcomes) < 2:
+        if stats is not None:
+            stats.single_outcome += 1
         return None
 
     # Pick the best (highest) odds for each outcome
@@ -90,25 +230,42 @@ def find_arbitrage(
         best[label] = max(entries, key=lambda e: e.decimal_odds)
 
     if len(best) < 2:
+        if stats is not None:
+            stats.single_outcome += 1
         return None
 
     # Arbitrage condition
     total_implied = sum(_implied_prob(e.decimal_odds) for e in best.values())
+    if stats is not None:
+        stats.implied_sum_hist[bisect.bisect_right(IMPLIED_SUM_EDGES, total_implied)] += 1
     if total_implied >= 1.0:
+        if stats is not None:
+            stats.no_arb += 1
         return None
 
     profit_pct = (1.0 - total_implied) * 100.0
+    if min_profit_pct is None:
+        min_profit_pct = config.MIN_PROFIT_PCT
+    if max_profit_pct is None:
+        max_profit_pct = config.MAX_PROFIT_PCT
 
     # Sanity check — very high profit % usually means data error
-    if profit_pct < MIN_PROFIT_PCT or profit_pct > MAX_PROFIT_PCT:
-        if profit_pct > MAX_PROFIT_PCT:
+    if profit_pct < min_profit_pct or profit_pct > max_profit_pct:
+        if profit_pct > max_profit_pct:
             message.log_warning(
                 "Skipping apparent arb of {:.1f}% — likely bad data ({})".format(
                     profit_pct, event_name
                 )
             )
+            if stats is not None:
+                stats.above_max_profit += 1
+        elif stats is not None:
+            stats.below_min_profit += 1
         return None
 
+    if stats is not None:
+        stats.opportunities += 1
+
     # Optimal stakes: stake_i = total * (implied_i / total_implied)
     stakes: Dict[str, float] = {}
     returns: Dict[str, float] = {}
@@ -130,45 +287,96 @@ def find_arbitrage(
         profit_pct=round(profit_pct, 3),
         stakes=stakes,
         returns=returns,
+        market=market,
+        line=line,
     )
 
 
-def scan_for_arbitrage(
+def group_odds(
     all_odds: List[OddsEntry],
-    total_stake: float,
-) -> List[ArbitrageOpportunity]:
+    filter_bad_prices: bool = OUTLIER_FILTER,
+    stats: Optional[ScanStats] = None,
+) -> GroupedOdds:
     """
-    Group all collected odds by event, then scan each event for arb.
+    Group collected odds by market (see market_key), then by outcome.
 
     Events from different scrapers are matched on event_id first; if both
     scrapers agree on the same event_id (e.g. from The Odds API), matching
     is exact. OddsChecker-sourced entries use the event name as the key.
 
-    Returns a list of ArbitrageOpportunity objects sorted by profit %.
+    When filter_bad_prices is set, quotes far out of line with the other
+    books are dropped first (see outliers.filter_outliers).
+
+    When stats is given, entry counts and drops are recorded per sport.
     """
-    # Group: event_id -> outcome -> [OddsEntry]
-    event_map: Dict[str, Dict[str, List[OddsEntry]]] = {}
-    event_meta: Dict[str, tuple] = {}  # event_id -> (name, sport, time)
+    if stats is not None:
+        for entry in all_odds:
+            counters = stats.sport(entry.sport)
+            counters.entries += 1
+            if entry.decimal_odds <= 1.0:
+                counters.dropped_bad_odds += 1
+
+    if filter_bad_prices:
+        from outliers import filter_outliers
+        all_odds, rejected = filter_outliers(all_odds)
+        if stats is not None:
+            for r in rejected:
+                stats.sport(r.entry.sport).dropped_outliers += 1
+
+    # Group: (event_id, market, point) -> outcome -> [OddsEntry]
+    event_map: Dict[tuple, Dict[str, List[OddsEntry]]] = {}
+    event_meta: Dict[tuple, tuple] = {}  # market key -> (name, sport, time)
 
     for entry in all_odds:
         if entry.decimal_odds <= 1.0:
             continue
-        eid = entry.event_id
-        if eid not in event_map:
-            event_map[eid] = {}
-            event_meta[eid] = (entry.event_name, entry.sport, entry.commence_time)
-        outcome_map = event_map[eid]
+        key = market_key(entry)
+        if key not in event_map:
+            event_map[key] = {}
+            event_meta[key] = (entry.event_name, entry.sport, entry.commence_time)
+        outcome_map = event_map[key]
         if entry.outcome not in outcome_map:
             outcome_map[entry.outcome] = []
         outcome_map[entry.outcome].append(entry)
 
+    return GroupedOdds(events=event_map, meta=event_meta)
+
+
+def scan_for_arbitrage(
+    all_odds: List[OddsEntry],
+    total_stake: float,
+    filter_bad_prices: bool = OUTLIER_FILTER,
+    groups: Optional[GroupedOdds] = None,
+    stats: Optional[ScanStats] = None,
+) -> List[ArbitrageOpportunity]:
+    """
+    Group all collected odds by market, then scan each market for arb.
+
+    Pass `groups` (from group_odds) to reuse a grouping that other engines
+    such as value_bets.find_value_bets also consume; all_odds and
+    filter_bad_prices are then ignored.
+
+    Pass `stats` to collect per-sport rejection counters for this scan.
+
+    Returns a list of ArbitrageOpportunity objects sorted by profit %.
+    """
+    if groups is None:
+        groups = group_odds(all_odds, filter_bad_prices, stats)
+
     opportunities: List[ArbitrageOpportunity] = []
-    for eid, outcomes in event_map.items():
-        name, sport, time = event_meta[eid]
-        opp = find_arbitrage(name, sport, time, outcomes, total_stake)
+    for key, outcomes in groups.events.items():
+        name, sport, time = groups.meta[key]
+        _, market, point = key
+        opp = find_arbitrage(
+            name, sport, time, outcomes, total_stake,
+            stats.sport(sport) if stats is not None else None,
+            market=market, line=point,
+        )
         if opp:
             opportunities.append(opp)
-            message.log_result("ARB FOUND: {} — {:.3f}%".format(name, opp.profit_pct))
+            message.log_result("ARB FOUND: {} ({}) — {:.3f}%".format(
+                name, market_label(market, point), opp.profit_pct
+            ))
 
     opportunities.sort(key=lambda o: o.profit_pct, reverse=True)
     return opportunities
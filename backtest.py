@@ -0,0 +1,322 @@
+"""
+Backtest the arbitrage rules against recorded odds history.
+
+    python main.py backtest --db odds_history.db --min-profit 0.5 1 2 --confirm-scans 1 2
+
+The history database (--history) is exported once to memory-mapped columns
+(columns.py) and every scan is replayed through the same rules as
+arbitrage.find_arbitrage(), vectorized over thousands of scans at a time:
+
+    bad prices     robust z-score per (scan, outcome), as outliers.py
+    best odds      max over books per (scan, outcome)        np.maximum.reduceat
+    implied sum    sum of 1/best per (scan, market)          np.add.reduceat
+    arb            every outcome quoted, MIN <= profit% <= MAX
+
+Consecutive scans in which a market stays an arb form one simulated
+opportunity; its lifetime is the time between its first and last scan.
+An opportunity is "bet" at the profit % shown after confirm_scans scans.
+
+Each parameter combination is independent, so sweeps run in parallel
+processes that share the memory-mapped columns.
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from columns import HistoryColumns, load_columns, open_history_columns
+from config import (
+    DEFAULT_BET_AMOUNT, HISTORY_DB, MAX_PROFIT_PCT, MIN_PROFIT_PCT, OUTLIER_FILTER,
+    OUTLIER_MIN_BOOKS, OUTLIER_Z_THRESHOLD,
+)
+from outliers import robust_z
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    """Rules replayed against the history; one sweep point."""
+    min_profit_pct: float = MIN_PROFIT_PCT
+    max_profit_pct: float = MAX_PROFIT_PCT
+    total_stake: float = DEFAULT_BET_AMOUNT
+    confirm_scans: int = 1                      # scans an arb must last before it is bet
+    max_hours_to_start: Optional[float] = None  # ignore markets starting later than this
+    exclude_books: Tuple[str, ...] = ()
+    filter_bad_prices: bool = OUTLIER_FILTER    # drop quotes out of line with the other books
+
+
+@dataclass
+class SimulatedOpportunity:
+    """One arb as it would have been seen live: first to last consecutive scan."""
+    market: int             # HistoryColumns market code
+    label: str
+    sport: str
+    first_ts: float
+    last_ts: float
+    scans: int
+    entry_profit_pct: float     # profit % when it was bet (after confirm_scans)
+    best_profit_pct: float
+    profit: float               # total_stake * entry_profit_pct
+
+    @property
+    def lifetime(self) -> float:
+        return self.last_ts - self.first_ts
+
+
+@dataclass
+class BacktestResult:
+    """Outcome of replaying one BacktestParams over the whole history."""
+    params: BacktestParams
+    scans: int
+    quotes: int
+    replayed_seconds: float     # wall-clock span of the history
+    elapsed: float              # time the replay took
+    opportunities: List[SimulatedOpportunity] = field(default_factory=list)
+
+    @property
+    def total_profit(self) -> float:
+        return round(sum(o.profit for o in self.opportunities), 2)
+
+    @property
+    def median_lifetime(self) -> float:
+        if not self.opportunities:
+            return 0.0
+        return float(np.median([o.lifetime for o in self.opportunities]))
+
+    @property
+    def mean_lifetime(self) -> float:
+        if not self.opportunities:
+            return 0.0
+        return float(np.mean([o.lifetime for o in self.opportunities]))
+
+    @property
+    def speedup(self) -> float:
+        """How many times faster than real time the replay ran."""
+        return self.replayed_seconds / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def by_sport(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for o in self.opportunities:
+            counts[o.sport] = counts.get(o.sport, 0) + 1
+        return counts
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def _run_starts(*keys: np.ndarray) -> np.ndarray:
+    """Indices where any of the (sorted) key arrays changes value."""
+    n = len(keys[0])
+    change = np.zeros(n, dtype=bool)
+    if n:
+        change[0] = True
+    for k in keys:
+        change[1:] |= k[1:] != k[:-1]
+    return np.flatnonzero(change)
+
+
+def _arb_markets(cols: HistoryColumns, lo: int, hi: int, params: BacktestParams,
+                 excluded: np.ndarray):
+    """(scan, market, profit_pct) of every arb in rows [lo, hi)."""
+    scan = np.asarray(cols.scan[lo:hi])
+    market = np.asarray(cols.market[lo:hi])
+    outcome = np.asarray(cols.outcome[lo:hi])
+    odds = np.asarray(cols.odds[lo:hi])
+
+    keep = odds > 1.0
+    if len(excluded):
+        keep &= ~np.isin(np.asarray(cols.book[lo:hi]), excluded)
+    if params.max_hours_to_start is not None:
+        hours = (cols.market_commence[market] - cols.scan_ts[scan]) / 3600.0
+        # Unknown start times (NaN) are kept; started events are not
+        keep &= ~(hours > params.max_hours_to_start) & ~(hours <= 0)
+    if not keep.all():
+        scan, market, outcome, odds = scan[keep], market[keep], outcome[keep], odds[keep]
+    if not len(odds):
+        return np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0)
+
+    # Rows are sorted, so every (scan, outcome) group is contiguous
+    starts = _run_starts(scan, outcome)
+    if params.filter_bad_prices:
+        # Same consensus check as outliers.filter_outliers, one group per (scan, outcome)
+        codes = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(odds))))
+        z, _, counts = robust_z(1.0 / odds, codes, len(starts))
+        keep = (counts[codes] < OUTLIER_MIN_BOOKS) | (np.abs(z) <= OUTLIER_Z_THRESHOLD)
+        if not keep.all():
+            scan, market, outcome, odds = scan[keep], market[keep], outcome[keep], odds[keep]
+            starts = _run_starts(scan, outcome)
+
+    # Best price per (scan, outcome)
+    best = np.maximum.reduceat(odds, starts)
+    g_scan, g_market = scan[starts], market[starts]
+
+    # Implied sum per (scan, market)
+    m_starts = _run_starts(g_scan, g_market)
+    implied = np.add.reduceat(1.0 / best, m_starts)
+    quoted = np.diff(np.append(m_starts, len(best)))
+    m_scan, m_market = g_scan[m_starts], g_market[m_starts]
+
+    profit_pct = (1.0 - implied) * 100.0
+    arb = (
+        (quoted >= 2)
+        & (quoted == cols.market_outcomes[m_market])
+        & (profit_pct >= params.min_profit_pct)
+        & (profit_pct <= params.max_profit_pct)
+    )
+    return m_scan[arb], m_market[arb], profit_pct[arb]
+
+
+def replay(cols: HistoryColumns, params: BacktestParams, chunk_scans: int = 2000) -> BacktestResult:
+    """Replay the whole history under one set of parameters."""
+    started = time.time()
+    excluded = np.asarray(
+        [i for i, b in enumerate(cols.meta['books']) if b in params.exclude_books],
+        dtype=cols.book.dtype,
+    )
+    bounds = np.searchsorted(cols.scan, np.arange(0, cols.n_scans + chunk_scans, chunk_scans))
+    parts = [
+        _arb_markets(cols, lo, hi, params, excluded)
+        for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+    ]
+    result = BacktestResult(
+        params=params,
+        scans=cols.n_scans,
+        quotes=len(cols),
+        replayed_seconds=float(cols.scan_ts[-1] - cols.scan_ts[0]) if cols.n_scans else 0.0,
+        elapsed=0.0,
+    )
+    if parts:
+        scan = np.concatenate([p[0] for p in parts])
+        market = np.concatenate([p[1] for p in parts])
+        profit = np.concatenate([p[2] for p in parts])
+        result.opportunities = _lifetimes(cols, scan, market, profit, params)
+    result.elapsed = time.time() - started
+    return result
+
+
+def _lifetimes(cols: HistoryColumns, scan: np.ndarray, market: np.ndarray,
+               profit: np.ndarray, params: BacktestParams) -> List[SimulatedOpportunity]:
+    """Join per-scan arbs into runs of consecutive scans per market."""
+    if not len(scan):
+        return []
+    order = np.lexsort((scan, market))
+    scan, market, profit = scan[order], market[order], profit[order]
+    new_run = np.ones(len(scan), dtype=bool)
+    new_run[1:] = (market[1:] != market[:-1]) | (scan[1:] != scan[:-1] + 1)
+    starts = np.flatnonzero(new_run)
+    lengths = np.diff(np.append(starts, len(scan)))
+    best = np.maximum.reduceat(profit, starts)
+
+    found: List[SimulatedOpportunity] = []
+    sports = cols.meta['sports']
+    for start, length, best_pct in zip(starts, lengths, best):
+        if length < params.confirm_scans:
+            continue
+        entry_pct = float(profit[start + params.confirm_scans - 1])
+        m = int(market[start])
+        found.append(SimulatedOpportunity(
+            market=m,
+            label=cols.market_label(m),
+            sport=sports[int(cols.market_sport[m])],
+            first_ts=float(cols.scan_ts[scan[start]]),
+            last_ts=float(cols.scan_ts[scan[start + length - 1]]),
+            scans=int(length),
+            entry_profit_pct=round(entry_pct, 3),
+            best_profit_pct=round(float(best_pct), 3),
+            profit=round(params.total_stake * entry_pct / 100.0, 2),
+        ))
+    return found
+
+
+# ---------------------------------------------------------------------------
+# Parameter sweeps
+# ---------------------------------------------------------------------------
+
+def _replay_worker(columns_dir: str, params: BacktestParams) -> BacktestResult:
+    return replay(load_columns(columns_dir), params)
+
+
+def sweep(columns_dir: str, grid: Sequence[BacktestParams], jobs: int = 0) -> List[BacktestResult]:
+    """
+    Replay every parameter set, in parallel across processes when jobs != 1
+    (0 = one per CPU). Results come back in the order of `grid`.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(grid) == 1:
+        cols = load_columns(columns_dir)
+        return [replay(cols, p) for p in grid]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(grid))) as pool:
+        return list(pool.map(_replay_worker, [columns_dir] * len(grid), grid))
+
+
+# ---------------------------------------------------------------------------
+# CLI  (python main.py backtest ...)
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='main.py backtest',
+        description='Replay recorded odds history (see --history) through the arbitrage rules',
+    )
+    parser.add_argument('--db', default=HISTORY_DB,
+                        help='History database (default: {})'.format(HISTORY_DB))
+    parser.add_argument('--columns', metavar='DIR', default=None,
+                        help='Column cache directory (default: <db>_columns)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Re-export the column cache even if it is up to date')
+    parser.add_argument('--amount', '-a', type=float, default=DEFAULT_BET_AMOUNT,
+                        help='Total stake per opportunity (default: {})'.format(DEFAULT_BET_AMOUNT))
+    parser.add_argument('--min-profit', type=float, nargs='+', default=[MIN_PROFIT_PCT],
+                        metavar='PCT', help='One or more minimum profit %% values to sweep')
+    parser.add_argument('--max-profit', type=float, default=MAX_PROFIT_PCT, metavar='PCT',
+                        help='Maximum believable profit %% (default: {})'.format(MAX_PROFIT_PCT))
+    parser.add_argument('--confirm-scans', type=int, nargs='+', default=[1], metavar='N',
+                        help='Scans an arb must last before it is bet (sweepable)')
+    parser.add_argument('--max-hours', type=float, default=None, metavar='H',
+                        help='Only consider markets starting within H hours')
+    parser.add_argument('--exclude-books', nargs='+', default=[], metavar='BOOK',
+                        help='Bookmaker ids to leave out')
+    parser.add_argument('--jobs', '-j', type=int, default=0,
+                        help='Parallel processes for sweeps (default: one per CPU)')
+    parser.add_argument('--top', type=int, default=10, metavar='N',
+                        help='Show the N most profitable opportunities of the first run')
+    args = parser.parse_args(argv)
+    if min(args.confirm_scans) < 1:
+        parser.error('--confirm-scans needs at least 1 scan')
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        print('No history database at {}. Record one with: python main.py --watch --history'
+              .format(args.db))
+        return
+
+    from columns import build_columns
+    columns_dir = args.columns or os.path.splitext(args.db)[0] + '_columns'
+    if args.rebuild:
+        build_columns(args.db, columns_dir)
+    else:
+        open_history_columns(args.db, columns_dir)
+
+    grid = [
+        BacktestParams(
+            min_profit_pct=min_profit,
+            max_profit_pct=args.max_profit,
+            total_stake=args.amount,
+            confirm_scans=confirm,
+            max_hours_to_start=args.max_hours,
+            exclude_books=tuple(args.exclude_books),
+        )
+        for min_profit, confirm in itertools.product(args.min_profit, args.confirm_scans)
+    ]
+    results = sweep(columns_dir, grid, jobs=args.jobs)
+
+    from display import print_backtest_results
+    print_backtest_results(results, top=args.top)
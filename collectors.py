@@ -0,0 +1,192 @@
+"""
+Multi-process odds collection (--workers N).
+
+collect_odds_parallel() runs every scraper in threads of one process, so
+they share one GIL: HTML parsing in one scraper holds up the others.
+CollectorPool spreads the scrapers over N worker processes instead. Each
+worker builds its own scraper instances (own requests.Session and request
+delay) and runs its group in threads, exactly like the single-process
+path. Per scan, the supervisor sends every worker a (scan, sports) command
+over a pipe and gets back a small report plus the entries in the compact
+binary form of wire.py.
+
+A worker that dies is restarted before the next scan; one that has not
+answered within COLLECTOR_TIMEOUT seconds is killed and restarted, and the
+scan goes on with the other workers' odds. Nothing a worker does can take
+down the watch loop.
+"""
+import importlib
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from multiprocessing.connection import wait
+from typing import List, Optional, Tuple
+
+from arbitrage import OddsEntry
+from config import COLLECTOR_TIMEOUT
+from message import message
+from scan import run_scraper
+from timings import ScraperTiming
+from wire import decode_entries, encode_entries
+
+# Fork keeps worker start-up cheap and avoids re-running module imports;
+# spawn where fork is unavailable. Workers append to the same log file.
+_CONTEXT = multiprocessing.get_context(
+    'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def scraper_spec(scraper) -> Tuple[str, str]:
+    """(module, class name) a worker process uses to build its own copy of a scraper."""
+    return type(scraper).__module__, type(scraper).__name__
+
+
+def _worker_main(conn, specs: List[Tuple[str, str]]) -> None:
+    """Worker process: build the scrapers, then answer scan commands until told to stop."""
+    try:
+        _serve_scans(conn, specs)
+    finally:
+        message.flush()     # a worker exits without running atexit handlers
+
+
+def _serve_scans(conn, specs: List[Tuple[str, str]]) -> None:
+    scrapers = [getattr(importlib.import_module(module), name)() for module, name in specs]
+
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as pool:
+        while True:
+            try:
+                command = conn.recv()
+            except (EOFError, OSError):
+                break
+            if command is None:
+                break
+            scan, sport_keys = command
+            message.set_scan(scan)
+            entries, report = [], []
+            for name, found, _, timing in pool.map(lambda s: run_scraper(s, sport_keys), scrapers):
+                report.append((name, len(found), timing.error, asdict(timing)))
+                entries.extend(found)
+            conn.send((scan, report))
+            conn.send_bytes(encode_entries(entries))
+
+
+class _Worker:
+    """Supervisor-side handle of one worker process."""
+
+    def __init__(self, index: int, specs: List[Tuple[str, str]]):
+        self.index = index
+        self.specs = specs
+        self.names = [name for _, name in specs]
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+
+    def start(self) -> None:
+        self.conn, child = _CONTEXT.Pipe()
+        self.process = _CONTEXT.Process(
+            target=_worker_main, args=(child, self.specs),
+            name='collector-{}'.format(self.index), daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def stop(self, kill: bool = False) -> None:
+        if self.process is None:
+            return
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def restart(self, reason: str) -> None:
+        message.log_warning(
+            'Collector worker {} ({}) {}; restarting'.format(
+                self.index, ', '.join(self.names), reason
+            ),
+            'collectors',
+        )
+        self.stop(kill=True)
+        self.restarts += 1
+        self.start()
+
+
+class CollectorPool:
+    """Runs groups of scrapers in worker processes and merges their odds."""
+
+    def __init__(self, scrapers: list, workers: int, timeout: float = COLLECTOR_TIMEOUT):
+        specs = [scraper_spec(s) for s in scrapers]
+        workers = max(1, min(workers, len(specs)))
+        # Round-robin so the slow direct scrapers spread over all workers
+        self.workers = [_Worker(i, specs[i::workers]) for i in range(workers)]
+        self.timeout = timeout
+        self.last_timings: List[ScraperTiming] = []     # scrapers that answered last scan
+        self._scan = 0
+
+    def start(self) -> 'CollectorPool':
+        for w in self.workers:
+            w.start()
+        return self
+
+    def collect(self, sport_keys: Optional[List[str]]) -> List[OddsEntry]:
+        """One scan across every worker; returns all entries received in time."""
+        self._scan += 1
+        pending = {}
+        for w in self.workers:
+            if not w.process.is_alive():
+                w.restart('exited with code {}'.format(w.process.exitcode))
+            try:
+                w.conn.send((self._scan, sport_keys))
+                pending[w.conn] = w
+            except OSError as exc:
+                w.restart('could not be reached ({})'.format(exc))
+
+        all_odds: List[OddsEntry] = []
+        self.last_timings = []
+        deadline = time.time() + self.timeout
+        while pending:
+            ready = wait(list(pending), timeout=max(0.0, deadline - time.time()))
+            if not ready:
+                break
+            for conn in ready:
+                w = pending.pop(conn)
+                try:
+                    scan, report = conn.recv()
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    w.restart('crashed during scan')
+                    continue
+                if scan != self._scan:
+                    w.restart('answered an old scan')
+                    continue
+                for name, count, error, timing in report:
+                    self.last_timings.append(ScraperTiming(**timing))
+                    if error:
+                        message.log_error('Scraper {} raised: {}'.format(name, error), 'collectors')
+                    else:
+                        message.log_debug(
+                            '{} returned {} entries'.format(name, count), 'collectors'
+                        )
+                all_odds.extend(decode_entries(data))
+        for w in pending.values():
+            w.restart('did not answer within {:.0f}s'.format(self.timeout))
+        return all_odds
+
+    @property
+    def summary(self) -> str:
+        return 'in {} processes'.format(len(self.workers))
+
+    @property
+    def restarts(self) -> int:
+        return sum(w.restarts for w in self.workers)
+
+    def close(self) -> None:
+        for w in self.workers:
+            w.stop()
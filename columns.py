@@ -0,0 +1,223 @@
+"""
+Columnar, memory-mapped view of the odds history.
+
+The SQLite history (history.py) is convenient for point lookups but far too
+slow to replay row by row. build_columns() exports the quotes table once to
+one .npy file per column; load_columns() memory-maps them, so a month of
+quotes opens instantly and several processes share the same pages.
+
+Rows are sorted by (scan, market, outcome, book): every per-scan group used
+by the backtester and line analytics is a contiguous run, and group
+reductions are single np.*.reduceat passes with no sorting.
+
+    ts        float64   scan time (UNIX seconds)
+    scan      int32     dense scan index, 0..n_scans-1
+    market    int32     code of (event_id, market, point), see arbitrage.market_key
+    outcome   int32     code of (market code, outcome name)
+    book      int16     bookmaker code
+    odds      float64   decimal odds
+
+Per-market lookups (sport, commence time, number of outcomes) are small
+arrays in HistoryColumns; names live in meta.json next to the columns.
+"""
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from arbitrage import MARKET_SPREAD, market_label
+from message import message
+from seen import commence_timestamp
+
+ROW_COLUMNS = {
+    'ts': np.float64,
+    'scan': np.int32,
+    'market': np.int32,
+    'outcome': np.int32,
+    'book': np.int16,
+    'odds': np.float64,
+}
+
+
+@dataclass
+class HistoryColumns:
+    """Memory-mapped quote columns plus per-market / per-outcome lookups."""
+    ts: np.ndarray
+    scan: np.ndarray
+    market: np.ndarray
+    outcome: np.ndarray
+    book: np.ndarray
+    odds: np.ndarray
+    scan_ts: np.ndarray             # scan index -> scan time
+    market_sport: np.ndarray        # market code -> sport code
+    market_commence: np.ndarray     # market code -> start time (NaN if unknown)
+    market_outcomes: np.ndarray     # market code -> number of distinct outcomes
+    outcome_market: np.ndarray      # outcome code -> market code
+    meta: dict                      # names: markets, outcomes, books, sports
+
+    def __len__(self) -> int:
+        return len(self.odds)
+
+    @property
+    def n_scans(self) -> int:
+        return len(self.scan_ts)
+
+    def market_label(self, code: int) -> str:
+        event_id, event_name, market, point = self.meta['markets'][code]
+        return '{} — {}'.format(event_name, market_label(market, point))
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def build_columns(db_path: str, out_dir: str, chunk_rows: int = 500000) -> int:
+    """
+    Export the quotes of a history database to columns in out_dir.
+    Works in chunks of whole scans, so memory stays bounded whatever the
+    history size. The count and the export read one snapshot, so a
+    --history writer committing meanwhile changes neither. Returns the
+    number of rows written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute('BEGIN')
+    total, last_rowid = conn.execute('SELECT COUNT(*), MAX(rowid) FROM quotes').fetchone()
+    out = {
+        name: np.lib.format.open_memmap(
+            os.path.join(out_dir, name + '.npy'), mode='w+', dtype=dtype, shape=(total,)
+        )
+        for name, dtype in ROW_COLUMNS.items()
+    }
+    markets: Dict[tuple, int] = {}
+    market_rows: List[list] = []        # [event_id, event_name, market, point]
+    market_sport: List[int] = []
+    market_commence: List[float] = []
+    outcomes: Dict[tuple, int] = {}
+    books: Dict[str, int] = {}
+    sports: Dict[str, int] = {}
+    scans: Dict[int, int] = {}
+    scan_ts: List[float] = []
+    written = 0
+
+    def flush(chunk: Dict[str, list]) -> None:
+        nonlocal written
+        arrays = {
+            name: np.asarray(chunk[name], dtype=dtype) for name, dtype in ROW_COLUMNS.items()
+        }
+        order = np.lexsort((arrays['book'], arrays['outcome'], arrays['market'], arrays['scan']))
+        for name in ROW_COLUMNS:
+            out[name][written:written + len(order)] = arrays[name][order]
+        written += len(order)
+
+    cur = conn.execute(
+        'SELECT scan_id, ts, sport, event_id, event_name, commence_time, '
+        'bookmaker_id, market, line, outcome, decimal_odds FROM quotes '
+        'WHERE rowid <= ? ORDER BY rowid', (last_rowid or 0,)
+    )   # rowid order is scan order: the history writer inserts scans in sequence
+    chunk: Dict[str, list] = {name: [] for name in ROW_COLUMNS}
+    for (scan_id, ts, sport, event_id, event_name, commence,
+         book, market, line, outcome, odds) in cur:
+        s = scans.get(scan_id)
+        if s is None:
+            # Only cut chunks between scans so each scan is sorted as a whole
+            if len(chunk['odds']) >= chunk_rows:
+                flush(chunk)
+                chunk = {name: [] for name in ROW_COLUMNS}
+            s = scans[scan_id] = len(scans)
+            scan_ts.append(ts)
+        # Same grouping as arbitrage.market_point: spreads by the home line
+        point = line
+        if market == MARKET_SPREAD and line is not None \
+                and outcome != event_name.split(' vs ')[0]:
+            point = -line
+        mkey = (event_id, market, point)
+        m = markets.get(mkey)
+        if m is None:
+            m = markets[mkey] = len(markets)
+            market_rows.append([event_id, event_name, market, point])
+            market_sport.append(sports.setdefault(sport, len(sports)))
+            ts_start = commence_timestamp(commence)
+            market_commence.append(np.nan if ts_start is None else ts_start)
+        chunk['ts'].append(ts)
+        chunk['scan'].append(s)
+        chunk['market'].append(m)
+        chunk['outcome'].append(outcomes.setdefault((m, outcome), len(outcomes)))
+        chunk['book'].append(books.setdefault(book, len(books)))
+        chunk['odds'].append(odds)
+    if chunk['odds']:
+        flush(chunk)
+    conn.rollback()
+    conn.close()
+    for column in out.values():
+        column.flush()
+    del out
+
+    outcome_market = np.zeros(len(outcomes), dtype=np.int32)
+    for (m, _), code in outcomes.items():
+        outcome_market[code] = m
+    np.save(os.path.join(out_dir, 'scan_ts.npy'), np.asarray(scan_ts, dtype=np.float64))
+    np.save(os.path.join(out_dir, 'market_sport.npy'), np.asarray(market_sport, dtype=np.int16))
+    np.save(os.path.join(out_dir, 'market_commence.npy'),
+            np.asarray(market_commence, dtype=np.float64))
+    np.save(os.path.join(out_dir, 'market_outcomes.npy'),
+            np.bincount(outcome_market, minlength=len(markets)).astype(np.int16))
+    np.save(os.path.join(out_dir, 'outcome_market.npy'), outcome_market)
+
+    meta = {
+        'source': os.path.abspath(db_path),
+        'last_scan_id': max(scans) if scans else 0,
+        'rows': written,
+        'markets': market_rows,
+        'outcomes': [name for (_, name) in sorted(outcomes, key=outcomes.get)],
+        'books': sorted(books, key=books.get),
+        'sports': sorted(sports, key=sports.get),
+    }
+    with open(os.path.join(out_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    message.log_debug(
+        'Exported {} quotes from {} scans to {}'.format(written, len(scans), out_dir),
+        'columns',
+    )
+    return written
+
+
+def load_columns(out_dir: str) -> HistoryColumns:
+    """Memory-map columns written by build_columns()."""
+    def load(name: str, mmap: Optional[str] = 'r') -> np.ndarray:
+        return np.load(os.path.join(out_dir, name + '.npy'), mmap_mode=mmap)
+
+    with open(os.path.join(out_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return HistoryColumns(
+        **{name: load(name) for name in ROW_COLUMNS},
+        scan_ts=load('scan_ts', None),
+        market_sport=load('market_sport', None),
+        market_commence=load('market_commence', None),
+        market_outcomes=load('market_outcomes', None),
+        outcome_market=load('outcome_market', None),
+        meta=meta,
+    )
+
+
+def open_history_columns(db_path: str, out_dir: Optional[str] = None) -> HistoryColumns:
+    """
+    Load the columns for a history database, (re)building them first when
+    they are missing or older than the database's latest scan.
+    """
+    out_dir = out_dir or os.path.splitext(db_path)[0] + '_columns'
+    meta_path = os.path.join(out_dir, 'meta.json')
+    stale = True
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            last = json.load(f).get('last_scan_id', -1)
+        conn = sqlite3.connect(db_path)
+        latest = conn.execute('SELECT COALESCE(MAX(scan_id), 0) FROM scans').fetchone()[0]
+        conn.close()
+        stale = latest != last
+    if stale:
+        build_columns(db_path, out_dir)
+    return load_columns(out_dir)
@@ -19,6 +19,10 @@ ODDS_API_CANADIAN_BOOKMAKERS = [
     'betrivers',     # BetRivers Canada
 ]
 
+# Markets requested from The Odds API in the same call (h2h = moneyline).
+# Note: the API bills each market as a separate unit of quota.
+ODDS_API_MARKETS = ['h2h', 'spreads', 'totals']
+
 # ---------------------------------------------------------------------------
 # OddsChecker bookmaker codes → display names (Canadian operators)
 # ---------------------------------------------------------------------------
@@ -80,6 +84,26 @@ ODDSCHECKER_SPORT_URLS = {
 REQUEST_DELAY = 1.5          # Seconds between requests (be polite)
 MAX_RETRIES = 3
 REQUEST_TIMEOUT = 30         # Seconds
+COLLECTOR_TIMEOUT = 180      # Seconds a --workers process may take per scan before restart
+TIMING_WINDOW = 20           # Scans per scraper behind the --health panel
+TIMING_SLOW_FACTOR = 2.0     # A scraper this many times slower than the median is 'slow'
+
+# Log file (see message.py)
+LOG_FILE = 'log.txt'
+LOG_FORMAT = 'text'             # 'text' (LEVEL::source::message) or 'json' (one record per line)
+LOG_MAX_BYTES = 10 * 1024 * 1024    # Rotate the log file at this size
+LOG_BACKUPS = 3                 # Rotated files kept (log.txt.1 ... log.txt.N)
+
+# Trace of the scan pipeline  (--trace FILE, see tracing.py)
+TRACE_MAX_EVENTS = 1000000      # Spans kept in memory; later ones are counted and dropped
+
+# Sampling profiler  (--profile, see profiling.py)
+PROFILE_INTERVAL = 0.005        # Seconds between stack samples
+PROFILE_TOP = 10                # Functions listed per stage in the report
+PROFILE_OUTPUT = 'profile'      # Writes profile.collapsed and profile.txt
+
+# Recorded HTTP responses  (--record / --replay, see recording.py)
+RECORD_REDACT_PARAMS = ('apiKey',)  # Query parameters never written to a recording
 
 DEFAULT_HEADERS = {
     'User-Agent': (
@@ -95,10 +119,93 @@ DEFAULT_HEADERS = {
 # Arbitrage detection settings
 # ---------------------------------------------------------------------------
 MIN_PROFIT_PCT = 0.5    # Only report opportunities above this %
-MAX_PROFIT_PCT = 20.0   # Sanity-check cap (above this is likely bad data)
+MAX_PROFIT_PCT = 20.0   # Last-resort cap (above this is certainly bad data)
 DEFAULT_BET_AMOUNT = 100.0  # Default total stake in CAD
 
+# Events whose margin to break-even is below this % go on the near-arb watchlist
+NEAR_ARB_MARGIN_PCT = 1.0
+
+# Bad-price filter: drop quotes far out of line with the other books' consensus
+OUTLIER_FILTER = True
+OUTLIER_Z_THRESHOLD = 4.0   # Robust z-score (median / MAD) above which a quote is dropped
+OUTLIER_MIN_BOOKS = 3       # Need at least this many books to form a consensus
+OUTLIER_MIN_SPREAD = 0.01   # Floor on the implied-probability spread (1 point)
+
+# Value bets: quotes longer than the margin-free consensus fair price
+VALUE_MIN_EDGE_PCT = 3.0    # Minimum expected value (%) to report
+VALUE_MIN_BOOKS = 3         # Books quoting every outcome needed for a consensus
+
+# Middles: Over/Under or spread pairs on different lines that cover every result
+MIDDLE_NEAR_MARGIN_PCT = 2.0    # Also show pairs whose worst case loses up to this %
+
 # ---------------------------------------------------------------------------
 # Watch / continuous-scan settings
 # ---------------------------------------------------------------------------
 WATCH_INTERVAL = 60     # Default seconds between scans in --watch mode
+LIVE_FPS = 4            # Max redraws per second of the --live dashboard
+LIVE_PAGE_SECONDS = 8   # Seconds each page of a long --live table stays up
+
+# Notifications  (--notify, see notify.py)
+NOTIFY_COALESCE_WINDOW = 1.0    # Seconds a burst of alerts is gathered into one summary
+NOTIFY_MIN_INTERVAL = 10.0      # Min seconds between two desktop notifications
+NOTIFY_MAX_PENDING = 100        # Alerts kept per sink while rate-limited (least profitable dropped)
+NOTIFY_SUMMARY_LINES = 3        # Alerts listed in a coalesced summary
+
+# Webhook sinks  (--webhook, see webhooks.py)
+WEBHOOK_CONCURRENCY = 4         # Sender threads = pooled keep-alive connections per URL
+WEBHOOK_TIMEOUT = 10            # Seconds per POST
+WEBHOOK_COALESCE_WINDOW = 0.01  # Seconds a burst is gathered (webhooks are not rate-limited)
+WEBHOOK_MAX_ATTEMPTS = 8        # Tries per notification before it is dropped
+WEBHOOK_RETRY_BASE = 2.0        # First retry after this many seconds, doubling each time
+WEBHOOK_RETRY_MAX = 500         # Notifications kept for retry per URL (oldest dropped)
+WEBHOOK_RETRY_FILE = 'webhook_retry_{}.json'    # Retry queue per endpoint ({} = URL hash)
+WEBHOOK_LATENCY_SAMPLES = 500   # Recent deliveries behind the latency percentiles
+
+# Already-alerted opportunities (see seen.py)
+SEEN_STATE_FILE = 'seen_state.json'     # Persisted across restarts
+SEEN_TTL = 6 * 3600         # Forget opportunities not seen for this many seconds
+REALERT_AFTER = 15 * 60     # Alert again if one reappears after being gone this long
+SEEN_MAX_ENTRIES = 50000    # Hard cap; least recently seen are dropped first
+STATE_SAVE_EVERY = 10       # Watch mode saves seen / lifetime state every N scans and at exit
+
+# Opportunity lifetimes and survival scoring (see lifetimes.py)
+LIFETIME_STATE_FILE = 'lifetimes.json'
+LIFETIME_MAX_SAMPLES = 500  # Recent lifetimes kept per (books, sport, time-to-start) bucket
+LIFETIME_MAX_GAP = 600      # Scans further apart than this (s) mean the scanner was stopped
+SURVIVAL_HORIZON = 120      # Seconds needed to place every leg by hand
+SURVIVAL_MIN_SAMPLES = 5    # Lifetimes a bucket needs before it is trusted
+SURVIVAL_PRIOR = 0.5        # Survival assumed with no usable history
+
+# ---------------------------------------------------------------------------
+# Odds history  (--history, see history.py)
+# ---------------------------------------------------------------------------
+HISTORY_DB = 'odds_history.db'
+HISTORY_BATCH_SIZE = 20000      # Quotes per write transaction
+HISTORY_FLUSH_INTERVAL = 2.0    # Max seconds a queued scan waits before commit
+HISTORY_QUEUE_SIZE = 20         # Scans the writer may fall behind before dropping
+LINE_MOVE_WINDOW = 600          # Max seconds from a book's move to others following it (lines)
+
+# ---------------------------------------------------------------------------
+# Local HTTP/JSON service  (--serve, see service.py)
+# ---------------------------------------------------------------------------
+SERVE_HOST = '127.0.0.1'        # Localhost only; set '0.0.0.0' to share on the LAN
+SERVE_PORT = 8765
+STREAM_BUFFER = 32              # Scans' events queued per /stream client before it is dropped
+STREAM_HEARTBEAT = 15.0         # Seconds between keep-alive comments on idle streams
+STREAM_WRITE_TIMEOUT = 5.0      # A client not reading for this long is disconnected
+
+# Prometheus metrics  (--metrics, see metrics.py)
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# ---------------------------------------------------------------------------
+# Distributed collection  (collector nodes + --aggregate, see nodes.py)
+# ---------------------------------------------------------------------------
+NODE_HOST = '127.0.0.1'         # Aggregator bind address; '0.0.0.0' needs NODE_SECRET
+NODE_PORT = 9000                # Aggregator TCP port
+NODE_SECRET = os.environ.get('NODE_SECRET', '')     # Shared by the aggregator and its nodes
+NODE_WINDOW = 4                 # Batches a node may have awaiting acknowledgement
+NODE_OUTBOX = 16                # Unacknowledged batches a node keeps for resume
+NODE_STALE_AFTER = 300          # Seconds after which a node's last batch is ignored
+NODE_IO_TIMEOUT = 30            # Seconds a connect / frame read may take
+NODE_CLOCK_SYNC_INTERVAL = 30   # Seconds between clock-offset pings (also keep-alive)
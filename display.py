@@ -3,14 +3,25 @@ Rich terminal display for the Canadian Arbitrage Scanner.
 
 Provides:
   - print_rich_dashboard()  — summary table + step-by-step bet cards
+  - LiveDashboard           — in-place watch-mode dashboard (--live)
+  - print_near_arbs()       — watchlist of events closest to break-even
+  - print_value_bets()      — quotes longer than the consensus fair price
+  - print_middles()         — cross-line spread / total pairs covering every result
+  - print_scan_stats()      — per-sport rejection counters and implied-sum histogram
+  - print_scan_health()     — per-scraper timing / health panel (--health)
+  - print_backtest_results() — parameter sweep summary from backtest.py
   - format_step_instructions() — plain-text step format (rich fallback)
 """
 import sys
+import threading
+import time
+import traceback
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, List, Optional
 
 try:
-    from rich.console import Console
+    from rich.console import Console, Group
+    from rich.live import Live
     from rich.table import Table
     from rich.panel import Panel
     from rich.text import Text
@@ -20,8 +31,10 @@ try:
 except ImportError:
     RICH_AVAILABLE = False
 
-# Import lazily to avoid circular issues at module level
-# (ArbitrageOpportunity is used in type hints only at runtime)
+import tracing
+from arbitrage import MARKET_MONEYLINE, market_label, outcome_label
+from config import LIVE_FPS, LIVE_PAGE_SECONDS, SURVIVAL_HORIZON
+from message import message
 
 SPORT_EMOJI = {
     'NHL': '\U0001f3d2',   # 🏒
@@ -48,6 +61,7 @@ def format_step_instructions(opp) -> str:
         sep,
         'ARBITRAGE OPPORTUNITY  --  {} {}'.format(sport_icon, opp.sport),
         'Event  : {}'.format(opp.event_name),
+        'Market : {}'.format(market_label(opp.market, opp.line)),
         'Time   : {}'.format(_fmt_time(opp.commence_time)),
         '',
     ]
@@ -58,13 +72,19 @@ def format_step_instructions(opp) -> str:
         if entry.url:
             lines.append('         {}'.format(entry.url))
         lines.append(
-            '         Bet ${:.2f} on {} @ {}'.format(stake, outcome, entry.decimal_odds)
+            '         Bet ${:.2f} on {} @ {}'.format(
+                stake, outcome_label(entry), entry.decimal_odds
+            )
         )
         lines.append('')
 
     lines += [
         'Guaranteed profit: ${:.2f}  ({:.2f}%)'.format(opp.profit, opp.profit_pct),
         'Total stake: ${:.2f} CAD'.format(opp.total_stake),
+    ]
+    if opp.survival is not None:
+        lines.append('Chance still open in {:g}s: {:.0%}'.format(SURVIVAL_HORIZON, opp.survival))
+    lines += [
         '!! Place ALL bets within 2 minutes !!',
         sep,
     ]
@@ -120,8 +140,11 @@ def print_rich_dashboard(
         return
 
     # ---- Summary table ----
+    scored = any(o.survival is not None for o in opportunities)
     table = Table(
-        title='[bold]Opportunities — sorted by profit[/bold]',
+        title='[bold]Opportunities — sorted by {}[/bold]'.format(
+            'profit x survival' if scored else 'profit'
+        ),
         box=box.ROUNDED,
         show_lines=True,
         header_style='bold magenta',
@@ -132,6 +155,8 @@ def print_rich_dashboard(
     table.add_column('Event',   min_width=28)
     table.add_column('Profit',  justify='right',        width=9,  style='bold green')
     table.add_column('%',       justify='right',        width=7,  style='bold green')
+    if scored:
+        table.add_column('Survive', justify='right',    width=7)
     table.add_column('Books',   min_width=22)
     table.add_column('Starts',                          width=18)
 
@@ -139,15 +164,16 @@ def print_rich_dashboard(
         books_str = ' / '.join(e.bookmaker for e in opp.best_offers.values())
         sport_str = '{} {}'.format(SPORT_EMOJI.get(opp.sport, ''), opp.sport)
         pstyle = 'bold bright_green' if opp.profit_pct >= 2.0 else 'green'
-        table.add_row(
+        row = [
             str(i),
             sport_str,
-            opp.event_name,
+            _event_title(opp),
             '[{}]${:.2f}[/{}]'.format(pstyle, opp.profit, pstyle),
             '[{}]{:.2f}%[/{}]'.format(pstyle, opp.profit_pct, pstyle),
-            books_str,
-            _fmt_time(opp.commence_time),
-        )
+        ]
+        if scored:
+            row.append('-' if opp.survival is None else '{:.0%}'.format(opp.survival))
+        table.add_row(*row, books_str, _fmt_time(opp.commence_time))
 
     _console.print(table)
 
@@ -166,7 +192,7 @@ def _print_rich_card(opp, num: int) -> None:
     title = (
         '[bold]#{} — {} {} — '
         '[{}]${:.2f} guaranteed profit  ({:.2f}%)[/{}][/bold]'
-    ).format(num, sport_icon, opp.event_name, pstyle, opp.profit, opp.profit_pct, pstyle)
+    ).format(num, sport_icon, _event_title(opp), pstyle, opp.profit, opp.profit_pct, pstyle)
 
     lines = []
     for step, (outcome, entry) in enumerate(opp.best_offers.items(), 1):
@@ -185,7 +211,7 @@ def _print_rich_card(opp, num: int) -> None:
             '         Bet [bold yellow]${:.2f}[/bold yellow]'
             ' on [italic]{}[/italic]'
             ' @ [bold white]{:.2f}[/bold white]'.format(
-                stake, outcome, entry.decimal_odds
+                stake, outcome_label(entry), entry.decimal_odds
             )
         )
         lines.append('')
@@ -205,6 +231,591 @@ def _print_rich_card(opp, num: int) -> None:
     _console.print()
 
 
+# ---------------------------------------------------------------------------
+# Live (in-place) dashboard
+# ---------------------------------------------------------------------------
+
+def _row_key(opp) -> str:
+    books = '+'.join(sorted(e.bookmaker_id for e in opp.best_offers.values()))
+    return '{}|{}|{}|{}'.format(opp.event_name, opp.market, opp.line, books)
+
+
+class LiveDashboard:
+    """
+    Watch-mode dashboard drawn in place with rich.live (--live).
+
+    The scan loop only hands over results (update) and status (set_status);
+    a render thread redraws at most LIVE_FPS times per second, and only when
+    something changed: new results, a status change, a page turn or the
+    countdown ticking. Table cells are cached per opportunity and rebuilt only
+    when its prices change. Lists longer than the terminal are paged, turning
+    every LIVE_PAGE_SECONDS; the best opportunity's bet steps stay below the
+    table. Log lines print above the live region.
+    """
+
+    def __init__(self, fps: float = LIVE_FPS, page_seconds: float = LIVE_PAGE_SECONDS):
+        self.period = 1.0 / fps
+        self.page_seconds = page_seconds
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._live: Optional['Live'] = None
+        self._thread: Optional[threading.Thread] = None
+        self._opportunities: list = []
+        self._header: Optional['Panel'] = None
+        self._health: Optional['Table'] = None
+        self._new: set = set()
+        self._pct: Dict[str, float] = {}             # key -> profit % this scan
+        self._previous_pct: Dict[str, float] = {}    # key -> profit % last scan
+        self._rows: Dict[str, tuple] = {}     # key -> (fingerprint, cells)
+        self._status = 'Starting...'
+        self._next_scan: Optional[float] = None
+        self._page = 0
+        self._page_turned = time.time()
+        self._render_error = ''     # last render error logged (repeats are not)
+
+    def start(self) -> 'LiveDashboard':
+        self._live = Live(console=_console, auto_refresh=False, redirect_stdout=True,
+                          redirect_stderr=True)
+        self._live.start()
+        self._thread = threading.Thread(target=self._run, name='live-dashboard', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._live is not None:
+            self._live.stop()
+
+    def update(self, opportunities: list, scan_count: int, elapsed: float,
+               total_odds: int, new_opportunities: list = (),
+               health: Optional[list] = None) -> None:
+        """Hand over one scan's results (and scraper health rows); returns immediately."""
+        header = Text()
+        header.append('  Canadian Sports Betting Arbitrage Scanner\n', style='bold cyan')
+        header.append('  Scan #{} | {} | {:.1f}s | {} odds entries collected'.format(
+            scan_count, datetime.now().strftime('%Y-%m-%d  %H:%M:%S'), elapsed, total_odds,
+        ), style='dim')
+        if new_opportunities:
+            header.append('   [{} NEW]'.format(len(new_opportunities)), style='bold bright_green')
+        with self._lock:
+            keys = [_row_key(o) for o in opportunities]
+            self._previous_pct = self._pct
+            self._pct = {k: o.profit_pct for k, o in zip(keys, opportunities)}
+            self._opportunities = list(zip(keys, opportunities))
+            self._new = {_row_key(o) for o in new_opportunities}
+            self._header = Panel(header, box=box.DOUBLE_EDGE, padding=(0, 1))
+            self._health = _health_table(health) if health else None
+            # Forget cached rows of opportunities that closed
+            self._rows = {k: v for k, v in self._rows.items() if k in self._pct}
+        self._dirty.set()
+
+    def set_status(self, text: str, next_scan: Optional[float] = None) -> None:
+        """Status line under the table; with next_scan, a countdown to that time."""
+        with self._lock:
+            self._status, self._next_scan = text, next_scan
+        self._dirty.set()
+
+    # ------------------------------------------------------------------
+    # Render thread
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Wake for changes, or once a second for the countdown / page turn
+            self._dirty.wait(1.0)
+            self._dirty.clear()
+            if self._stop.is_set():
+                break
+            started = time.time()
+            try:
+                with tracing.span('live render', 'render'):
+                    self._live.update(self._render(), refresh=True)
+            except Exception as exc:
+                # A rendering bug must never take down the scanner, but must not
+                # go unnoticed either: log each distinct error once
+                error = '{}: {}'.format(type(exc).__name__, exc)
+                if error != self._render_error:
+                    self._render_error = error
+                    message.log_error('Live dashboard render failed: {}\n{}'.format(
+                        error, traceback.format_exc().rstrip()), 'display')
+            self._stop.wait(max(0.0, self.period - (time.time() - started)))
+
+    def _render(self):
+        with self._lock:
+            opportunities = list(self._opportunities)
+            header, status, next_scan = self._header, self._status, self._next_scan
+            health = self._health
+        parts = [header] if header is not None else []
+        # The health panel takes its rows plus title, header and caption lines
+        reserved = health.row_count + 5 if health is not None else 0
+
+        if not opportunities:
+            parts.append(Text('  No arbitrage opportunities found this scan.', style='yellow'))
+            page_text = ''
+        else:
+            top = opportunities[0][1]
+            # Leave room for the header, table chrome, the top card and the status line
+            per_page = max(3, _console.height - 13 - 2 * len(top.best_offers) - reserved)
+            pages = (len(opportunities) + per_page - 1) // per_page
+            now = time.time()
+            if now - self._page_turned >= self.page_seconds:
+                self._page, self._page_turned = self._page + 1, now
+            self._page %= pages
+            first = self._page * per_page
+            parts.append(self._table(opportunities[first:first + per_page], first))
+            parts.append(self._top_card(top))
+            page_text = '   page {}/{}'.format(self._page + 1, pages) if pages > 1 else ''
+        if health is not None:
+            parts.append(health)
+
+        if next_scan is not None:
+            status = '{} {:.0f}s'.format(status, max(0.0, next_scan - time.time()))
+        parts.append(Text('  {}{}   (Ctrl+C to stop)'.format(status, page_text), style='dim'))
+        return Group(*parts)
+
+    def _table(self, rows: list, offset: int) -> 'Table':
+        scored = any(o.survival is not None for _, o in rows)
+        table = Table(
+            title='[bold]Opportunities — sorted by {}[/bold]'.format(
+                'profit x survival' if scored else 'profit'
+            ),
+            box=box.SIMPLE_HEAD,
+            header_style='bold magenta',
+            expand=True,
+        )
+        # One line per row: long names are cut, never wrapped
+        table.add_column('#', style='dim', width=3, no_wrap=True)
+        table.add_column('Sport', width=6, no_wrap=True)
+        table.add_column('Event', ratio=3, no_wrap=True)
+        table.add_column('Profit', justify='right', width=8, no_wrap=True)
+        table.add_column('%', justify='right', width=8, no_wrap=True)
+        if scored:
+            table.add_column('Survive', justify='right', width=7, no_wrap=True)
+        table.add_column('Books', ratio=2, no_wrap=True)
+        table.add_column('Starts', width=16, no_wrap=True)
+        for i, (key, opp) in enumerate(rows, offset + 1):
+            cells = self._cells(key, opp)
+            table.add_row(str(i), *(cells if scored else cells[:4] + cells[5:]))
+        return table
+
+    def _cells(self, key: str, opp) -> tuple:
+        """Row cells for one opportunity, rebuilt only when its prices change."""
+        previous = self._previous_pct.get(key)
+        fingerprint = (
+            opp.profit_pct, opp.survival, key in self._new, previous,
+            tuple(e.decimal_odds for e in opp.best_offers.values()),
+        )
+        cached = self._rows.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        pstyle = 'bold bright_green' if opp.profit_pct >= 2.0 else 'green'
+        trend = ''
+        if previous is not None and opp.profit_pct != previous:
+            trend = ' ▲' if opp.profit_pct > previous else ' ▼'
+        event = _event_title(opp)
+        if key in self._new:
+            event = '[bold bright_green]NEW[/bold bright_green] ' + event
+        cells = (
+            '{} {}'.format(SPORT_EMOJI.get(opp.sport, ''), opp.sport),
+            event,
+            '[{0}]${1:.2f}[/{0}]'.format(pstyle, opp.profit),
+            '[{0}]{1:.2f}%{2}[/{0}]'.format(pstyle, opp.profit_pct, trend),
+            '-' if opp.survival is None else '{:.0%}'.format(opp.survival),
+            ' / '.join(e.bookmaker for e in opp.best_offers.values()),
+            _fmt_time(opp.commence_time),
+        )
+        self._rows[key] = (fingerprint, cells)
+        return cells
+
+    @staticmethod
+    def _top_card(opp) -> 'Panel':
+        lines = []
+        for step, (outcome, entry) in enumerate(opp.best_offers.items(), 1):
+            lines.append(
+                '[bold cyan]STEP {}[/bold cyan] Open [bold]{}[/bold] — bet '
+                '[bold yellow]${:.2f}[/bold yellow] on [italic]{}[/italic] @ {:.2f}'.format(
+                    step, entry.bookmaker, opp.stakes[outcome], outcome_label(entry),
+                    entry.decimal_odds,
+                )
+            )
+            if entry.url:
+                lines.append('         [link={0}][blue]{0}[/blue][/link]'.format(entry.url))
+        return Panel(
+            '\n'.join(lines),
+            title='[bold]Best: {} — ${:.2f} ({:.2f}%)[/bold]'.format(
+                _event_title(opp), opp.profit, opp.profit_pct
+            ),
+            border_style='bright_green' if opp.profit_pct >= 2.0 else 'yellow',
+        )
+
+
+# ---------------------------------------------------------------------------
+# Near-arb watchlist
+# ---------------------------------------------------------------------------
+
+def print_near_arbs(entries: list) -> None:
+    """Print watchlist entries (see watchlist.WatchEntry) closest to break-even."""
+    if not entries:
+        return
+    if not RICH_AVAILABLE:
+        print('\nNear-arb watchlist (margin to break-even):')
+        for w in entries:
+            print('  {:+.2f}%  [{}] {}  ({})'.format(
+                w.margin_pct, w.sport, _event_title(w),
+                ' / '.join(e.bookmaker for e in w.best_offers.values()),
+            ))
+        return
+
+    table = Table(
+        title='[bold]Near-arb watchlist — margin to break-even[/bold]',
+        box=box.SIMPLE_HEAVY,
+        header_style='bold yellow',
+        min_width=80,
+    )
+    table.add_column('Margin', justify='right', width=8)
+    table.add_column('Sport',                   width=7)
+    table.add_column('Event',   min_width=28)
+    table.add_column('Best prices', min_width=30)
+    table.add_column('Starts',                  width=18)
+    for w in entries:
+        prices = '  '.join(
+            '{} {:.2f} ({})'.format(outcome_label(e), e.decimal_odds, e.bookmaker)
+            for e in w.best_offers.values()
+        )
+        table.add_row(
+            '{:+.2f}%'.format(w.margin_pct),
+            '{} {}'.format(SPORT_EMOJI.get(w.sport, ''), w.sport),
+            _event_title(w),
+            prices,
+            _fmt_time(w.commence_time),
+        )
+    _console.print(table)
+
+
+# ---------------------------------------------------------------------------
+# Value bets
+# ---------------------------------------------------------------------------
+
+def print_value_bets(value_bets: list) -> None:
+    """Print value bets (see value_bets.ValueBet) sorted by edge."""
+    if not value_bets:
+        return
+    if not RICH_AVAILABLE:
+        print('\nValue bets (price vs. margin-free consensus):')
+        for v in value_bets:
+            print('  +{:.2f}%  [{}] {}  {} @ {} ({}, fair {:.2f})'.format(
+                v.edge_pct, v.sport, v.event_name, outcome_label(v.entry),
+                v.entry.decimal_odds, v.entry.bookmaker, v.fair_odds,
+            ))
+        return
+
+    table = Table(
+        title='[bold]Value bets — price vs. margin-free consensus[/bold]',
+        box=box.ROUNDED,
+        header_style='bold blue',
+        min_width=80,
+    )
+    table.add_column('Edge',    justify='right', width=8, style='bold green')
+    table.add_column('Sport',                    width=7)
+    table.add_column('Event',   min_width=28)
+    table.add_column('Bet',     min_width=18)
+    table.add_column('Book',    min_width=12)
+    table.add_column('Odds',    justify='right', width=6)
+    table.add_column('Fair',    justify='right', width=6)
+    table.add_column('Books',   justify='right', width=5, style='dim')
+    for v in value_bets:
+        table.add_row(
+            '+{:.2f}%'.format(v.edge_pct),
+            '{} {}'.format(SPORT_EMOJI.get(v.sport, ''), v.sport),
+            v.event_name,
+            outcome_label(v.entry),
+            v.entry.bookmaker,
+            '{:.2f}'.format(v.entry.decimal_odds),
+            '{:.2f}'.format(v.fair_odds),
+            str(v.n_books),
+        )
+    _console.print(table)
+
+
+# ---------------------------------------------------------------------------
+# Middles
+# ---------------------------------------------------------------------------
+
+def print_middles(middles: list) -> None:
+    """Print middles / cross-line arbs (see middles.MiddleOpportunity)."""
+    if not middles:
+        return
+    if not RICH_AVAILABLE:
+        print('\nMiddles (worst case / if the middle hits):')
+        for m in middles:
+            print('  {:+.2f} / {:+.2f}  [{}] {}  {} @ {} ({}) + {} @ {} ({})  {}'.format(
+                m.worst_case_profit, m.middle_profit, m.sport, m.event_name,
+                outcome_label(m.high), m.high.decimal_odds, m.high.bookmaker,
+                outcome_label(m.low), m.low.decimal_odds, m.low.bookmaker,
+                _middle_window(m),
+            ))
+        return
+
+    table = Table(
+        title='[bold]Middles — cross-line pairs covering every result[/bold]',
+        box=box.ROUNDED,
+        header_style='bold magenta',
+        min_width=80,
+    )
+    table.add_column('Worst',   justify='right', width=9)
+    table.add_column('Middle',  justify='right', width=9, style='bold green')
+    table.add_column('Sport',                    width=7)
+    table.add_column('Event',   min_width=28)
+    table.add_column('Legs',    min_width=30)
+    table.add_column('Middle window', min_width=16)
+    for m in middles:
+        worst_style = 'green' if m.worst_case_profit >= 0 else 'yellow'
+        table.add_row(
+            '[{}]{:+.2f}[/{}]'.format(worst_style, m.worst_case_profit, worst_style),
+            '{:+.2f}'.format(m.middle_profit),
+            '{} {}'.format(SPORT_EMOJI.get(m.sport, ''), m.sport),
+            m.event_name,
+            '{} @ {:.2f} ({}) ${:.2f}\n{} @ {:.2f} ({}) ${:.2f}'.format(
+                outcome_label(m.high), m.high.decimal_odds, m.high.bookmaker,
+                m.stakes[outcome_label(m.high)],
+                outcome_label(m.low), m.low.decimal_odds, m.low.bookmaker,
+                m.stakes[outcome_label(m.low)],
+            ),
+            _middle_window(m),
+        )
+    _console.print(table)
+
+
+def _middle_window(m) -> str:
+    """Results that win both legs, e.g. 'Total 5.5-6.5' or 'Home by 1.5-2.5'."""
+    from arbitrage import MARKET_TOTAL
+
+    label = 'Total' if m.market == MARKET_TOTAL else 'Home by'
+    return '{} {:g}-{:g}'.format(label, m.window[0], m.window[1])
+
+
+# ---------------------------------------------------------------------------
+# Scan statistics
+# ---------------------------------------------------------------------------
+
+def print_scan_stats(stats) -> None:
+    """Print per-sport rejection counters (see arbitrage.ScanStats)."""
+    from arbitrage import IMPLIED_SUM_EDGES
+
+    totals = stats.totals()
+    edges = ['<{:g}'.format(IMPLIED_SUM_EDGES[0])] + [
+        '{:g}+'.format(e) for e in IMPLIED_SUM_EDGES
+    ]
+    hist = '  '.join(
+        '{}:{}'.format(label, count)
+        for label, count in zip(edges, totals.implied_sum_hist) if count
+    )
+    if not RICH_AVAILABLE:
+        print('\nScan statistics:')
+        print(stats.format_summary())
+        print('Implied-sum histogram: {}'.format(hist or '-'))
+        return
+
+    table = Table(
+        title='[bold]Scan statistics — why events were not reported[/bold]',
+        box=box.SIMPLE_HEAVY,
+        header_style='bold cyan',
+    )
+    for col in ('Sport', 'Entries', 'Bad odds', 'Outliers', 'Events',
+                '<2 outcomes', 'No arb', 'Below min', 'Above max', 'Found'):
+        table.add_column(col, justify='left' if col == 'Sport' else 'right')
+    rows = sorted(stats.by_sport.items()) + [('ALL', totals)]
+    for label, c in rows:
+        table.add_row(
+            label, str(c.entries), str(c.dropped_bad_odds), str(c.dropped_outliers),
+            str(c.events), str(c.single_outcome), str(c.no_arb),
+            str(c.below_min_profit), str(c.above_max_profit), str(c.opportunities),
+            style='bold' if label == 'ALL' else None,
+        )
+    _console.print(table)
+    _console.print('[dim]  Implied-sum histogram: {}[/dim]'.format(hist or '-'))
+
+
+_HEALTH_COLUMNS = ('Scraper', 'Status', 'OK', 'Wall', 'TTFB', 'MB', 'Entries', 'Retries',
+                   'Sleep')
+_HEALTH_STYLE = {'ok': 'green', 'slow': 'yellow', 'empty': 'yellow', 'failing': 'bold red'}
+
+
+def _health_cells(r) -> tuple:
+    return (
+        r.name, r.status, '{:.0f}%'.format(r.ok_pct), '{:.1f}s'.format(r.wall_p50),
+        '{:.2f}s'.format(r.ttfb_mean), '{:.2f}'.format(r.mb_per_scan), str(r.entries),
+        str(r.retries), '{:.0%}'.format(r.sleep_share),
+    )
+
+
+def _health_table(rows: list) -> 'Table':
+    table = Table(
+        title='[bold]Scraper health — last {} scans[/bold]'.format(max(r.scans for r in rows)),
+        caption='[dim]Wall: median per scan. TTFB: mean per request. Sleep: share in delays.[/dim]',
+        box=box.SIMPLE_HEAD, header_style='bold cyan', pad_edge=False, collapse_padding=True,
+    )
+    for i, col in enumerate(_HEALTH_COLUMNS):
+        table.add_column(col, justify='left' if i < 2 else 'right', no_wrap=True)
+    for r in rows:
+        cells = list(_health_cells(r))
+        cells[1] = '[{}]{}[/{}]'.format(_HEALTH_STYLE[r.status], r.status, _HEALTH_STYLE[r.status])
+        table.add_row(*cells)
+    return table
+
+
+def print_scan_health(rows: list) -> None:
+    """Print the per-scraper health panel (see timings.ScraperHealth.rows)."""
+    if not rows:
+        return
+    if not RICH_AVAILABLE:
+        print('\nScraper health:')
+        print('  ' + '  '.join(_HEALTH_COLUMNS))
+        for r in rows:
+            print('  ' + '  '.join(_health_cells(r)))
+        return
+    _console.print(_health_table(rows))
+
+
+# ---------------------------------------------------------------------------
+# Backtest results
+# ---------------------------------------------------------------------------
+
+def print_backtest_results(results: list, top: int = 10) -> None:
+    """Print one row per parameter set (see backtest.BacktestResult)."""
+    if not results:
+        return
+    first = results[0]
+    header = 'Replayed {} scans / {} quotes covering {:.1f} h'.format(
+        first.scans, first.quotes, first.replayed_seconds / 3600.0
+    )
+    rows = [
+        (
+            '{:g}'.format(r.params.min_profit_pct),
+            str(r.params.confirm_scans),
+            str(len(r.opportunities)),
+            '${:.2f}'.format(r.total_profit),
+            '{:.0f}s'.format(r.median_lifetime),
+            '{:.0f}s'.format(r.mean_lifetime),
+            '{:.2f}s'.format(r.elapsed),
+            '{:,.0f}x'.format(r.speedup),
+        )
+        for r in results
+    ]
+    best = sorted(first.opportunities, key=lambda o: o.profit, reverse=True)[:top]
+
+    if not RICH_AVAILABLE:
+        print('\n' + header)
+        print('  min%  confirm  found  profit  median life  mean life  replay  speed')
+        for row in rows:
+            print('  ' + '  '.join(row))
+        for o in best:
+            print('  +{:.2f}%  [{}] {}  {} scans, {:.0f}s'.format(
+                o.entry_profit_pct, o.sport, o.label, o.scans, o.lifetime
+            ))
+        return
+
+    table = Table(
+        title='[bold]Backtest — {}[/bold]'.format(header),
+        box=box.ROUNDED,
+        header_style='bold cyan',
+    )
+    for col in ('Min %', 'Confirm', 'Found', 'Profit', 'Median life', 'Mean life',
+                'Replay', 'Speed'):
+        table.add_column(col, justify='right')
+    for row in rows:
+        table.add_row(*row)
+    _console.print(table)
+
+    if best:
+        detail = Table(
+            title='[bold]Most profitable (min {:g}%, confirm {})[/bold]'.format(
+                first.params.min_profit_pct, first.params.confirm_scans
+            ),
+            box=box.SIMPLE,
+            header_style='bold',
+        )
+        detail.add_column('Profit %', justify='right', style='bold green')
+        detail.add_column('Sport')
+        detail.add_column('Market', min_width=30)
+        detail.add_column('First seen')
+        detail.add_column('Scans', justify='right')
+        detail.add_column('Lifetime', justify='right')
+        for o in best:
+            detail.add_row(
+                '+{:.2f}%'.format(o.entry_profit_pct),
+                o.sport,
+                o.label,
+                datetime.fromtimestamp(o.first_ts, timezone.utc).strftime('%b %d  %H:%M'),
+                str(o.scans),
+                '{:.0f}s'.format(o.lifetime),
+            )
+        _console.print(detail)
+
+
+def print_price_path(event_id: str, path: list) -> None:
+    """Print the price changes of one event (see line_movement.price_path)."""
+    _print_report(
+        'Price path — {}'.format(event_id),
+        ('Market', 'Outcome', 'Book', 'Time', 'Odds'),
+        [
+            (label, outcome, book,
+             datetime.fromtimestamp(ts, timezone.utc).strftime('%b %d  %H:%M:%S'),
+             '{:.2f}'.format(odds))
+            for label, outcome, book, ts, odds in path
+        ],
+    )
+
+
+def print_book_leadership(rows: list, sport: str = None) -> None:
+    """Print which books move first (see line_movement.book_leadership)."""
+    _print_report(
+        'Which books move first' + (' — ' + sport if sport else ''),
+        ('Book', 'Moves', 'Led', 'Lead share', 'Followed', 'Mean lag'),
+        [
+            (r.book, str(r.moves), str(r.led), '{:.0%}'.format(r.lead_share), str(r.followed),
+             '-' if r.mean_lag != r.mean_lag else '{:.0f}s'.format(r.mean_lag))
+            for r in rows
+        ],
+    )
+
+
+def print_volatility(rows: list) -> None:
+    """Print price volatility per sport and time to start (see line_movement.volatility)."""
+    _print_report(
+        'Volatility per sport and time to start',
+        ('Sport', 'To start', 'Observations', 'Moves', 'Volatility'),
+        [
+            (r.sport, r.hours_to_start, str(r.observations), str(r.moves),
+             '{:.4f}'.format(r.volatility))
+            for r in rows
+        ],
+    )
+
+
+def _print_report(title: str, columns: tuple, rows: list) -> None:
+    """Plain report table: first column left-aligned, the rest right-aligned."""
+    if not rows:
+        print('\n{}: no data.'.format(title))
+        return
+    if not RICH_AVAILABLE:
+        print('\n' + title)
+        print('  ' + '  '.join(columns))
+        for row in rows:
+            print('  ' + '  '.join(row))
+        return
+    table = Table(title='[bold]{}[/bold]'.format(title), box=box.ROUNDED, header_style='bold cyan')
+    for i, col in enumerate(columns):
+        table.add_column(col, justify='left' if i == 0 else 'right')
+    for row in rows:
+        table.add_row(*row)
+    _console.print(table)
+
+
 # ---------------------------------------------------------------------------
 # Plain-text fallback
 # ---------------------------------------------------------------------------
@@ -233,6 +844,13 @@ def _plain_dashboard(opportunities, scan_count, elapsed, total_odds, new_count):
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _event_title(item) -> str:
+    """Event name, plus the market when it is not the moneyline."""
+    if item.market == MARKET_MONEYLINE:
+        return item.event_name
+    return '{} — {}'.format(item.event_name, market_label(item.market, item.line))
+
+
 def _fmt_time(time_str: str) -> str:
     """Convert ISO-8601 to a short human-readable string."""
     try:
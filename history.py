@@ -0,0 +1,290 @@
+"""
+Persistent odds and opportunity history (SQLite).
+
+Every scan's quotes and opportunities are appended to one SQLite file. The
+scan loop only hands each scan to a queue; a background writer thread turns
+it into rows and commits in batches, so disk I/O never blocks scanning. If
+the writer falls HISTORY_QUEUE_SIZE scans behind, new scans are dropped (and
+counted) rather than stalling the loop.
+
+Tables:
+
+    scans          one row per scan (id, ts, quotes, opportunities)
+    quotes         every observed quote, indexed on (sport, event_id, bookmaker_id, ts)
+    opportunities  every reported arb, legs stored as JSON
+
+The history is the input for backtesting, line-movement analysis and for
+auditing what the scanner saw when a bet went wrong.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from arbitrage import ArbitrageOpportunity, OddsEntry
+from config import HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_QUEUE_SIZE
+from message import message
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id         INTEGER PRIMARY KEY,
+    ts              REAL NOT NULL,
+    quotes          INTEGER NOT NULL,
+    opportunities   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quotes (
+    scan_id         INTEGER NOT NULL,
+    ts              REAL NOT NULL,
+    sport           TEXT NOT NULL,
+    event_id        TEXT NOT NULL,
+    event_name      TEXT NOT NULL,
+    commence_time   TEXT NOT NULL,
+    bookmaker_id    TEXT NOT NULL,
+    bookmaker       TEXT NOT NULL,
+    market          TEXT NOT NULL,
+    line            REAL,
+    outcome         TEXT NOT NULL,
+    decimal_odds    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_lookup
+    ON quotes (sport, event_id, bookmaker_id, ts);
+CREATE INDEX IF NOT EXISTS idx_quotes_ts ON quotes (ts);
+CREATE TABLE IF NOT EXISTS opportunities (
+    scan_id         INTEGER NOT NULL,
+    ts              REAL NOT NULL,
+    sport           TEXT NOT NULL,
+    event_id        TEXT NOT NULL,
+    event_name      TEXT NOT NULL,
+    commence_time   TEXT NOT NULL,
+    market          TEXT NOT NULL,
+    line            REAL,
+    profit_pct      REAL NOT NULL,
+    profit          REAL NOT NULL,
+    total_stake     REAL NOT NULL,
+    legs            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_opportunities_lookup
+    ON opportunities (sport, event_id, ts);
+"""
+
+_STOP = object()
+_FLUSH = object()
+
+
+def _quote_row(scan_id: int, ts: float, e: OddsEntry) -> tuple:
+    return (
+        scan_id, ts, e.sport, e.event_id, e.event_name, e.commence_time,
+        e.bookmaker_id, e.bookmaker, e.market, e.line, e.outcome, e.decimal_odds,
+    )
+
+
+def _opportunity_row(scan_id: int, ts: float, opp: ArbitrageOpportunity) -> tuple:
+    legs = [
+        {
+            'outcome': outcome,
+            'bookmaker_id': e.bookmaker_id,
+            'line': e.line,
+            'decimal_odds': e.decimal_odds,
+            'stake': opp.stakes.get(outcome),
+        }
+        for outcome, e in opp.best_offers.items()
+    ]
+    event_id = next(iter(opp.best_offers.values())).event_id
+    return (
+        scan_id, ts, opp.sport, event_id, opp.event_name, opp.commence_time,
+        opp.market, opp.line, opp.profit_pct, opp.profit, opp.total_stake, json.dumps(legs),
+    )
+
+
+class OddsHistory:
+    """Append-only SQLite history written from a background thread."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = HISTORY_BATCH_SIZE,
+        flush_interval: float = HISTORY_FLUSH_INTERVAL,
+        queue_size: int = HISTORY_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_scans = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    # ------------------------------------------------------------------
+    # Writer side
+    # ------------------------------------------------------------------
+
+    def start(self) -> 'OddsHistory':
+        """Start the background writer thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._writer, name='odds-history', daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def record_scan(
+        self,
+        all_odds: List[OddsEntry],
+        opportunities: List[ArbitrageOpportunity],
+        ts: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue one scan for writing. Never blocks: returns False (and counts
+        the drop) when the writer is too far behind.
+        """
+        try:
+            self._queue.put_nowait((time.time() if ts is None else ts, all_odds, opportunities))
+            return True
+        except queue.Full:
+            self.dropped_scans += 1
+            message.log_warning(
+                'History writer is behind; dropped scan ({} dropped so far)'.format(
+                    self.dropped_scans
+                ),
+                'history',
+            )
+            return False
+
+    def flush(self) -> None:
+        """Block until every queued scan is on disk."""
+        if self._thread is not None:
+            self._queue.put(_FLUSH)     # commit now instead of after flush_interval
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def _writer(self) -> None:
+        conn = self._connect()
+        pending = []          # queued scans not yet committed
+        rows = 0
+        last_commit = time.time()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.time() - last_commit))
+            try:
+                item = self._queue.get(timeout=timeout if pending else None)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            marker = stop or item is _FLUSH
+            if item is not None and not marker:
+                pending.append(item)
+                rows += len(item[1])
+            if pending and (marker or item is None or rows >= self.batch_size):
+                self._commit(conn, pending)
+                pending, rows, last_commit = [], 0, time.time()
+            if item is _FLUSH:
+                self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                break
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, scans: list) -> None:
+        try:
+            with conn:
+                for ts, all_odds, opportunities in scans:
+                    cur = conn.execute(
+                        'INSERT INTO scans (ts, quotes, opportunities) VALUES (?, ?, ?)',
+                        (ts, len(all_odds), len(opportunities)),
+                    )
+                    scan_id = cur.lastrowid
+                    conn.executemany(
+                        'INSERT INTO quotes VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',
+                        [_quote_row(scan_id, ts, e) for e in all_odds],
+                    )
+                    conn.executemany(
+                        'INSERT INTO opportunities VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',
+                        [_opportunity_row(scan_id, ts, o) for o in opportunities],
+                    )
+        except sqlite3.Error as e:
+            message.log_error('History write failed: {}'.format(e), 'history')
+        finally:
+            for _ in scans:
+                self._queue.task_done()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def quotes(
+        self,
+        sport: Optional[str] = None,
+        event_id: Optional[str] = None,
+        bookmaker_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        market: Optional[str] = None,
+    ) -> List[sqlite3.Row]:
+        """Quotes matching every given filter, oldest first."""
+        where, params = self._filters(sport, event_id, bookmaker_id, since, until)
+        if market is not None:
+            where.append('market = ?')
+            params.append(market)
+        return self._query('quotes', where, params)
+
+    def opportunities(
+        self,
+        sport: Optional[str] = None,
+        event_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> List[sqlite3.Row]:
+        """Recorded opportunities matching every given filter, oldest first."""
+        where, params = self._filters(sport, event_id, None, since, until)
+        return self._query('opportunities', where, params)
+
+    def scans(self, since: Optional[float] = None) -> List[sqlite3.Row]:
+        where, params = self._filters(None, None, None, since, None)
+        return self._query('scans', where, params)
+
+    @staticmethod
+    def _filters(sport, event_id, bookmaker_id, since, until):
+        where, params = [], []
+        for column, value in (
+            ('sport', sport), ('event_id', event_id), ('bookmaker_id', bookmaker_id)
+        ):
+            if value is not None:
+                where.append('{} = ?'.format(column))
+                params.append(value)
+        if since is not None:
+            where.append('ts >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('ts < ?')
+            params.append(until)
+        return where, params
+
+    def _query(self, table: str, where: list, params: list) -> List[sqlite3.Row]:
+        sql = 'SELECT * FROM {}'.format(table)
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY ts'
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets queries run while the writer thread is committing
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
@@ -0,0 +1,242 @@
+"""
+Opportunity lifetime tracking and survival scoring.
+
+Every reported opportunity is followed from the scan it first appears in to
+the scan it disappears in, with its price history (one row per change). When
+it closes, its lifetime is added to the samples of its bucket:
+
+    (book pair, sport, hours to start)   e.g. 'draftkings+fanduel|NHL|<3h'
+
+and to the coarser (book pair, sport), (sport) and overall buckets, each
+capped at LIFETIME_MAX_SAMPLES recent lifetimes.
+
+The survival score of an open opportunity of age a is the empirical
+
+    P(lifetime > a + SURVIVAL_HORIZON | lifetime > a)
+
+from the finest bucket holding at least SURVIVAL_MIN_SAMPLES lifetimes
+longer than a (SURVIVAL_PRIOR when none does). SURVIVAL_HORIZON is the time
+it takes to place every leg by hand, so profit_pct * survival ranks arbs by
+what can actually be filled.
+
+A lifetime is measured from the first scan that saw the opportunity to
+halfway between the last scan that saw it and the first that did not. When
+those scans are more than LIFETIME_MAX_GAP apart (the scanner was stopped),
+only the observed span counts and a reappearance starts a new lifetime.
+State (open opportunities and samples) is saved as JSON between runs.
+"""
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from config import (
+    LIFETIME_MAX_GAP, LIFETIME_MAX_SAMPLES, SURVIVAL_HORIZON, SURVIVAL_MIN_SAMPLES,
+    SURVIVAL_PRIOR,
+)
+from message import message
+from seen import commence_timestamp
+
+# Upper edges (hours to start) of the time-to-start buckets
+HOURS_TO_START_EDGES = (1, 3, 12, 24, 72)
+
+MAX_PRICE_HISTORY = 100     # price changes kept per opportunity (first + most recent)
+
+
+def hours_bucket(commence_time: str, now: float) -> str:
+    """Time-to-start bucket label, e.g. '<3h', '>72h' or '?' when unknown."""
+    start = commence_timestamp(commence_time)
+    if start is None:
+        return '?'
+    hours = (start - now) / 3600.0
+    for edge in HOURS_TO_START_EDGES:
+        if hours < edge:
+            return '<{}h'.format(edge)
+    return '>{}h'.format(HOURS_TO_START_EDGES[-1])
+
+
+@dataclass
+class TrackedOpportunity:
+    """One opportunity from first to last sighting."""
+    key: str
+    event_name: str
+    sport: str
+    books: str              # sorted bookmaker ids joined by '+'
+    commence_time: str
+    first_seen: float
+    last_seen: float
+    # [seconds since first_seen, profit_pct, [odds per leg]] on every change
+    prices: List[list] = field(default_factory=list)
+
+    @property
+    def age(self) -> float:
+        return self.last_seen - self.first_seen
+
+
+class LifetimeTracker:
+    """Follows opportunities across scans and scores their expected survival."""
+
+    def __init__(
+        self,
+        key: Callable,
+        path: Optional[str] = None,
+        horizon: float = SURVIVAL_HORIZON,
+        min_samples: int = SURVIVAL_MIN_SAMPLES,
+        prior: float = SURVIVAL_PRIOR,
+        max_samples: int = LIFETIME_MAX_SAMPLES,
+        max_gap: float = LIFETIME_MAX_GAP,
+    ):
+        self.key = key
+        self.path = path
+        self.horizon = horizon
+        self.min_samples = min_samples
+        self.prior = prior
+        self.max_samples = max_samples
+        self.max_gap = max_gap
+        self.open: Dict[str, TrackedOpportunity] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+
+    # ------------------------------------------------------------------
+    # Tracking
+    # ------------------------------------------------------------------
+
+    def update(self, opportunities: list, now: Optional[float] = None) -> List[TrackedOpportunity]:
+        """
+        Record one scan: refresh every opportunity present, close the ones
+        that are gone, and set opp.survival on each opportunity.
+        Returns the opportunities closed by this scan.
+        """
+        now = time.time() if now is None else now
+        present = set()
+        for opp in opportunities:
+            k = self.key(opp)
+            present.add(k)
+            tracked = self.open.get(k)
+            if tracked is not None and now - tracked.last_seen > self.max_gap:
+                self._add_sample(tracked, tracked.age)
+                tracked = None
+            if tracked is None:
+                tracked = self.open[k] = TrackedOpportunity(
+                    key=k,
+                    event_name=opp.event_name,
+                    sport=opp.sport,
+                    books='+'.join(sorted(e.bookmaker_id for e in opp.best_offers.values())),
+                    commence_time=opp.commence_time,
+                    first_seen=now,
+                    last_seen=now,
+                )
+            tracked.last_seen = now
+            self._record_price(tracked, opp, now)
+            opp.survival = self.survival(tracked, now)
+
+        closed = [t for k, t in self.open.items() if k not in present]
+        for tracked in closed:
+            del self.open[tracked.key]
+            gone_at = now if now - tracked.last_seen <= self.max_gap else tracked.last_seen
+            self._add_sample(tracked, (tracked.last_seen + gone_at) / 2.0 - tracked.first_seen)
+        return closed
+
+    def _record_price(self, tracked: TrackedOpportunity, opp, now: float) -> None:
+        row = [
+            round(now - tracked.first_seen, 1),
+            opp.profit_pct,
+            [e.decimal_odds for e in opp.best_offers.values()],
+        ]
+        if tracked.prices and tracked.prices[-1][1:] == row[1:]:
+            return
+        tracked.prices.append(row)
+        if len(tracked.prices) > MAX_PRICE_HISTORY:
+            del tracked.prices[1]
+
+    # ------------------------------------------------------------------
+    # Survival
+    # ------------------------------------------------------------------
+
+    def _buckets(self, tracked: TrackedOpportunity) -> List[str]:
+        """Bucket keys from finest to coarsest (time to start as of first sighting)."""
+        hours = hours_bucket(tracked.commence_time, tracked.first_seen)
+        return [
+            '{}|{}|{}'.format(tracked.books, tracked.sport, hours),
+            '{}|{}'.format(tracked.books, tracked.sport),
+            tracked.sport,
+            '*',
+        ]
+
+    def _add_sample(self, tracked: TrackedOpportunity, lifetime: float) -> None:
+        for bucket in self._buckets(tracked):
+            samples = self._samples.get(bucket)
+            if samples is None:
+                samples = self._samples[bucket] = deque(maxlen=self.max_samples)
+            samples.append(round(lifetime, 1))
+
+    def survival(self, tracked: TrackedOpportunity, now: Optional[float] = None) -> float:
+        """Probability the opportunity is still up SURVIVAL_HORIZON seconds from now."""
+        now = time.time() if now is None else now
+        age = now - tracked.first_seen
+        for bucket in self._buckets(tracked):
+            samples = self._samples.get(bucket)
+            if not samples:
+                continue
+            alive = [s for s in samples if s > age]
+            if len(alive) >= self.min_samples:
+                return round(sum(1 for s in alive if s > age + self.horizon) / len(alive), 3)
+        return self.prior
+
+    def samples(self, bucket: str = '*') -> List[float]:
+        return list(self._samples.get(bucket, ()))
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Restore state from self.path; a missing or corrupt file is ignored."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            open_opps = {
+                k: TrackedOpportunity(**v) for k, v in data.get('open', {}).items()
+            }
+            samples = {
+                k: deque(v, maxlen=self.max_samples) for k, v in data.get('samples', {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            message.log_warning('Ignoring lifetime file {}: {}'.format(self.path, e), 'lifetimes')
+            return
+        self.open, self._samples = open_opps, samples
+        message.log_debug(
+            'Restored {} open opportunities and {} lifetimes from {}'.format(
+                len(self.open), len(self._samples.get('*', ())), self.path
+            ),
+            'lifetimes',
+        )
+
+    def save(self) -> None:
+        """Write state to self.path (via a temp file, so a crash cannot truncate it)."""
+        if not self.path:
+            return
+        data = {
+            'open': {k: vars(t) for k, t in self.open.items()},
+            'samples': {k: list(v) for k, v in self._samples.items()},
+        }
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            message.log_warning(
+                'Could not save lifetimes to {}: {}'.format(self.path, e), 'lifetimes'
+            )
+
+
+def rank_by_survival(opportunities: list) -> None:
+    """Sort in place by profit % x survival probability (unscored count as 1)."""
+    opportunities.sort(
+        key=lambda o: o.profit_pct * (o.survival if o.survival is not None else 1.0),
+        reverse=True,
+    )
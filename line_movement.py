@@ -0,0 +1,294 @@
+"""
+Line-movement analytics over the recorded odds history.
+
+    python main.py lines path --event EVENT_ID [--book BOOK]
+    python main.py lines leaders [--sport NHL] [--window 600]
+    python main.py lines volatility [--sport NHL]
+
+All queries run on the memory-mapped columns from columns.py. Each quote
+series is one (outcome, book); a *move* is a scan where a series' price
+differs from its previous observation. Moves are grouped into episodes per
+outcome: moves in the same direction no more than `window` seconds after
+the episode's first move. Within an episode
+
+    leader     the book that moved first
+    lag        seconds from the episode's first move to each other book's first move
+
+Volatility is the standard deviation of log price changes between
+consecutive observations, per sport and hours-to-start bucket. Every query
+is a few sorts and bincounts over whole columns; nothing loops over rows.
+"""
+import argparse
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from columns import HistoryColumns, open_history_columns
+from config import HISTORY_DB, LINE_MOVE_WINDOW
+from lifetimes import HOURS_TO_START_EDGES
+
+
+@dataclass
+class BookLeadership:
+    """How often a book moves first, and how far behind it is otherwise."""
+    book: str
+    moves: int          # episodes the book took part in
+    led: int            # episodes it moved first in
+    followed: int       # episodes it moved in after another book
+    mean_lag: float     # seconds behind the leader when following (NaN if never)
+
+    @property
+    def lead_share(self) -> float:
+        return self.led / self.moves if self.moves else 0.0
+
+
+@dataclass
+class VolatilityBucket:
+    sport: str
+    hours_to_start: str
+    observations: int   # consecutive-price pairs
+    moves: int          # of which the price changed
+    volatility: float   # std of log price change per observation
+
+
+# ---------------------------------------------------------------------------
+# Series helpers
+# ---------------------------------------------------------------------------
+
+def _select(cols: HistoryColumns, sport: Optional[str] = None,
+            event_id: Optional[str] = None) -> np.ndarray:
+    """Row indices for a sport and/or event (all rows when neither is given)."""
+    keep = np.ones(len(cols), dtype=bool)
+    if sport is not None:
+        if sport not in cols.meta['sports']:
+            return np.zeros(0, dtype=np.int64)
+        code = cols.meta['sports'].index(sport)
+        keep &= cols.market_sport[np.asarray(cols.market)] == code
+    if event_id is not None:
+        codes = [i for i, m in enumerate(cols.meta['markets']) if m[0] == event_id]
+        keep &= np.isin(np.asarray(cols.market), codes)
+    return np.flatnonzero(keep)
+
+
+def _series(cols: HistoryColumns, rows: np.ndarray):
+    """
+    Rows ordered by (outcome, book, scan) plus, for each, whether the
+    previous row belongs to the same series.
+    """
+    outcome = np.asarray(cols.outcome)[rows]
+    book = np.asarray(cols.book)[rows]
+    scan = np.asarray(cols.scan)[rows]
+    order = np.lexsort((scan, book, outcome))
+    rows, outcome, book = rows[order], outcome[order], book[order]
+    same = np.zeros(len(rows), dtype=bool)
+    same[1:] = (outcome[1:] == outcome[:-1]) & (book[1:] == book[:-1])
+    return rows, outcome, book, same
+
+
+def _moves(cols: HistoryColumns, rows: np.ndarray):
+    """(outcome, book, ts, direction) of every price change among `rows`."""
+    rows, outcome, book, same = _series(cols, rows)
+    odds = np.asarray(cols.odds)[rows]
+    change = np.zeros(len(rows))
+    change[1:] = odds[1:] - odds[:-1]
+    moved = same & (change != 0)
+    return outcome[moved], book[moved], np.asarray(cols.ts)[rows][moved], np.sign(change[moved])
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def price_path(cols: HistoryColumns, event_id: str, book: Optional[str] = None) -> List[tuple]:
+    """
+    Price changes of every (market, outcome, book) of an event, as
+    (market label, outcome, book, ts, odds) rows; only the first
+    observation and changes are kept.
+    """
+    rows = _select(cols, event_id=event_id)
+    if book is not None:
+        if book not in cols.meta['books']:
+            return []
+        rows = rows[np.asarray(cols.book)[rows] == cols.meta['books'].index(book)]
+    rows, _, _, same = _series(cols, rows)
+    odds = np.asarray(cols.odds)[rows]
+    keep = ~same
+    keep[1:] |= odds[1:] != odds[:-1]
+    rows = rows[keep]
+    return [
+        (cols.market_label(int(m)), cols.meta['outcomes'][int(o)], cols.meta['books'][int(b)],
+         float(t), float(p))
+        for m, o, b, t, p in zip(
+            np.asarray(cols.market)[rows], np.asarray(cols.outcome)[rows],
+            np.asarray(cols.book)[rows], np.asarray(cols.ts)[rows], np.asarray(cols.odds)[rows],
+        )
+    ]
+
+
+def _episode_starts(run: np.ndarray, ts: np.ndarray, window: float) -> np.ndarray:
+    """
+    Where episodes start, for moves sorted by run (run marks each run's
+    first move) and by time within a run.
+
+    Each episode starts at the first move more than `window` after the
+    previous episode's start. Every move's successor is found with one
+    merged sort, then the successor chains from the run starts are marked
+    by pointer doubling: O(n log n) in all, whatever the number of episodes.
+    """
+    n = len(ts)
+    run_id = np.cumsum(run) - 1
+    run_end = np.append(np.flatnonzero(run)[1:], n)[run_id]
+    # Merge moves (kind 0) with the deadlines ts + window (kind 1) by (run, time);
+    # moves sort first on ties, so the moves before a deadline are those not late
+    kind = np.repeat([0, 1], n)
+    order = np.lexsort((kind, np.concatenate((ts, ts + window)), np.tile(run_id, 2)))
+    moves_before = np.cumsum(kind[order] == 0)
+    nxt = np.empty(n + 1, dtype=np.int64)
+    nxt[order[kind[order] == 1] - n] = moves_before[kind[order] == 1]
+    nxt[n] = n
+    nxt[:n] = np.where(nxt[:n] < run_end, nxt[:n], n)     # no late move in this run
+
+    start = np.zeros(n + 1, dtype=bool)
+    start[:n] = run
+    jump = nxt
+    while (jump[:n] < n).any():
+        start[jump[start]] = True
+        jump = jump[jump]
+    return start[:n]
+
+
+def book_leadership(cols: HistoryColumns, sport: Optional[str] = None,
+                    window: float = LINE_MOVE_WINDOW) -> List[BookLeadership]:
+    """Which books move first, and the average lag of the others."""
+    outcome, book, ts, direction = _moves(cols, _select(cols, sport=sport))
+    n_books = len(cols.meta['books'])
+    if not len(ts):
+        return []
+
+    # Episodes: moves of one outcome in one direction within `window` of the first
+    order = np.lexsort((ts, direction, outcome))
+    outcome, book, ts, direction = outcome[order], book[order], ts[order], direction[order]
+    run = np.ones(len(ts), dtype=bool)
+    run[1:] = (outcome[1:] != outcome[:-1]) | (direction[1:] != direction[:-1])
+    episode = np.cumsum(_episode_starts(run, ts, window)) - 1
+
+    # First move of each book within each episode
+    order = np.lexsort((ts, book, episode))
+    episode, book, ts = episode[order], book[order], ts[order]
+    first = np.ones(len(ts), dtype=bool)
+    first[1:] = (episode[1:] != episode[:-1]) | (book[1:] != book[:-1])
+    episode, book, ts = episode[first], book[first], ts[first]
+
+    n_episodes = int(episode.max()) + 1
+    leader_ts = np.full(n_episodes, np.inf)
+    np.minimum.at(leader_ts, episode, ts)
+    lag = ts - leader_ts[episode]
+    leads = lag == 0
+
+    moves = np.bincount(book, minlength=n_books)
+    led = np.bincount(book[leads], minlength=n_books)
+    followed = np.bincount(book[~leads], minlength=n_books)
+    lag_sum = np.bincount(book[~leads], weights=lag[~leads], minlength=n_books)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_lag = lag_sum / followed
+
+    result = [
+        BookLeadership(
+            book=cols.meta['books'][b],
+            moves=int(moves[b]),
+            led=int(led[b]),
+            followed=int(followed[b]),
+            mean_lag=float(mean_lag[b]),
+        )
+        for b in range(n_books) if moves[b]
+    ]
+    result.sort(key=lambda r: r.lead_share, reverse=True)
+    return result
+
+
+def volatility(cols: HistoryColumns, sport: Optional[str] = None) -> List[VolatilityBucket]:
+    """Std of log price changes per (sport, hours-to-start bucket)."""
+    rows, _, _, same = _series(cols, _select(cols, sport=sport))
+    if len(rows) < 2:
+        return []
+    odds = np.asarray(cols.odds)[rows]
+    market = np.asarray(cols.market)[rows]
+    ret = np.log(odds[1:] / odds[:-1])[same[1:]]
+    market = market[1:][same[1:]]
+    ts = np.asarray(cols.ts)[rows][1:][same[1:]]
+
+    hours = (cols.market_commence[market] - ts) / 3600.0
+    hour_bin = np.where(np.isnan(hours), len(HOURS_TO_START_EDGES) + 1,
+                        np.digitize(hours, HOURS_TO_START_EDGES))
+    n_bins = len(HOURS_TO_START_EDGES) + 2
+    key = cols.market_sport[market].astype(np.int64) * n_bins + hour_bin
+    size = len(cols.meta['sports']) * n_bins
+    count = np.bincount(key, minlength=size)
+    moves = np.bincount(key, weights=ret != 0, minlength=size)
+    total = np.bincount(key, weights=ret, minlength=size)
+    total_sq = np.bincount(key, weights=ret * ret, minlength=size)
+
+    labels = ['<{}h'.format(e) for e in HOURS_TO_START_EDGES]
+    labels += ['>{}h'.format(HOURS_TO_START_EDGES[-1]), '?']
+    result = []
+    for k in np.flatnonzero(count):
+        mean = total[k] / count[k]
+        result.append(VolatilityBucket(
+            sport=cols.meta['sports'][k // n_bins],
+            hours_to_start=labels[k % n_bins],
+            observations=int(count[k]),
+            moves=int(moves[k]),
+            volatility=float(np.sqrt(max(total_sq[k] / count[k] - mean * mean, 0.0))),
+        ))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# CLI  (python main.py lines ...)
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='main.py lines',
+        description='Line-movement analytics over recorded odds history (see --history)',
+    )
+    parser.add_argument('query', choices=('path', 'leaders', 'volatility'),
+                        help='path: price path of one event; leaders: which books move '
+                             'first and how far others lag; volatility: per sport and '
+                             'time to start')
+    parser.add_argument('--db', default=HISTORY_DB,
+                        help='History database (default: {})'.format(HISTORY_DB))
+    parser.add_argument('--columns', metavar='DIR', default=None,
+                        help='Column cache directory (default: <db>_columns)')
+    parser.add_argument('--sport', default=None, help='Restrict to one sport, e.g. NHL')
+    parser.add_argument('--event', default=None, metavar='EVENT_ID',
+                        help='Event id (required for path)')
+    parser.add_argument('--book', default=None, metavar='BOOK',
+                        help='Bookmaker id (path only)')
+    parser.add_argument('--window', type=float, default=LINE_MOVE_WINDOW, metavar='SECONDS',
+                        help='Max seconds between the first and last move of one episode '
+                             '(default: {})'.format(LINE_MOVE_WINDOW))
+    args = parser.parse_args(argv)
+    if args.query == 'path' and not args.event:
+        parser.error('path needs --event')
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        print('No history database at {}. Record one with: python main.py --watch --history'
+              .format(args.db))
+        return
+    cols = open_history_columns(args.db, args.columns)
+
+    from display import print_book_leadership, print_price_path, print_volatility
+    if args.query == 'path':
+        print_price_path(args.event, price_path(cols, args.event, book=args.book))
+    elif args.query == 'leaders':
+        print_book_leadership(book_leadership(cols, sport=args.sport, window=args.window),
+                              sport=args.sport)
+    else:
+        print_volatility(volatility(cols, sport=args.sport))
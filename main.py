@@ -20,6 +20,9 @@ Top 10 Canadian sites covered
 Usage
 -----
     python main.py [--amount AMOUNT] [--sports SPORT ...] [--watch] [--notify]
+    python main.py backtest [--db PATH] [--min-profit PCT ...]   # see backtest.py
+    python main.py lines {path,leaders,volatility} [--sport NHL]  # see line_movement.py
+    python main.py collector --connect HOST:PORT [--scrapers NAME ...]  # see nodes.py
 
 Environment variables
 ---------------------
@@ -31,109 +34,34 @@ Quick start:
     python main.py --watch               # continuous mode, re-scan every 60s
     python main.py --watch --notify      # continuous mode + desktop alerts
     python main.py --no-api              # skip The Odds API, direct scrapers only
+    python main.py --output jsonl        # headless: stream quotes + opportunities to stdout
+    python main.py --trace scan.json     # timeline of the scan for https://ui.perfetto.dev
+    python main.py --record scan.rec.gz  # save every response; --replay scan.rec.gz reruns it
+    python main.py --replay scan.rec.gz --profile 5   # profile 5 scans, by stage
 """
 import argparse
+import importlib
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Set
 
-from arbitrage import OddsEntry, scan_for_arbitrage
-from config import DEFAULT_BET_AMOUNT, SPORTS, ODDS_API_KEY, WATCH_INTERVAL
-from display import print_rich_dashboard
-from message import message
-
-
-# ---------------------------------------------------------------------------
-# Scraper construction
-# ---------------------------------------------------------------------------
-
-def build_scrapers(use_api: bool):
-    """Instantiate all scrapers. Imports are deferred to keep startup fast."""
-    scrapers = []
-
-    # Primary: The Odds API (covers DraftKings, FanDuel, BetMGM, PointsBet, BetRivers)
-    if use_api:
-        if not ODDS_API_KEY:
-            message.log_warning(
-                'ODDS_API_KEY not set. Set it via the environment variable for '
-                'best coverage of DraftKings, FanDuel, BetMGM, PointsBet, BetRivers.',
-                'main',
-            )
-        from scrapers.odds_api import OddsAPIScraper
-        scrapers.append(OddsAPIScraper())
-
-    # Secondary: OddsChecker (covers Bet365, Sports Interaction, Betway, Bodog, top-10)
-    from scrapers.oddschecker import OddsCheckerScraper
-    scrapers.append(OddsCheckerScraper())
-
-    # Direct site scrapers (supplement OddsChecker; gracefully return [] if blocked)
-    from scrapers.sports_interaction import SportsInteractionScraper
-    from scrapers.bodog import BodogScraper
-    from scrapers.thescore import TheScoreScraper
-    from scrapers.betway import BetwayScraper
-    from scrapers.betrivers import BetRiversScraper
-    from scrapers.bet365 import Bet365Scraper
-    from scrapers.draftkings import DraftKingsScraper
-    from scrapers.fanduel import FanDuelScraper
-    from scrapers.betmgm import BetMGMScraper
-    from scrapers.pointsbet import PointsBetScraper
-
-    scrapers += [
-        SportsInteractionScraper(),
-        BodogScraper(),
-        TheScoreScraper(),
-        BetwayScraper(),
-        BetRiversScraper(),
-        Bet365Scraper(),
-        DraftKingsScraper(),
-        FanDuelScraper(),
-        BetMGMScraper(),
-        PointsBetScraper(),
-    ]
-    return scrapers
-
-
-# ---------------------------------------------------------------------------
-# Parallel odds collection
-# ---------------------------------------------------------------------------
-
-def _run_scraper(scraper, sport_keys):
-    """Worker: run one scraper and return (name, entries, error)."""
-    try:
-        entries = scraper.get_odds(sport_keys)
-        return scraper.name, entries, None
-    except Exception as exc:
-        return scraper.name, [], exc
-
-
-def collect_odds_parallel(scrapers, sport_keys):
-    """
-    Run all scrapers concurrently in a thread pool.
-    Returns all OddsEntry objects combined.
-
-    Using threads (not asyncio) because the scrapers use the blocking
-    `requests` library. All scrapers fire at the same time — 5-10x faster
-    than sequential collection.
-    """
-    all_odds = []
-    with ThreadPoolExecutor(max_workers=len(scrapers)) as pool:
-        futures = {
-            pool.submit(_run_scraper, scraper, sport_keys): scraper.name
-            for scraper in scrapers
-        }
-        for future in as_completed(futures):
-            name, entries, error = future.result()
-            if error:
-                message.log_error(
-                    'Scraper {} raised: {}'.format(name, error), 'main'
-                )
-            else:
-                message.log_debug(
-                    '{} returned {} entries'.format(name, len(entries)), 'main'
-                )
-                all_odds.extend(entries)
-    return all_odds
+import tracing
+from arbitrage import (
+    OddsEntry, ScanStats, group_odds, market_label, outcome_label, scan_for_arbitrage,
+)
+from config import (
+    DEFAULT_BET_AMOUNT, HISTORY_DB, LIFETIME_STATE_FILE, MIDDLE_NEAR_MARGIN_PCT, MIN_PROFIT_PCT,
+    METRICS_HOST, METRICS_PORT, NODE_HOST, NODE_PORT, NODE_SECRET, PROFILE_OUTPUT,
+    SEEN_STATE_FILE, SERVE_HOST, SERVE_PORT, SPORTS, STATE_SAVE_EVERY, VALUE_MIN_EDGE_PCT,
+    WATCH_INTERVAL,
+)
+from lifetimes import LifetimeTracker, rank_by_survival
+from message import DEBUG_MESSAGE, log_level_spec, message
+from output import OUTPUT_FORMATS
+from scan import build_scrapers, collect_odds_parallel
+from seen import SeenSet
+from snapshots import DeltaWriter, SnapshotDiffer
+from timings import ScraperHealth, format_scan_report
+from watchlist import ZONE_ARB, ZONE_FAR, NearArbWatchlist
 
 
 # ---------------------------------------------------------------------------
@@ -143,7 +71,28 @@ def collect_odds_parallel(scrapers, sport_keys):
 def _opp_key(opp) -> str:
     """Stable string key for an opportunity — used to detect new vs seen."""
     books = '+'.join(sorted(e.bookmaker_id for e in opp.best_offers.values()))
-    return '{}:{}:{}'.format(opp.event_name, opp.sport, books)
+    return '{}:{}:{}:{}'.format(
+        opp.event_name, opp.sport, market_label(opp.market, opp.line), books
+    )
+
+
+def _value_key(vb) -> str:
+    """Stable string key for a value bet — used to detect new vs seen."""
+    return 'value:{}:{}:{}:{}'.format(
+        vb.event_name, vb.sport, outcome_label(vb.entry), vb.entry.bookmaker_id
+    )
+
+
+def _log_crossing(crossing) -> None:
+    """Watchlist subscriber: report markets moving towards or away from an arb."""
+    text = '{} {} [{}] {} -> {} ({:+.2f}% to break-even)'.format(
+        crossing.event_name, market_label(crossing.market, crossing.line), crossing.sport,
+        crossing.old_zone, crossing.new_zone, crossing.margin_pct,
+    )
+    if crossing.new_zone == ZONE_ARB:
+        message.log_result('Crossed into arb: ' + text, 'watchlist')
+    elif crossing.new_zone != ZONE_FAR:
+        message.log_debug('Near-arb: ' + text, 'watchlist')
 
 
 # ---------------------------------------------------------------------------
@@ -160,7 +109,8 @@ def parse_args():
         '--amount', '-a',
         type=float,
         default=None,
-        help='Total stake in CAD (default: prompt at runtime)',
+        help='Total stake in CAD (default: prompt at runtime; {:.0f} with --output)'.format(
+            DEFAULT_BET_AMOUNT),
     )
     parser.add_argument(
         '--sports', '-s',
@@ -197,19 +147,243 @@ def parse_args():
         action='store_true',
         help='Send desktop/terminal notification when a NEW opportunity is found',
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '--webhook',
+        action='append',
+        default=[],
+        metavar='[STYLE=]URL',
+        help='Also post new opportunities to a webhook (repeatable). STYLE is json, '
+             'slack or discord; detected from the URL when omitted',
+    )
+    parser.add_argument(
+        '--near-arbs',
+        type=int,
+        nargs='?',
+        const=10,
+        default=0,
+        metavar='N',
+        help='Show the N events closest to break-even after each scan (default N: 10)',
+    )
+    parser.add_argument(
+        '--value',
+        type=float,
+        nargs='?',
+        const=VALUE_MIN_EDGE_PCT,
+        default=None,
+        metavar='EDGE',
+        help='Also report value bets at least EDGE%% above the consensus fair price '
+             '(default EDGE: {})'.format(VALUE_MIN_EDGE_PCT),
+    )
+    parser.add_argument(
+        '--middles',
+        type=float,
+        nargs='?',
+        const=MIDDLE_NEAR_MARGIN_PCT,
+        default=None,
+        metavar='MARGIN',
+        help='Also report middles / cross-line arbs on spreads and totals whose worst '
+             'case loses at most MARGIN%% (default MARGIN: {})'.format(MIDDLE_NEAR_MARGIN_PCT),
+    )
+    parser.add_argument(
+        '--history',
+        nargs='?',
+        const=HISTORY_DB,
+        default=None,
+        metavar='PATH',
+        help='Record every quote and opportunity to a SQLite history file '
+             '(default PATH: {})'.format(HISTORY_DB),
+    )
+    parser.add_argument(
+        '--deltas',
+        metavar='PATH',
+        default=None,
+        help='Append the added/changed/removed quotes of every scan to a compact '
+             'binary delta log (an existing log is continued)',
+    )
+    parser.add_argument(
+        '--live',
+        action='store_true',
+        help='Watch mode with a dashboard updated in place instead of reprinted each scan',
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Run the scrapers in N worker processes instead of threads of one process',
+    )
+    parser.add_argument(
+        '--aggregate',
+        nargs='?',
+        const=str(NODE_PORT),
+        default=None,
+        metavar='[HOST:]PORT',
+        help='Watch mode over odds streamed by collector nodes (main.py collector) '
+             'instead of local scrapers (default {}:{}; other hosts need NODE_SECRET)'.format(
+                 NODE_HOST, NODE_PORT),
+    )
+    parser.add_argument(
+        '--serve',
+        type=int,
+        nargs='?',
+        const=SERVE_PORT,
+        default=None,
+        metavar='PORT',
+        help='Watch mode plus a local HTTP/JSON API over the latest scan '
+             '(default PORT: {})'.format(SERVE_PORT),
+    )
+    parser.add_argument(
+        '--metrics',
+        type=int,
+        nargs='?',
+        const=METRICS_PORT,
+        default=None,
+        metavar='PORT',
+        help='Watch mode plus Prometheus metrics at http://localhost:PORT/metrics '
+             '(default PORT: {})'.format(METRICS_PORT),
+    )
+    parser.add_argument(
+        '--output', '-o',
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help='Headless: stream raw quotes and opportunities to stdout as jsonl or csv '
+             '(no prompt, no dashboard; log messages go to stderr)',
+    )
+    parser.add_argument(
+        '--log-level',
+        type=log_level_spec,
+        action='append',
+        default=[],
+        metavar='[SOURCE=]LEVEL',
+        help='Minimum level logged: DEBUG, RESULT, WARNING or ERROR (default DEBUG). '
+             'SOURCE=LEVEL sets it for one scraper or module; repeatable',
+    )
+    parser.add_argument(
+        '--log-format',
+        choices=('text', 'json'),
+        default=None,
+        help='Log file format; json writes one record per line with its scan number',
+    )
+    parser.add_argument(
+        '--quiet', '-q',
+        action='store_true',
+        help='Only print warnings and errors (the log file is unaffected)',
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        default=None,
+        help='Record a timeline of every scan (scrapers, sports, HTTP requests, parsing, '
+             'detection, rendering) to FILE as Chrome trace-event JSON for Perfetto',
+    )
+    parser.add_argument(
+        '--profile',
+        type=int,
+        nargs='?',
+        const=1,
+        default=None,
+        metavar='SCANS',
+        help='Run SCANS scans back to back (default 1) under a sampling profiler; writes a '
+             'collapsed-stack flamegraph file and the top functions per stage',
+    )
+    parser.add_argument(
+        '--profile-out',
+        default=PROFILE_OUTPUT,
+        metavar='PREFIX',
+        help='Profile files: PREFIX.collapsed and PREFIX.txt (default: {})'.format(PROFILE_OUTPUT),
+    )
+    parser.add_argument(
+        '--record',
+        metavar='FILE',
+        default=None,
+        help='Save every scraper HTTP response to FILE (gzipped JSON Lines) for --replay',
+    )
+    parser.add_argument(
+        '--replay',
+        metavar='FILE',
+        default=None,
+        help='Serve the scrapers from a --record file instead of the live sites',
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='Show per-sport counters explaining why events were not reported',
+    )
+    parser.add_argument(
+        '--health',
+        action='store_true',
+        help='Show a per-scraper health panel: wall time, time to first byte, bytes, '
+             'entries, retries over the last scans',
+    )
+    args = parser.parse_args()
+    if args.output and (args.live or args.notify):
+        parser.error('--output cannot be combined with --live or --notify')
+    if args.record and args.replay:
+        parser.error('--record and --replay are mutually exclusive')
+    if (args.record or args.replay) and (args.aggregate is not None or args.workers):
+        parser.error('--record and --replay need local scrapers (no --aggregate or --workers)')
+    if args.profile is not None and args.profile < 1:
+        parser.error('--profile needs at least 1 scan')
+    if args.aggregate is not None:
+        from nodes import is_loopback, parse_address
+        try:
+            args.aggregate = parse_address(args.aggregate, NODE_PORT, NODE_HOST)
+        except ValueError:
+            parser.error('--aggregate expects [HOST:]PORT, got {}'.format(args.aggregate))
+        if not NODE_SECRET and not is_loopback(args.aggregate[0]):
+            parser.error('--aggregate on {} needs NODE_SECRET set for the aggregator and '
+                         'its nodes'.format(args.aggregate[0]))
+    return args
 
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
+# Subcommand -> module whose main(argv) runs it (imported only when used)
+_SUBCOMMANDS = {
+    'backtest': 'backtest',         # recorded history
+    'lines': 'line_movement',       # recorded history
+    'collector': 'nodes',           # scrape and stream to an aggregator
+}
+
+
 def main():
+    # ---- Subcommands ----
+    if len(sys.argv) > 1 and sys.argv[1] in _SUBCOMMANDS:
+        importlib.import_module(_SUBCOMMANDS[sys.argv[1]]).main(sys.argv[2:])
+        return
+
     args = parse_args()
+    message.configure_from_args(args.log_level, args.quiet, args.log_format)
+    if args.trace:
+        tracing.start(args.trace)
+    if (args.serve is not None or args.aggregate is not None or args.live
+            or args.metrics is not None):
+        args.watch = True
+    if args.profile:
+        # Back to back, then exit: the profile covers scans only
+        args.watch = args.watch or args.profile > 1
+        args.interval = 0
+
+    # ---- Headless (--output): records on stdout, everything else on stderr ----
+    writer = None
+    if args.output:
+        from output import open_writer
+        writer = open_writer(args.output)
+        message.console = sys.stderr
+    else:
+        # rich is only imported when something will be drawn
+        from display import (
+            print_middles, print_near_arbs, print_rich_dashboard, print_scan_health,
+            print_scan_stats, print_value_bets,
+        )
 
     # ---- Stake amount ----
     if args.amount is not None:
         stake = args.amount
+    elif writer is not None:
+        stake = DEFAULT_BET_AMOUNT
     else:
         try:
             raw = input(
@@ -221,7 +395,8 @@ def main():
             stake = DEFAULT_BET_AMOUNT
 
     if stake <= 0:
-        print('Stake must be positive. Using default: ${:.2f}'.format(DEFAULT_BET_AMOUNT))
+        print('Stake must be positive. Using default: ${:.2f}'.format(DEFAULT_BET_AMOUNT),
+              file=message.console or sys.stdout)
         stake = DEFAULT_BET_AMOUNT
 
     # ---- Override min-profit if requested ----
@@ -237,77 +412,331 @@ def main():
         if sport_keys else list(SPORTS.values())
     )
 
-    print('\n' + '=' * 64)
-    print('Canadian Sports Betting Arbitrage Scanner')
-    print('Stake      : ${:.2f} CAD'.format(stake))
-    print('Sports     : {}'.format(', '.join(sport_names)))
-    print('Sources    : OddsChecker + 10 direct site scrapers' +
-          (' + The Odds API' if use_api else ''))
-    print('Mode       : {}'.format(
-        'WATCH (every {}s)'.format(args.interval) if args.watch else 'Single scan'
-    ))
-    if args.notify:
-        print('Notify     : Desktop alerts ON')
-    print('=' * 64 + '\n')
+    if writer is None:
+        print('\n' + '=' * 64)
+        print('Canadian Sports Betting Arbitrage Scanner')
+        print('Stake      : ${:.2f} CAD'.format(stake))
+        print('Sports     : {}'.format(', '.join(sport_names)))
+        if args.aggregate is not None:
+            print('Sources    : collector nodes on {}:{}'.format(*args.aggregate))
+        else:
+            print('Sources    : OddsChecker + 10 direct site scrapers' +
+                  (' + The Odds API' if use_api else ''))
+        print('Mode       : {}'.format(
+            'WATCH (every {}s)'.format(args.interval) if args.watch else 'Single scan'
+        ))
+        if args.notify:
+            print('Notify     : Desktop alerts ON')
+        if args.webhook:
+            print('Webhooks   : {}'.format(len(args.webhook)))
+        if args.history:
+            print('History    : {}'.format(args.history))
+        if args.trace:
+            print('Trace      : {}'.format(args.trace))
+        if args.record:
+            print('Recording  : {}'.format(args.record))
+        if args.replay:
+            print('Replay     : {}'.format(args.replay))
+        if args.profile:
+            print('Profile    : {} scan(s) -> {}.collapsed, {}.txt'.format(
+                args.profile, args.profile_out, args.profile_out))
+        if args.serve is not None:
+            print('Serving    : http://{}:{}/opportunities'.format(SERVE_HOST, args.serve))
+        if args.metrics is not None:
+            print('Metrics    : http://{}:{}/metrics'.format(METRICS_HOST, args.metrics))
+        print('=' * 64 + '\n')
 
     # ---- Build scrapers once (reused across watch-mode iterations) ----
-    scrapers = build_scrapers(use_api)
+    scrapers = build_scrapers(use_api) if args.aggregate is None else []
+    collector = None
+    if args.aggregate is not None:
+        from nodes import Aggregator
+        collector = Aggregator(*args.aggregate).start()
+    elif args.workers:
+        from collectors import CollectorPool
+        collector = CollectorPool(scrapers, args.workers).start()
+
+    # ---- Recorded responses: save them, or serve the scrapers from them ----
+    recorder = None
+    if args.record:
+        from recording import HttpRecorder
+        recorder = HttpRecorder(args.record)
+        for scraper in scrapers:
+            recorder.attach(scraper.session)
+    elif args.replay:
+        from recording import install_replay, load_recording
+        recording = load_recording(args.replay)
+        install_replay(scrapers, recording)
+        message.log_debug(
+            'Replaying {} recorded responses from {}'.format(len(recording), args.replay), 'main'
+        )
+
+    # ---- Already-alerted opportunities, restored from the last session ----
+    # A single scan alerts on everything it finds, so only watch mode persists them
+    seen = SeenSet(path=SEEN_STATE_FILE if args.watch else None)
+    seen.load()
+
+    # ---- Opportunity lifetimes: survival scores rank the dashboard ----
+    lifetimes = LifetimeTracker(key=_opp_key, path=LIFETIME_STATE_FILE if args.watch else None)
+    lifetimes.load()
+
+    # ---- Odds history: written by a background thread ----
+    history = None
+    if args.history:
+        from history import OddsHistory
+        history = OddsHistory(args.history).start()
+
+    # ---- Local HTTP/JSON API: answers from the latest published scan ----
+    service = None
+    if args.serve is not None:
+        from service import OpportunityService
+        service = OpportunityService(port=args.serve, scan_interval=args.interval).start()
+
+    # ---- Prometheus metrics: recorded once per scan, served from a thread ----
+    metrics = metrics_server = None
+    if args.metrics is not None:
+        from metrics import MetricsServer, ScannerMetrics
+        metrics = ScannerMetrics()
+        metrics_server = MetricsServer(metrics, port=args.metrics).start()
+
+    # ---- Notifications: coalesced, rate-limited, off the scan loop ----
+    notifier = None
+    if args.notify or args.webhook:
+        from notify import DesktopSink, NotificationDispatcher
+        sinks = [DesktopSink()] if args.notify else []
+        if args.webhook:
+            from webhooks import build_webhook_sinks
+            sinks += build_webhook_sinks(args.webhook)
+        notifier = NotificationDispatcher(
+            sinks, on_delivered=metrics.record_notification if metrics is not None else None,
+        ).start()
 
-    seen_keys: Set[str] = set()
     scan_count = 0
 
-    while True:
-        scan_count += 1
-        print('\nScanning... ({} scrapers running in parallel)'.format(len(scrapers)))
+    # ---- Per-scraper timings: per-scan report and a rolling health window ----
+    health = ScraperHealth()
 
-        start = time.time()
-        all_odds = collect_odds_parallel(scrapers, sport_keys)
-        elapsed = time.time() - start
+    # ---- Scan-to-scan deltas: downstream work scales with what moved ----
+    differ = SnapshotDiffer()
+    delta_log = DeltaWriter(args.deltas) if args.deltas else None
 
-        message.log_debug(
-            'Collected {} odds entries in {:.1f}s'.format(len(all_odds), elapsed), 'main'
-        )
-
-        if not all_odds:
-            print('\nNo odds collected. Check your internet connection or try '
-                  '--no-api if The Odds API key is invalid.')
-            if not args.watch:
-                sys.exit(0)
+    # ---- Near-arb watchlist: only events whose prices moved are re-evaluated ----
+    watchlist = NearArbWatchlist(
+        min_profit_pct=args.min_profit if args.min_profit is not None else MIN_PROFIT_PCT,
+    )
+    watchlist.subscribe(_log_crossing)
+
+    # ---- Live dashboard: redrawn in place by its own thread ----
+    live = None
+    if args.live:
+        from display import RICH_AVAILABLE, LiveDashboard
+        if RICH_AVAILABLE:
+            live = LiveDashboard().start()
         else:
-            # ---- Detect arbitrage ----
-            opportunities = scan_for_arbitrage(all_odds, stake)
-
-            # ---- Identify genuinely new opportunities ----
-            new_opps = [o for o in opportunities if _opp_key(o) not in seen_keys]
-            for o in new_opps:
-                seen_keys.add(_opp_key(o))
-
-            # ---- Desktop / terminal notifications ----
-            if args.notify and new_opps:
-                from notify import alert_new_opportunity
-                for o in new_opps:
-                    alert_new_opportunity(o.event_name, o.profit, o.profit_pct, o.sport)
-
-            # ---- Rich dashboard ----
-            print_rich_dashboard(
-                opportunities,
-                scan_count=scan_count,
-                elapsed=elapsed,
-                total_odds=len(all_odds),
-                new_count=len(new_opps),
-            )
+            message.log_warning('--live needs rich (pip install rich); using plain output', 'main')
 
-        # ---- Single-scan mode: exit after one pass ----
-        if not args.watch:
-            break
+    # ---- --profile: sample every thread's stack for the scans that follow ----
+    if args.profile:
+        import profiling
+        profiling.start(args.profile_out)
 
-        # ---- Watch mode: countdown to next scan ----
-        print('\nNext scan in {}s...  (Ctrl+C to stop)\n'.format(args.interval))
-        try:
+    try:
+        while True:
+            scan_count += 1
+            message.set_scan(scan_count)
+            scan_started = time.perf_counter()
+            if args.aggregate is not None:
+                scanning = 'Scanning... (odds {})'.format(collector.summary)
+            else:
+                scanning = 'Scanning... ({} scrapers running in parallel{})'.format(
+                    len(scrapers), ' ' + collector.summary if collector else '',
+                )
+            if live is not None:
+                live.set_status(scanning)
+            elif writer is None:
+                print('\n' + scanning)
+
+            start = time.time()
+            if writer is not None:
+                writer.begin_scan(scan_count, start)
+            scan_timings = []
+            with tracing.span('collect', 'scan'):
+                if collector is not None:
+                    all_odds = collector.collect(sport_keys)
+                    scan_timings = getattr(collector, 'last_timings', [])
+                    if writer is not None:
+                        writer.write_quotes(all_odds)
+                else:
+                    all_odds = collect_odds_parallel(
+                        scrapers, sport_keys,
+                        on_entries=writer.write_quotes if writer is not None else None,
+                        timings=scan_timings,
+                    )
+            elapsed = time.time() - start
+            health.record(scan_timings)
+            if scan_timings and message.is_enabled(DEBUG_MESSAGE, 'timings'):
+                message.log_debug(
+                    'Scan #{} scraper timings:\n{}'.format(
+                        scan_count, format_scan_report(scan_timings)),
+                    'timings',
+                )
+
+            message.log_debug(
+                'Collected {} odds entries in {:.1f}s'.format(len(all_odds), elapsed), 'main'
+            )
+
+            if not all_odds:
+                print('\nNo odds collected. Check your internet connection or try '
+                      '--no-api if The Odds API key is invalid.',
+                      file=message.console or sys.stdout)
+                if writer is not None:
+                    writer.end_scan(elapsed, 0, 0)
+                if metrics is not None:
+                    metrics.record_scan(start, elapsed, 0, [], [], scan_timings)
+                if not args.watch:
+                    break
+            else:
+                # ---- Detect arbitrage ----
+                stats = ScanStats()
+                with tracing.span('group_odds', 'match'):
+                    groups = group_odds(all_odds, stats=stats)
+                with tracing.span('scan_for_arbitrage', 'detect'):
+                    opportunities = scan_for_arbitrage(all_odds, stake, groups=groups, stats=stats)
+                if message.is_enabled(DEBUG_MESSAGE, 'main'):
+                    message.log_debug(
+                        'Scan #{} statistics:\n{}'.format(scan_count, stats.format_summary()),
+                        'main',
+                    )
+                delta = differ.diff(all_odds, ts=start)
+                message.log_debug('Scan #{} quotes: {}'.format(scan_count, delta.summary()), 'main')
+                if delta_log is not None:
+                    delta_log.write(delta)
+                watchlist.apply_delta(delta)
+                if history is not None:
+                    history.record_scan(all_odds, opportunities, ts=start)
+
+                value_bets = []
+                if args.value is not None:
+                    from value_bets import find_value_bets
+                    with tracing.span('find_value_bets', 'detect'):
+                        value_bets = find_value_bets(groups, min_edge_pct=args.value)
+
+                middles = []
+                if args.middles is not None:
+                    from middles import build_line_index, find_middles
+                    with tracing.span('find_middles', 'detect'):
+                        middles = find_middles(
+                            build_line_index(groups), stake, near_margin_pct=args.middles
+                        )
+
+                # ---- Identify genuinely new opportunities ----
+                seen.expire()
+                new_opps = [
+                    o for o in opportunities if seen.observe(_opp_key(o), o.commence_time)
+                ]
+                new_values = [
+                    v for v in value_bets if seen.observe(_value_key(v), v.commence_time)
+                ]
+                if scan_count % STATE_SAVE_EVERY == 0:
+                    seen.save()
+
+                # ---- Track lifetimes; rank by profit x survival probability ----
+                lifetimes.update(opportunities)
+                rank_by_survival(opportunities)
+                if scan_count % STATE_SAVE_EVERY == 0:
+                    lifetimes.save()
+
+                # ---- --serve: push new opportunities to /stream, then the snapshot ----
+                if service is not None:
+                    service.broadcast(new_opps)
+                    service.publish(scan_count, start, elapsed, all_odds, opportunities)
+
+                # ---- Notifications: queued, delivered by the dispatcher's threads ----
+                if notifier is not None:
+                    from notify import opportunity_alert, value_bet_alert
+                    for o in new_opps:
+                        notifier.submit(
+                            opportunity_alert(o.event_name, o.profit, o.profit_pct, o.sport)
+                        )
+                    for v in new_values:
+                        notifier.submit(value_bet_alert(
+                            v.event_name, outcome_label(v.entry), v.entry.bookmaker,
+                            v.entry.decimal_odds, v.edge_pct, v.sport,
+                        ))
+
+                if metrics is not None:
+                    metrics.record_scan(start, time.time() - start, len(all_odds), opportunities,
+                                        new_opps, scan_timings)
+
+                # ---- --output: the scan's opportunities, then its summary record ----
+                if writer is not None:
+                    writer.write_opportunities(opportunities)
+                    writer.end_scan(time.time() - start, len(all_odds), len(opportunities))
+
+                # ---- Rich dashboard ----
+                else:
+                    with tracing.span('render', 'render'):
+                        if live is not None:
+                            live.update(opportunities, scan_count, elapsed, len(all_odds), new_opps,
+                                        health=health.rows() if args.health else None)
+                        else:
+                            print_rich_dashboard(
+                                opportunities,
+                                scan_count=scan_count,
+                                elapsed=elapsed,
+                                total_odds=len(all_odds),
+                                new_count=len(new_opps),
+                            )
+                        if args.near_arbs:
+                            print_near_arbs(watchlist.top(args.near_arbs))
+                        print_value_bets(value_bets)
+                        if args.middles is not None:
+                            print_middles(middles)
+                        if args.stats:
+                            print_scan_stats(stats)
+                        if args.health and live is None:
+                            print_scan_health(health.rows())
+
+            if tracing.enabled:
+                tracing.complete('scan', scan_started, time.perf_counter(), 'scan',
+                                 {'scan': scan_count, 'entries': len(all_odds)})
+
+            # ---- Single-scan mode: exit after one pass; --output stops when stdout closes ----
+            if (not args.watch or (writer is not None and writer.closed)
+                    or scan_count == args.profile):
+                break
+
+            # ---- Watch mode: countdown to next scan ----
+            if live is not None:
+                live.set_status('Next scan in', next_scan=time.time() + args.interval)
+            elif writer is None:
+                print('\nNext scan in {}s...  (Ctrl+C to stop)\n'.format(args.interval))
             time.sleep(args.interval)
-        except KeyboardInterrupt:
-            print('\nStopped. Goodbye.')
-            break
+    except KeyboardInterrupt:
+        print('\nStopped. Goodbye.', file=message.console or sys.stdout)
+    finally:
+        seen.save()
+        lifetimes.save()
+        if args.profile:
+            profiling.stop()
+        if live is not None:
+            live.stop()
+        if notifier is not None:
+            notifier.close()
+            message.log_debug('Notifications: {}'.format(notifier.stats()), 'main')
+        if collector is not None:
+            collector.close()
+        if service is not None:
+            service.close()
+        if metrics_server is not None:
+            metrics_server.close()
+        if history is not None:
+            history.close()
+        if delta_log is not None:
+            delta_log.close()
+        if recorder is not None:
+            recorder.close()
+        tracing.stop()
 
 
 if __name__ == '__main__':
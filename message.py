@@ -1,17 +1,77 @@
+"""
+Terminal messages and the log file.
+
+Every module logs through the `message` singleton:
+
+    message.log_debug('Collected {} entries'.format(n), 'main')
+
+A record below the configured level is dropped before anything else
+happens, so disabled debug logging costs one comparison; wrap expensive
+message formatting in `if message.is_enabled(DEBUG_MESSAGE, name):`.
+Levels can be set per source (the funcname argument, usually the scraper
+name), e.g. WARNING overall but DEBUG for one scraper.
+
+Records that pass are printed to the console (only warnings and errors with
+--quiet) and handed to a queue; a background thread writes them to the log
+file in batches, so no scraper thread waits on disk I/O. The file is
+opened for append (never truncated) and rotated at LOG_MAX_BYTES, keeping
+LOG_BACKUPS old files. With LOG_FORMAT 'json' every line is a JSON record
+carrying time, level, source, process, thread and the current scan number.
+"""
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from config import LOG_BACKUPS, LOG_FILE, LOG_FORMAT, LOG_MAX_BYTES
+
 ERROR_MESSAGE = 'ERROR'
 WARNING_MESSAGE = 'WARNING'
 DEBUG_MESSAGE = 'DEBUG'
 RESULT_MESSAGE = 'RESULT'
 
+LEVELS = {DEBUG_MESSAGE: 10, RESULT_MESSAGE: 20, WARNING_MESSAGE: 30, ERROR_MESSAGE: 40}
+
+_FLUSH = object()
+
+
+def log_level_spec(text):
+    """argparse type for --log-level: 'LEVEL' or 'SOURCE=LEVEL' -> (source or None, LEVEL)."""
+    source, sep, level = text.rpartition('=')
+    if level.upper() not in LEVELS:
+        import argparse
+        raise argparse.ArgumentTypeError(
+            'unknown level {!r} (choose from {})'.format(level, ', '.join(LEVELS)))
+    return (source if sep else None), level.upper()
+
 
 class CMessage(object):
     """Class for printing terminal messages and logging to file."""
 
-    def __init__(self, logfile='log.txt'):
+    def __init__(self, logfile=LOG_FILE):
         self._logname = logfile
-        self._logfile = None
-        self._logFile(self._logname)
-        self.timing = {}
+        self.console = None     # where messages are printed; None = sys.stdout
+        self.quiet = False      # console shows warnings and errors only
+        self.fmt = LOG_FORMAT
+        self.scan_id = None     # included in JSON records
+        self.dropped = 0
+        self._level = LEVELS[DEBUG_MESSAGE]
+        self._source_levels = {}
+        self._floor = self._level   # lowest level any source accepts
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            # A forked worker inherits the queue but not the writer thread
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Logging
+    # ------------------------------------------------------------------
 
     def log_error(self, message, funcname=''):
         """Logs message with the 'ERROR' prefix."""
@@ -29,31 +89,154 @@ class CMessage(object):
         """Logs message with the 'RESULT' prefix."""
         self._log(message, RESULT_MESSAGE, funcname)
 
+    def is_enabled(self, level, funcname=''):
+        """True if a record of this level from this source would be logged."""
+        value = LEVELS[level]
+        if value < self._floor:
+            return False
+        return value >= self._source_levels.get(funcname.lower(), self._level)
+
     def _log(self, msg, level, funcname=''):
+        value = LEVELS[level]
+        if value < self._floor:
+            return
+        if value < self._source_levels.get(funcname.lower(), self._level):
+            return
         if funcname:
             formatted = "{0}::{1}::{2}".format(level, funcname, msg)
         else:
             formatted = "{0}::{1}".format(level, msg)
-        print(formatted)
-        if self._logfile is not None:
-            try:
-                self._logfile.write((formatted + '\n').encode('utf-8'))
-                self._logfile.flush()
-            except Exception:
-                pass
-
-    def _logFile(self, newname):
-        """Open a new log file at the given path."""
-        if self._logfile is not None:
-            try:
-                self._logfile.close()
-            except Exception:
-                pass
-        self._logname = newname
+        if not self.quiet or value >= LEVELS[WARNING_MESSAGE]:
+            print(formatted, file=self.console or sys.stdout)
+        if self._logname:
+            self._queue.put((time.time(), level, funcname, msg, formatted, self.scan_id,
+                             threading.current_thread().name))
+            if self._thread is None:
+                self._start_writer()
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    def configure_from_args(self, log_levels=(), quiet=False, fmt=None):
+        """Apply --log-level specs (see log_level_spec), --quiet and --log-format."""
+        level, sources = None, {}
+        for source, value in log_levels:
+            if source:
+                sources[source] = value
+            else:
+                level = value
+        self.configure(level=level, sources=sources, quiet=quiet, fmt=fmt)
+
+    def configure(self, level=None, sources=None, quiet=None, fmt=None):
+        """
+        Set the overall level, per-source levels ({name: level}), console
+        quiet mode and the log file format ('text' or 'json').
+        """
+        if level is not None:
+            self._level = LEVELS[level]
+        if sources is not None:
+            self._source_levels = {k.lower(): LEVELS[v] for k, v in sources.items()}
+        if quiet is not None:
+            self.quiet = quiet
+        if fmt is not None:
+            self.fmt = fmt
+        self._floor = min([self._level] + list(self._source_levels.values()))
+
+    def set_scan(self, scan_id):
+        """Scan number stamped on the following JSON records."""
+        self.scan_id = scan_id
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout=5.0):
+        """Block until every queued record is written (or timeout)."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def close(self):
+        """Write what is queued (also run at exit)."""
+        self.flush()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, name='log-writer',
+                                                daemon=True)
+                self._thread.start()
+
+    def _after_fork(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _writer(self):
+        logfile = self._open()
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            flushes = [item[1] for item in batch if item[0] is _FLUSH]
+            lines = [self._render(item) for item in batch if item[0] is not _FLUSH]
+            if lines and logfile is not None:
+                try:
+                    logfile.write(''.join(lines).encode('utf-8'))
+                    logfile.flush()
+                    if logfile.tell() >= LOG_MAX_BYTES:
+                        logfile = self._rotate(logfile)
+                    elif self._rotated_elsewhere(logfile):
+                        logfile.close()
+                        logfile = self._open()
+                except Exception:
+                    self.dropped += len(lines)
+            for done in flushes:
+                done.set()
+
+    def _render(self, item):
+        ts, level, funcname, msg, formatted, scan_id, thread = item
+        if self.fmt != 'json':
+            return formatted + '\n'
+        return json.dumps({
+            'ts': round(ts, 6), 'level': level, 'source': funcname, 'scan': scan_id,
+            'pid': os.getpid(), 'thread': thread, 'msg': str(msg),
+        }, ensure_ascii=False) + '\n'
+
+    def _open(self):
         try:
-            self._logfile = open(newname, 'wb')
+            return open(self._logname, 'ab')
         except Exception:
-            self._logfile = None
+            return None
+
+    def _rotated_elsewhere(self, logfile):
+        """True if another process (a --workers collector) rotated the file away."""
+        try:
+            return os.stat(self._logname).st_ino != os.fstat(logfile.fileno()).st_ino
+        except OSError:
+            return True
+
+    def _rotate(self, logfile):
+        """log.txt -> log.txt.1 -> ... -> log.txt.LOG_BACKUPS (oldest removed)."""
+        logfile.close()
+        try:
+            for i in range(LOG_BACKUPS - 1, 0, -1):
+                src = '{}.{}'.format(self._logname, i)
+                if os.path.exists(src):
+                    os.replace(src, '{}.{}'.format(self._logname, i + 1))
+            if LOG_BACKUPS > 0:
+                os.replace(self._logname, self._logname + '.1')
+            else:
+                os.remove(self._logname)
+        except OSError:
+            pass
+        return self._open()
 
 
 message = CMessage()
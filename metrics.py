@@ -0,0 +1,291 @@
+"""
+Prometheus metrics for long-running watch mode (--metrics).
+
+GET http://METRICS_HOST:PORT/metrics returns the Prometheus text format
+(version 0.0.4):
+
+    arb_scans_total                         counter
+    arb_scan_duration_seconds               histogram   collection + detection per scan
+    arb_last_scan_timestamp_seconds         gauge
+    arb_entries_collected                   gauge       quotes in the last scan
+    arb_scraper_runs_total{scraper,result}  counter     result = ok | error
+    arb_scraper_duration_seconds{scraper}   histogram   wall time per scan
+    arb_scraper_ttfb_seconds{scraper}       histogram   time to first byte per request
+    arb_scraper_http_requests_total{scraper}, arb_scraper_http_failures_total{scraper}
+    arb_scraper_entries_total{scraper}      counter
+    arb_scraper_bytes_total{scraper}        counter
+    arb_opportunities                       gauge       open in the last scan
+    arb_opportunities_found_total           counter     new opportunities
+    arb_opportunity_profit_pct              histogram   profit % of new opportunities
+    arb_notification_latency_seconds{sink}  histogram   detection -> delivered
+    arb_process_resident_memory_bytes, arb_process_cpu_seconds_total
+
+Updates are cheap and off the hot paths: nothing is recorded per quote or
+from inside a scraper. The scan loop records each scan once, from the
+totals it already has (the ScraperTiming of every scraper), and
+notification sinks record one observation per delivery. Each metric has its
+own lock, held only for a dict update, so writers never contend with one
+another and a scrape only briefly blocks the metric it is copying.
+"""
+import bisect
+import os
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from config import METRICS_HOST, METRICS_PORT
+from message import message
+
+SCAN_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300)
+SCRAPER_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TTFB_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+PROFIT_BUCKETS = (0.5, 1, 1.5, 2, 3, 5, 10, 20)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    pairs = ['{}="{}"'.format(n, _escape(str(v))) for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _num(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return ['# HELP {} {}'.format(self.name, self.help),
+                '# TYPE {} {}'.format(self.name, self.kind)] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return ['{}{} {}'.format(self.name, _labels(self.labels, k), _num(v)) for k, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+
+class CallbackGauge(_Metric):
+    """Gauge (or counter) whose value is read when scraped."""
+
+    def __init__(self, name, help, fn: Callable[[], float], kind: str = 'gauge'):
+        super().__init__(name, help)
+        self.fn = fn
+        self.kind = kind
+
+    def _samples(self):
+        try:
+            return ['{} {}'.format(self.name, _num(self.fn()))]
+        except Exception:
+            return []
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets: Sequence[float], labels=()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}    # labels -> [per-bucket counts..., +Inf, sum]
+
+    def observe(self, value: float, *label_values) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = 'le="{}"'.format(_num(bound))
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, _labels(self.labels, key, le), cumulative))
+            lines.append('{}_sum{} {}'.format(
+                self.name, _labels(self.labels, key), _num(series[-1])))
+            lines.append('{}_count{} {}'.format(self.name, _labels(self.labels, key), cumulative))
+        return lines
+
+
+def _resident_memory() -> float:
+    """Current RSS in bytes (/proc on Linux; peak RSS elsewhere)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class ScannerMetrics:
+    """Every metric the scanner exports, and the calls that update them."""
+
+    def __init__(self):
+        self.scans = Counter('arb_scans_total', 'Completed scans.')
+        self.scan_duration = Histogram(
+            'arb_scan_duration_seconds', 'Collection plus detection time per scan.', SCAN_BUCKETS)
+        self.last_scan = Gauge(
+            'arb_last_scan_timestamp_seconds', 'Unix time the last scan started.')
+        self.entries = Gauge('arb_entries_collected', 'Odds entries collected in the last scan.')
+        self.scraper_runs = Counter(
+            'arb_scraper_runs_total', 'Scraper runs by result (ok / error).', ('scraper', 'result'))
+        self.scraper_duration = Histogram(
+            'arb_scraper_duration_seconds', 'Scraper wall time per scan.', SCRAPER_BUCKETS,
+            ('scraper',))
+        self.scraper_ttfb = Histogram(
+            'arb_scraper_ttfb_seconds', 'Mean time to first byte per request, per scan.',
+            TTFB_BUCKETS, ('scraper',))
+        self.scraper_requests = Counter(
+            'arb_scraper_http_requests_total', 'HTTP attempts made by scrapers.', ('scraper',))
+        self.scraper_failures = Counter(
+            'arb_scraper_http_failures_total', 'HTTP attempts that failed.', ('scraper',))
+        self.scraper_entries = Counter(
+            'arb_scraper_entries_total', 'Odds entries produced by scrapers.', ('scraper',))
+        self.scraper_bytes = Counter(
+            'arb_scraper_bytes_total', 'Response bytes downloaded by scrapers.', ('scraper',))
+        self.opportunities = Gauge(
+            'arb_opportunities', 'Arbitrage opportunities open in the last scan.')
+        self.found = Counter('arb_opportunities_found_total', 'New arbitrage opportunities found.')
+        self.profit = Histogram(
+            'arb_opportunity_profit_pct', 'Profit % of new opportunities.', PROFIT_BUCKETS)
+        self.notification_latency = Histogram(
+            'arb_notification_latency_seconds', 'Detection to delivery of notifications.',
+            LATENCY_BUCKETS, ('sink',))
+        self._metrics: List[_Metric] = [
+            self.scans, self.scan_duration, self.last_scan, self.entries,
+            self.scraper_runs, self.scraper_duration, self.scraper_ttfb, self.scraper_requests,
+            self.scraper_failures, self.scraper_entries, self.scraper_bytes,
+            self.opportunities, self.found, self.profit, self.notification_latency,
+            CallbackGauge('arb_process_resident_memory_bytes', 'Resident memory.',
+                          _resident_memory),
+            CallbackGauge('arb_process_cpu_seconds_total', 'User + system CPU time.',
+                          time.process_time, kind='counter'),
+        ]
+
+    def record_scan(self, started: float, seconds: float, entries: int, opportunities: list,
+                    new_opportunities: list, timings: list = ()) -> None:
+        """One call per scan, from the scan loop."""
+        self.scans.inc()
+        self.scan_duration.observe(seconds)
+        self.last_scan.set(started)
+        self.entries.set(entries)
+        self.opportunities.set(len(opportunities))
+        self.found.inc(len(new_opportunities))
+        for o in new_opportunities:
+            self.profit.observe(o.profit_pct)
+        for t in timings:
+            self.scraper_runs.inc(1, t.name, 'ok' if t.ok else 'error')
+            self.scraper_duration.observe(t.wall, t.name)
+            if t.requests:
+                self.scraper_ttfb.observe(t.ttfb / t.requests, t.name)
+            self.scraper_requests.inc(t.requests, t.name)
+            self.scraper_failures.inc(t.failures, t.name)
+            self.scraper_entries.inc(t.entries, t.name)
+            self.scraper_bytes.inc(t.bytes, t.name)
+
+    def record_notification(self, sink: str, latency: float) -> None:
+        """Notification dispatcher callback (see notify.NotificationDispatcher)."""
+        self.notification_latency.observe(latency, sink)
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class MetricsServer:
+    """Serves ScannerMetrics.render() at /metrics from a background thread."""
+
+    def __init__(self, metrics: ScannerMetrics, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'MetricsServer':
+        handler = type('Handler', (_Handler,), {'metrics': self.metrics})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='metrics', daemon=True
+        )
+        self._thread.start()
+        message.log_debug('Metrics on http://{}:{}/metrics'.format(self.host, self.port), 'metrics')
+        return self
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics: ScannerMetrics = None      # set per server in MetricsServer.start
+    server_version = 'ArbScanner'
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            body, status, ctype = b'not found\n', 404, 'text/plain'
+        else:
+            body, status, ctype = self.metrics.render(), 200, CONTENT_TYPE
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        message.log_debug(fmt % args, 'metrics')
@@ -0,0 +1,189 @@
+"""
+Middles and cross-line arbitrage on spreads and totals.
+
+scan_for_arbitrage() only pairs quotes on the same line. Quotes on different
+lines can still cover every result, e.g. Over 5.5 at one book and Under 6.5 at
+another: a total of 6 wins both bets (the "middle"), anything else wins one.
+
+Every spread / total quote is reduced to a side and a threshold on one number
+X (the total, or the home team's winning margin):
+
+    high side   wins when X > a     Over a          Home  -h   (a = -h)
+    low side    wins when X < b     Under b         Away  +h   (b =  h)
+
+A high quote at a and a low quote at b with a < b cover every result, and
+results strictly between a and b win both. Stakes are split as for a normal
+arb, so with S = 1/odds_high + 1/odds_low:
+
+    worst case  = stake * (1/S - 1)      (exactly one leg wins)
+    middle hit  = stake * (2/S - 1)      (both legs win)
+
+Quotes are indexed per (event, market) with both sides sorted by threshold;
+the pair search is a sweep over that index. With n quotes in one market it
+takes O(n log n) to sort, n insertions into a sorted list (O(n) each, a
+memmove; n is tens to a few hundred), and then one step per pair reported
+or skipped as same-book.
+"""
+import bisect
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from arbitrage import MARKET_SPREAD, MARKET_TOTAL, GroupedOdds, OddsEntry, outcome_label
+from config import MIDDLE_NEAR_MARGIN_PCT
+
+
+@dataclass
+class MiddleOpportunity:
+    """Two complementary quotes on different lines that cover every result."""
+    event_name: str
+    sport: str
+    commence_time: str
+    market: str
+    high: OddsEntry                 # Over / home side
+    low: OddsEntry                  # Under / away side
+    window: Tuple[float, float]     # results strictly inside win both legs
+    implied_sum: float
+    total_stake: float
+    stakes: Dict[str, float]        # outcome label -> stake
+    worst_case_profit: float        # one leg wins (negative for near-middles)
+    worst_case_pct: float
+    middle_profit: float            # both legs win
+
+
+@dataclass
+class LineIndex:
+    """Spread / total quotes of one event market, both sides sorted by threshold."""
+    event_name: str
+    sport: str
+    commence_time: str
+    market: str
+    high: List[Tuple[float, OddsEntry]]     # (a, entry), ascending a
+    low: List[Tuple[float, OddsEntry]]      # (b, entry), ascending b
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+def _side(market: str, outcome: str, home: str) -> str:
+    """'high' / 'low' side of a spread or total outcome, '' if neither."""
+    if market == MARKET_TOTAL:
+        outcome = outcome.upper()
+        if outcome.startswith('OVER'):
+            return 'high'
+        if outcome.startswith('UNDER'):
+            return 'low'
+        return ''
+    return 'high' if outcome == home else 'low'
+
+
+def build_line_index(groups: GroupedOdds) -> Dict[tuple, LineIndex]:
+    """
+    Collect every spread / total line of each event from the grouped odds
+    (one group per line) into a per-(event_id, market) sorted index.
+    """
+    index: Dict[tuple, LineIndex] = {}
+    for key, outcomes in groups.events.items():
+        event_id, market, line = key
+        if market not in (MARKET_SPREAD, MARKET_TOTAL) or line is None:
+            continue
+        idx = index.get((event_id, market))
+        if idx is None:
+            name, sport, time = groups.meta[key]
+            idx = index[(event_id, market)] = LineIndex(name, sport, time, market, [], [])
+        # Groups are keyed on the home side's line (arbitrage.market_point), so
+        # Home -h and Away +h both sit at threshold h on the home margin
+        threshold = -line if market == MARKET_SPREAD else line
+        home = idx.event_name.split(' vs ')[0]
+        for outcome, entries in outcomes.items():
+            side = _side(market, outcome, home)
+            if side == 'high':
+                idx.high.extend((threshold, e) for e in entries)
+            elif side == 'low':
+                idx.low.extend((threshold, e) for e in entries)
+    for idx in index.values():
+        idx.high.sort(key=lambda t: t[0])
+        idx.low.sort(key=lambda t: t[0])
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+def find_middles(
+    index: Dict[tuple, LineIndex],
+    total_stake: float,
+    near_margin_pct: float = MIDDLE_NEAR_MARGIN_PCT,
+) -> List[MiddleOpportunity]:
+    """
+    Return every cross-book pair of complementary lines that covers all
+    results, whose worst case loses no more than near_margin_pct of the
+    stake (profitable pairs have a positive worst case), sorted by worst
+    case then middle payout.
+    """
+    max_sum = 1.0 + near_margin_pct / 100.0
+    found: List[MiddleOpportunity] = []
+
+    for idx in index.values():
+        if not idx.high or not idx.low:
+            continue
+        # Sweep lows by ascending b; `active` holds highs with a < b, ordered
+        # by implied probability so qualifying partners are a prefix of it
+        # (insort is a bisect plus a list memmove, cheap at one market's size).
+        active: List[Tuple[float, int]] = []
+        h = 0
+        for b, low in idx.low:
+            while h < len(idx.high) and idx.high[h][0] < b:
+                bisect.insort(active, (1.0 / idx.high[h][1].decimal_odds, h))
+                h += 1
+            budget = max_sum - 1.0 / low.decimal_odds
+            for implied_high, i in active:
+                if implied_high >= budget:
+                    break
+                a, high = idx.high[i]
+                if high.bookmaker_id == low.bookmaker_id:
+                    continue
+                found.append(_build(idx, high, low, a, b, total_stake))
+
+    found.sort(key=lambda m: (m.worst_case_profit, m.middle_profit), reverse=True)
+    return found
+
+
+def _build(
+    idx: LineIndex, high: OddsEntry, low: OddsEntry, a: float, b: float, total_stake: float
+) -> MiddleOpportunity:
+    implied = 1.0 / high.decimal_odds + 1.0 / low.decimal_odds
+    stake_high = total_stake * (1.0 / high.decimal_odds) / implied
+    stake_low = total_stake - stake_high
+    one_leg = total_stake / implied      # return when exactly one leg wins
+
+    # Scores are integers: the window only pays if one lies strictly inside.
+    # Otherwise a whole-number line can still push (refund) on one leg.
+    if math.floor(a) + 1 < b:
+        middle = 2 * one_leg
+    else:
+        middle = one_leg + max(
+            stake_high if a == math.floor(a) else 0.0,
+            stake_low if b == math.floor(b) else 0.0,
+        )
+
+    return MiddleOpportunity(
+        event_name=idx.event_name,
+        sport=idx.sport,
+        commence_time=idx.commence_time,
+        market=idx.market,
+        high=high,
+        low=low,
+        window=(a, b),
+        implied_sum=round(implied, 4),
+        total_stake=total_stake,
+        stakes={
+            outcome_label(high): round(stake_high, 2),
+            outcome_label(low): round(stake_low, 2),
+        },
+        worst_case_profit=round(one_leg - total_stake, 2),
+        worst_case_pct=round((1.0 / implied - 1.0) * 100.0, 3),
+        middle_profit=round(middle - total_stake, 2),
+    )
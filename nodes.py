@@ -0,0 +1,502 @@
+"""
+Distributed collection: collector nodes feeding one aggregator.
+
+    python main.py --aggregate 9000 --amount 250            # central scanner, local nodes
+    NODE_SECRET=... python main.py --aggregate 0.0.0.0:9000  # nodes on other machines
+    NODE_SECRET=... python main.py collector --connect scanner:9000 --scrapers OddsChecker
+    python nodes.py                                         # self-check on 127.0.0.1
+
+A collector node runs a subset of the scrapers every --interval seconds and
+streams each scan's entries to the aggregator. The aggregator keeps the
+latest batch per node and its watch loop runs detection over the union of
+all fresh batches, exactly as if the scrapers had run locally.
+
+Protocol: length-prefixed TCP frames (wire.send_frame), payloads below.
+
+    CHALLENGE agg -> node   16 random bytes, sent on accept
+    HELLO    node -> agg    JSON {"node": name, "boot": id of this node process,
+                                  "auth": hex HMAC-SHA256 of the challenge}
+    WELCOME  agg -> node    JSON {"last_seq": last batch stored for this node}
+    PING     node -> agg    <d   node clock
+    PONG     agg -> node    <dd  node clock echoed, aggregator clock
+    BATCH    node -> agg    <Qd  seq, collection time (aggregator clock) + wire batch
+    ACK      agg -> node    <Q   seq stored
+
+Clock offset: the node estimates offset = agg_clock - node_clock NTP-style
+from PING/PONG round trips (keeping the lowest-latency sample) and stamps
+batches in aggregator time, so the aggregator can age out nodes whose clocks
+disagree with its own.
+
+Backpressure: a node has at most NODE_WINDOW batches awaiting ACK. Batches
+wait in a bounded outbox (NODE_OUTBOX); when it is full the oldest is
+dropped, since each batch is a complete scan and newer ones supersede it.
+
+Authentication: the HMAC key is NODE_SECRET, so the secret itself never
+crosses the wire and a recorded HELLO cannot be replayed. An aggregator
+without a secret accepts any node, and it only binds loopback addresses
+(NODE_HOST); listening on any other address needs NODE_SECRET.
+
+Reconnect and resume: a node reconnects with exponential backoff; WELCOME
+tells it the last batch the aggregator stored, and it resends everything
+after that from its outbox. A new boot id (the node restarted and its
+sequence numbers start over) resets what the aggregator has stored.
+"""
+import argparse
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from arbitrage import OddsEntry
+from config import (
+    NODE_CLOCK_SYNC_INTERVAL, NODE_HOST, NODE_IO_TIMEOUT, NODE_OUTBOX, NODE_PORT, NODE_SECRET,
+    NODE_STALE_AFTER, NODE_WINDOW, SPORTS, WATCH_INTERVAL,
+)
+from message import log_level_spec, message
+from wire import decode_entries, encode_entries, recv_frame, send_frame
+
+HELLO, WELCOME, PING, PONG, BATCH, ACK, CHALLENGE = range(1, 8)
+
+_PING = struct.Struct('<d')
+_PONG = struct.Struct('<dd')
+_BATCH = struct.Struct('<Qd')
+_ACK = struct.Struct('<Q')
+
+
+def parse_address(text: str, default_port: int = NODE_PORT,
+                  default_host: str = '127.0.0.1') -> Tuple[str, int]:
+    """'host:port' / 'host' / ':port' / 'port' -> (host, port)."""
+    if text.isdigit():
+        return default_host, int(text)
+    host, _, port = text.rpartition(':') if ':' in text else (text, '', '')
+    return host or default_host, int(port) if port else default_port
+
+
+def is_loopback(host: str) -> bool:
+    """True if binding host only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _auth(secret: str, challenge: bytes) -> str:
+    return hmac.new(secret.encode('utf-8'), challenge, hashlib.sha256).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Collector side
+# ---------------------------------------------------------------------------
+
+class NodeLink:
+    """Background connection from a collector node to the aggregator."""
+
+    def __init__(self, address: Tuple[str, int], node: str, secret: str = NODE_SECRET,
+                 window: int = NODE_WINDOW, outbox: int = NODE_OUTBOX):
+        self.address = address
+        self.node = node
+        self.window = window
+        self._secret = secret
+        self.boot = '{:x}'.format(int(time.time() * 1e6))
+        self.offset = 0.0           # aggregator clock - local clock
+        self.dropped = 0            # batches superseded before they were sent
+        self._best_rtt = float('inf')
+        self._outbox: Deque[Tuple[int, float, bytes]] = deque()
+        self._outbox_size = outbox
+        self._seq = 0
+        self._acked = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'NodeLink':
+        self._thread = threading.Thread(target=self._run, name='node-link', daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, entries: List[OddsEntry], collected_at: Optional[float] = None) -> int:
+        """Queue one scan for the aggregator; returns its sequence number."""
+        blob = encode_entries(entries)
+        with self._cond:
+            self._seq += 1
+            if len(self._outbox) >= self._outbox_size:
+                self._outbox.popleft()
+                self.dropped += 1
+                message.log_warning(
+                    'Aggregator is behind; dropped an unsent batch ({} so far)'.format(
+                        self.dropped),
+                    'nodes',
+                )
+            if collected_at is None:
+                collected_at = time.time()
+            self._outbox.append((self._seq, collected_at, blob))
+            self._cond.notify()
+            return self._seq
+
+    def wait_acked(self, seq: int, timeout: float) -> bool:
+        """Block until batch `seq` is acknowledged (used by tests and shutdown)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._acked >= seq, timeout)
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        self._backoff = 1.0         # reset by _session once the aggregator welcomes us
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection(self.address, timeout=NODE_IO_TIMEOUT)
+            except OSError as exc:
+                message.log_warning('Cannot reach aggregator {}:{}: {}'.format(
+                    self.address[0], self.address[1], exc), 'nodes')
+            else:
+                try:
+                    self._session(sock)
+                except (OSError, ConnectionError, ValueError) as exc:
+                    if not self._stop.is_set():
+                        message.log_warning('Lost aggregator connection: {}'.format(exc), 'nodes')
+                finally:
+                    sock.close()
+            # Also after a refused handshake (wrong NODE_SECRET), so it is not retried hot
+            self._stop.wait(self._backoff)
+            self._backoff = min(self._backoff * 2, 30.0)
+
+    def _session(self, sock: socket.socket) -> None:
+        kind, challenge = recv_frame(sock)
+        if kind != CHALLENGE:
+            raise ValueError('expected CHALLENGE, got frame type {}'.format(kind))
+        hello = {'node': self.node, 'boot': self.boot, 'auth': _auth(self._secret, challenge)}
+        send_frame(sock, HELLO, json.dumps(hello).encode('utf-8'))
+        kind, payload = recv_frame(sock)
+        if kind != WELCOME:
+            raise ValueError('expected WELCOME, got frame type {}'.format(kind))
+        resume_after = json.loads(payload)['last_seq']
+        self._backoff = 1.0
+        self._ack(resume_after)
+        message.log_debug('Connected to aggregator as {} (resuming after batch {})'.format(
+            self.node, resume_after), 'nodes')
+
+        # Measure the clock offset before stamping any batch
+        for _ in range(3):
+            send_frame(sock, PING, _PING.pack(time.time()))
+            kind, payload = recv_frame(sock)
+            if kind == PONG:
+                self._clock_sample(*_PONG.unpack(payload), time.time())
+
+        sent_upto = resume_after
+        last_ping = time.time()
+        while not self._stop.is_set():
+            now = time.time()
+            if now - last_ping >= NODE_CLOCK_SYNC_INTERVAL:
+                send_frame(sock, PING, _PING.pack(now))
+                last_ping = now
+            with self._cond:
+                to_send = [b for b in self._outbox
+                           if b[0] > sent_upto and b[0] <= self._acked + self.window]
+                if not to_send and not self._outbox_has_unacked():
+                    self._cond.wait(0.5)
+            for seq, collected_at, blob in to_send:
+                send_frame(sock, BATCH, _BATCH.pack(seq, collected_at + self.offset) + blob)
+                sent_upto = seq
+            # Handle every reply that has arrived; wait briefly for acks in flight
+            while select.select([sock], [], [], 0.05 if sent_upto > self._acked else 0)[0]:
+                kind, payload = recv_frame(sock)
+                if kind == ACK:
+                    self._ack(_ACK.unpack(payload)[0])
+                elif kind == PONG:
+                    self._clock_sample(*_PONG.unpack(payload), time.time())
+
+    def _outbox_has_unacked(self) -> bool:
+        return bool(self._outbox) and self._outbox[-1][0] > self._acked
+
+    def _ack(self, seq: int) -> None:
+        with self._cond:
+            self._acked = max(self._acked, seq)
+            while self._outbox and self._outbox[0][0] <= self._acked:
+                self._outbox.popleft()
+            self._cond.notify_all()
+
+    def _clock_sample(self, sent: float, remote: float, received: float) -> None:
+        rtt = received - sent
+        # Samples age out slowly so a drifting clock is still followed
+        self._best_rtt *= 1.05
+        if rtt <= self._best_rtt:
+            self._best_rtt = rtt
+            self.offset = remote - (sent + received) / 2.0
+
+
+# ---------------------------------------------------------------------------
+# Aggregator side
+# ---------------------------------------------------------------------------
+
+@dataclass
+class NodeState:
+    """Latest batch received from one collector node."""
+    node: str
+    boot: str = ''
+    seq: int = 0
+    stamp: float = 0.0          # collection time, aggregator clock
+    received: float = 0.0
+    entries: List[OddsEntry] = field(default_factory=list)
+    connected: bool = False
+    address: str = ''
+
+
+class Aggregator:
+    """TCP server merging collector nodes' batches into one odds store."""
+
+    def __init__(self, host: str = NODE_HOST, port: int = NODE_PORT,
+                 secret: str = NODE_SECRET, stale_after: float = NODE_STALE_AFTER):
+        self.host = host
+        self.port = port
+        self.stale_after = stale_after
+        self.nodes: Dict[str, NodeState] = {}
+        self._secret = secret
+        self._conns: set = set()
+        self._lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+        self._stop = threading.Event()
+
+    @property
+    def summary(self) -> str:
+        live = sum(1 for n in self.nodes.values() if n.connected)
+        return 'from {}/{} collector nodes'.format(live, len(self.nodes))
+
+    def start(self) -> 'Aggregator':
+        if not self._secret and not is_loopback(self.host):
+            raise ValueError('Refusing to accept collector nodes on {} without NODE_SECRET'
+                             .format(self.host))
+        self._server = socket.create_server((self.host, self.port))
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, name='aggregator', daemon=True).start()
+        message.log_debug(
+            'Aggregating collector nodes on {}:{}'.format(self.host, self.port), 'nodes'
+        )
+        return self
+
+    def collect(self, sport_keys: Optional[List[str]] = None) -> List[OddsEntry]:
+        """Union of every node's latest batch that is younger than stale_after."""
+        now = time.time()
+        labels = {SPORTS[k] for k in sport_keys if k in SPORTS} if sport_keys else None
+        all_odds: List[OddsEntry] = []
+        with self._lock:
+            states = list(self.nodes.values())
+        for state in states:
+            if now - state.stamp > self.stale_after:
+                if state.entries:
+                    message.log_warning('Ignoring stale odds from node {} ({:.0f}s old)'.format(
+                        state.node, now - state.stamp), 'nodes')
+                continue
+            entries = state.entries
+            if labels is not None:
+                entries = [e for e in entries if e.sport in labels]
+            message.log_debug('{} supplied {} entries'.format(state.node, len(entries)), 'nodes')
+            all_odds.extend(entries)
+        return all_odds
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+        self._disconnect_all()
+
+    def _disconnect_all(self) -> None:
+        """Drop every node connection (nodes reconnect and resume)."""
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _accept(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, addr = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn, addr), daemon=True).start()
+
+    def _serve(self, conn: socket.socket, addr) -> None:
+        state = None
+        with self._lock:
+            self._conns.add(conn)
+        try:
+            conn.settimeout(NODE_IO_TIMEOUT + NODE_CLOCK_SYNC_INTERVAL)
+            challenge = os.urandom(16)
+            send_frame(conn, CHALLENGE, challenge)
+            kind, payload = recv_frame(conn)
+            if kind != HELLO:
+                raise ValueError('expected HELLO, got frame type {}'.format(kind))
+            hello = json.loads(payload)
+            if self._secret and not hmac.compare_digest(
+                    str(hello.get('auth', '')), _auth(self._secret, challenge)):
+                raise ValueError('wrong NODE_SECRET')
+            name = hello['node']
+            with self._lock:
+                state = self.nodes.setdefault(name, NodeState(node=name))
+            if state.boot != hello.get('boot', ''):
+                state.boot, state.seq = hello.get('boot', ''), 0
+            state.connected, state.address = True, '{}:{}'.format(*addr[:2])
+            send_frame(conn, WELCOME, json.dumps({'last_seq': state.seq}).encode('utf-8'))
+            message.log_debug(
+                'Collector node {} connected from {}'.format(name, state.address), 'nodes'
+            )
+
+            while not self._stop.is_set():
+                kind, payload = recv_frame(conn)
+                if kind == PING:
+                    send_frame(conn, PONG, _PONG.pack(_PING.unpack(payload)[0], time.time()))
+                elif kind == BATCH:
+                    seq, stamp = _BATCH.unpack_from(payload)
+                    if seq > state.seq:
+                        entries = decode_entries(payload[_BATCH.size:])
+                        now = time.time()
+                        # A stamp from the future means the offset estimate is off
+                        state.entries, state.seq, state.stamp, state.received = (
+                            entries, seq, min(stamp, now), now,
+                        )
+                    send_frame(conn, ACK, _ACK.pack(seq))
+        except (OSError, ConnectionError, ValueError, KeyError) as exc:
+            if not self._stop.is_set():
+                message.log_warning('Collector node {} disconnected: {}'.format(
+                    state.node if state else addr, exc), 'nodes')
+        finally:
+            if state is not None:
+                state.connected = False
+            with self._lock:
+                self._conns.discard(conn)
+            conn.close()
+
+
+# ---------------------------------------------------------------------------
+# CLI  (python main.py collector ...)
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='main.py collector',
+        description='Run scrapers and stream their odds to an aggregator (main.py --aggregate)',
+    )
+    parser.add_argument('--connect', required=True, metavar='HOST:PORT',
+                        help='Aggregator address (default port {})'.format(NODE_PORT))
+    parser.add_argument('--node', default=socket.gethostname(),
+                        help='Name of this node (default: host name)')
+    parser.add_argument('--scrapers', nargs='+', default=None, metavar='NAME',
+                        help='Only run these scrapers, e.g. OddsChecker Bodog (default: all)')
+    parser.add_argument('--sports', '-s', nargs='+', choices=list(SPORTS.keys()), default=None,
+                        help='Sports to scan (default: all)')
+    parser.add_argument('--no-api', action='store_true',
+                        help='Skip The Odds API even if ODDS_API_KEY is set')
+    parser.add_argument('--interval', '-i', type=int, default=WATCH_INTERVAL, metavar='SECONDS',
+                        help='Seconds between scans (default: {})'.format(WATCH_INTERVAL))
+    parser.add_argument('--log-level', type=log_level_spec, action='append', default=[],
+                        metavar='[SOURCE=]LEVEL',
+                        help='Minimum level logged, overall or for one SOURCE; repeatable')
+    parser.add_argument('--log-format', choices=('text', 'json'), default=None,
+                        help='Log file format')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Only print warnings and errors')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from scan import build_scrapers, collect_odds_parallel
+
+    args = parse_args(argv)
+    message.configure_from_args(args.log_level, args.quiet, args.log_format)
+    scrapers = build_scrapers(not args.no_api)
+    if args.scrapers:
+        wanted = {n.lower() for n in args.scrapers}
+        scrapers = [s for s in scrapers if s.name.lower() in wanted]
+        if not scrapers:
+            print('None of the requested scrapers exist: {}'.format(', '.join(args.scrapers)))
+            return
+
+    link = NodeLink(parse_address(args.connect), args.node).start()
+    print('Collector {} -> {}:{} ({})'.format(
+        args.node, link.address[0], link.address[1], ', '.join(s.name for s in scrapers)))
+    try:
+        while True:
+            start = time.time()
+            entries = collect_odds_parallel(scrapers, args.sports)
+            link.submit(entries, collected_at=start)
+            message.log_debug('Collected {} entries in {:.1f}s (clock offset {:+.3f}s)'.format(
+                len(entries), time.time() - start, link.offset), 'nodes')
+            time.sleep(max(0.0, args.interval - (time.time() - start)))
+    except KeyboardInterrupt:
+        print('\nStopped. Goodbye.')
+    finally:
+        link.close()
+
+
+# ---------------------------------------------------------------------------
+# Self-check  (python nodes.py)
+# ---------------------------------------------------------------------------
+
+def self_check(timeout: float = 10.0) -> bool:
+    """
+    Run an aggregator and two nodes on 127.0.0.1: batches are acknowledged,
+    a dropped connection resumes after the last stored batch, and a node with
+    the wrong secret is turned away. Prints each step; True if all pass.
+    """
+    def batch(node: str, n: int) -> List[OddsEntry]:
+        return [OddsEntry(bookmaker=node, bookmaker_id=node, sport='NHL', event_id=str(i),
+                          event_name='Home vs Away', commence_time='', outcome='Home',
+                          decimal_odds=2.0 + i / 100.0) for i in range(n)]
+
+    def check(label: str, ok: bool) -> bool:
+        print('{:<52} {}'.format(label, 'ok' if ok else 'FAILED'))
+        return ok
+
+    secret = os.urandom(8).hex()
+    agg = Aggregator('127.0.0.1', 0, secret=secret).start()
+    address = ('127.0.0.1', agg.port)
+    a = NodeLink(address, 'node-a', secret=secret).start()
+    b = NodeLink(address, 'node-b', secret=secret).start()
+    intruder = NodeLink(address, 'intruder', secret='wrong').start()
+    passed = True
+    try:
+        a.submit(batch('node-a', 3))
+        b.submit(batch('node-b', 2))
+        passed &= check('both nodes acknowledged',
+                        a.wait_acked(1, timeout) and b.wait_acked(1, timeout))
+        passed &= check('aggregator merges their batches', len(agg.collect()) == 5)
+
+        agg._disconnect_all()
+        a.submit(batch('node-a', 1))
+        a.submit(batch('node-a', 4))
+        passed &= check('node-a resumes after a dropped connection', a.wait_acked(3, timeout))
+        passed &= check('aggregator stored the latest batch only once',
+                        agg.nodes['node-a'].seq == 3 and len(agg.collect()) == 6)
+
+        intruder.submit(batch('intruder', 1))
+        passed &= check('node with the wrong secret is refused',
+                        not intruder.wait_acked(1, 2.0) and 'intruder' not in agg.nodes)
+    finally:
+        for link in (a, b, intruder):
+            link.close()
+        agg.close()
+    print('Collector node protocol: {}'.format('all checks passed' if passed else 'FAILED'))
+    return passed
+
+
+if __name__ == '__main__':
+    message.configure_from_args([], True, None)
+    raise SystemExit(0 if self_check() else 1)
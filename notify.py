@@ -7,8 +7,37 @@ Priority order:
 
 Install plyer for desktop popups:
     pip install plyer
+
+The watch loop does not call the sinks itself: it submits Alerts to a
+NotificationDispatcher and moves on. Every sink has its own channel and
+thread. A channel waits NOTIFY_COALESCE_WINDOW seconds after the first alert
+of a burst, then delivers everything pending as one notification (a single
+alert as-is, several as a summary led by the most profitable), and never
+delivers more often than the sink's min_interval. Alerts arriving in the
+meantime are folded into the next summary; past NOTIFY_MAX_PENDING the
+least profitable are dropped (and counted). A slow sink only delays itself.
+
+A sink is any object with a `name`, a `min_interval` and a
+`send(notification)` method (see DesktopSink). Optionally it may set its own
+`coalesce_window`, have `start()` / `close()` (called by the dispatcher) and
+`metrics()` (merged into stats()); see webhooks.WebhookSink.
+
+The dispatcher's on_delivered(sink_name, seconds) callback gets the
+detection-to-delivery latency of every notification. A sink that delivers
+asynchronously declares an `on_delivered` attribute, which the dispatcher
+sets, and calls it when delivery actually happened.
 """
+import heapq
 import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from config import (
+    NOTIFY_COALESCE_WINDOW, NOTIFY_MAX_PENDING, NOTIFY_MIN_INTERVAL, NOTIFY_SUMMARY_LINES,
+)
+from message import message
 
 
 def send_notification(title: str, body: str) -> bool:
@@ -34,8 +63,199 @@ def send_notification(title: str, body: str) -> bool:
     return False
 
 
-def alert_new_opportunity(event_name: str, profit: float, profit_pct: float, sport: str) -> None:
-    """Fire an alert whenever a new arbitrage opportunity is discovered."""
-    title = 'New Arb: {:.2f}% profit'.format(profit_pct)
-    body = '[{}] {} | ${:.2f} guaranteed'.format(sport, event_name, profit)
-    send_notification(title, body)
+def opportunity_alert(event_name: str, profit: float, profit_pct: float, sport: str) -> 'Alert':
+    """Alert for a new arbitrage opportunity, prioritised by profit %."""
+    return Alert(
+        kind='arb',
+        title='New Arb: {:.2f}% profit'.format(profit_pct),
+        body='[{}] {} | ${:.2f} guaranteed'.format(sport, event_name, profit),
+        priority=profit_pct,
+        data={'event_name': event_name, 'sport': sport, 'profit': profit,
+              'profit_pct': profit_pct},
+    )
+
+
+def value_bet_alert(
+    event_name: str, outcome: str, bookmaker: str, odds: float, edge_pct: float, sport: str
+) -> 'Alert':
+    """Alert for a new value bet, prioritised by edge %."""
+    return Alert(
+        kind='value',
+        title='Value Bet: {:.2f}% edge'.format(edge_pct),
+        body='[{}] {} | {} @ {} ({})'.format(sport, event_name, outcome, odds, bookmaker),
+        priority=edge_pct,
+        data={'event_name': event_name, 'sport': sport, 'outcome': outcome,
+              'bookmaker': bookmaker, 'decimal_odds': odds, 'edge_pct': edge_pct},
+    )
+
+
+# ---------------------------------------------------------------------------
+# Asynchronous dispatch
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Alert:
+    """One thing worth telling the user about; higher priority is shown first."""
+    kind: str                       # 'arb' or 'value'
+    title: str
+    body: str
+    priority: float
+    data: dict = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+
+@dataclass
+class Notification:
+    """What a sink delivers: one alert, or a coalesced burst of them."""
+    title: str
+    body: str
+    alerts: List[Alert]             # highest priority first
+    dropped: int = 0                # alerts of this burst discarded for NOTIFY_MAX_PENDING
+
+    @property
+    def first_ts(self) -> float:
+        """Detection time of the oldest alert (delivery latency is measured from it)."""
+        return min(a.ts for a in self.alerts)
+
+
+def coalesce(alerts: List[Alert], dropped: int = 0) -> Notification:
+    """Fold alerts into one notification, most valuable first."""
+    alerts = sorted(alerts, key=lambda a: a.priority, reverse=True)
+    if len(alerts) == 1 and not dropped:
+        return Notification(alerts[0].title, alerts[0].body, alerts)
+    total = len(alerts) + dropped
+    title = '{} new alerts | best: {}'.format(total, alerts[0].title)
+    lines = [a.body for a in alerts[:NOTIFY_SUMMARY_LINES]]
+    if total > len(lines):
+        lines.append('+{} more'.format(total - len(lines)))
+    return Notification(title, '\n'.join(lines), alerts, dropped)
+
+
+class DesktopSink:
+    """plyer popup, or the terminal bell when plyer is unavailable."""
+
+    name = 'desktop'
+    min_interval = NOTIFY_MIN_INTERVAL
+
+    def send(self, notification: Notification) -> None:
+        send_notification(notification.title, notification.body)
+
+
+class _Channel:
+    """Pending alerts and delivery thread of one sink."""
+
+    def __init__(self, sink, coalesce_window: float, max_pending: int, on_delivered=None):
+        self.sink = sink
+        # Async sinks report their own deliveries (see NotificationDispatcher)
+        self.on_delivered = None if hasattr(sink, 'on_delivered') else on_delivered
+        self.coalesce_window = getattr(sink, 'coalesce_window', coalesce_window)
+        self.max_pending = max_pending
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self._pending: list = []        # min-heap of (priority, seq, alert)
+        self._burst_dropped = 0
+        self._seq = 0
+        self._last_delivery = 0.0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name='notify-{}'.format(sink.name), daemon=True
+        )
+
+    def put(self, alert: Alert) -> None:
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._pending, (alert.priority, self._seq, alert))
+            if len(self._pending) > self.max_pending:
+                heapq.heappop(self._pending)        # least valuable goes first
+                self._burst_dropped += 1
+                self.dropped += 1
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Let the burst gather, and respect the sink's rate limit
+                # (unless shutting down: then deliver what is left at once)
+                ready_at = max(
+                    self._pending_since + self.coalesce_window,
+                    self._last_delivery + getattr(self.sink, 'min_interval', 0.0),
+                )
+                while not self._closing and time.time() < ready_at:
+                    self._cond.wait(ready_at - time.time())
+                alerts = [alert for _, _, alert in self._pending]
+                dropped = self._burst_dropped
+                self._pending, self._burst_dropped = [], 0
+            notification = coalesce(alerts, dropped)
+            try:
+                self.sink.send(notification)
+                self.delivered += 1
+                if self.on_delivered is not None:
+                    self.on_delivered(self.sink.name, time.time() - notification.first_ts)
+            except Exception as exc:
+                self.failed += 1
+                message.log_error(
+                    'Notification sink {} failed: {}'.format(self.sink.name, exc), 'notify'
+                )
+            self._last_delivery = time.time()
+
+    @property
+    def _pending_since(self) -> float:
+        return min(alert.ts for _, _, alert in self._pending)
+
+
+class NotificationDispatcher:
+    """Queues alerts and delivers them to every sink from background threads."""
+
+    def __init__(
+        self,
+        sinks: list,
+        coalesce_window: float = NOTIFY_COALESCE_WINDOW,
+        max_pending: int = NOTIFY_MAX_PENDING,
+        on_delivered=None,
+    ):
+        for s in sinks:
+            if hasattr(s, 'on_delivered'):
+                s.on_delivered = on_delivered
+        self._channels = [_Channel(s, coalesce_window, max_pending, on_delivered) for s in sinks]
+
+    def start(self) -> 'NotificationDispatcher':
+        for ch in self._channels:
+            if hasattr(ch.sink, 'start'):
+                ch.sink.start()
+            ch._thread.start()
+        return self
+
+    def submit(self, alert: Alert) -> None:
+        """Queue an alert for every sink. Never blocks on delivery."""
+        for ch in self._channels:
+            ch.put(alert)
+
+    def stats(self) -> dict:
+        """Per-sink counters: notifications delivered / failed, alerts dropped."""
+        stats = {}
+        for ch in self._channels:
+            stats[ch.sink.name] = {'delivered': ch.delivered, 'failed': ch.failed,
+                                   'dropped': ch.dropped}
+            if hasattr(ch.sink, 'metrics'):
+                stats[ch.sink.name].update(ch.sink.metrics())
+        return stats
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Deliver what is still pending (ignoring rate limits) and stop."""
+        for ch in self._channels:
+            with ch._cond:
+                ch._closing = True
+                ch._cond.notify()
+        deadline = time.time() + (timeout or 0.0)
+        for ch in self._channels:
+            if ch._thread.is_alive():
+                ch._thread.join(None if timeout is None else max(0.0, deadline - time.time()))
+        for ch in self._channels:
+            if hasattr(ch.sink, 'close'):
+                ch.sink.close()
@@ -0,0 +1,153 @@
+"""
+Statistical bad-price filter.
+
+A single mis-scraped price (wrong outcome, stale line, American odds parsed as
+decimal) shows up as a small, believable "arb" that the flat MAX_PROFIT_PCT cap
+cannot catch. Before detection, every quote is compared with the consensus of
+the other books quoting the same outcome of the same market:
+
+    consensus  = median implied probability across books
+    spread     = 1.4826 * MAD   (floored at OUTLIER_MIN_SPREAD)
+    robust z   = (implied_prob - consensus) / spread
+
+Quotes with |z| above OUTLIER_Z_THRESHOLD are dropped. Groups quoted by fewer
+than OUTLIER_MIN_BOOKS books are left alone — there is no consensus to check.
+
+All events are processed together in one vectorized pass (numpy).
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from arbitrage import OddsEntry, market_key, outcome_label
+from config import OUTLIER_MIN_BOOKS, OUTLIER_MIN_SPREAD, OUTLIER_Z_THRESHOLD
+from message import message
+
+
+@dataclass
+class OutlierRejection:
+    """A quote dropped because it is out of line with the other books."""
+    entry: OddsEntry
+    consensus_odds: float   # decimal odds at the consensus implied probability
+    z_score: float          # negative: longer price than consensus
+    reason: str
+
+
+# ---------------------------------------------------------------------------
+# Vectorized group helpers
+# ---------------------------------------------------------------------------
+
+def group_median(
+    values: np.ndarray, codes: np.ndarray, n_groups: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Median of `values` within each group in a single sort.
+
+    Parameters
+    ----------
+    values : float array
+    codes : int array, same length, dense group ids in [0, n_groups)
+
+    Returns
+    -------
+    (medians, counts), both indexed by group id. Empty groups get NaN.
+    """
+    counts = np.bincount(codes, minlength=n_groups)
+    medians = np.full(n_groups, np.nan)
+    if len(values) == 0:
+        return medians, counts
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    lo = (starts + (counts - 1) // 2)[present]
+    hi = (starts + counts // 2)[present]
+    medians[present] = (ordered[lo] + ordered[hi]) / 2.0
+    return medians, counts
+
+
+def encode_groups(keys: List[tuple]) -> Tuple[np.ndarray, int]:
+    """Map hashable keys to dense integer codes. Returns (codes, n_groups)."""
+    lookup: Dict[tuple, int] = {}
+    codes = np.fromiter(
+        (lookup.setdefault(k, len(lookup)) for k in keys),
+        dtype=np.int64,
+        count=len(keys),
+    )
+    return codes, len(lookup)
+
+
+def robust_z(
+    prob: np.ndarray, codes: np.ndarray, n_groups: int, min_spread: float = OUTLIER_MIN_SPREAD
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Robust z-score of every implied probability within its group.
+
+    Returns (z per value, median per group, count per group).
+    """
+    median, counts = group_median(prob, codes, n_groups)
+    deviation = np.abs(prob - median[codes])
+    mad, _ = group_median(deviation, codes, n_groups)
+    spread = np.maximum(1.4826 * mad[codes], min_spread)
+    return (prob - median[codes]) / spread, median, counts
+
+
+# ---------------------------------------------------------------------------
+# Filter
+# ---------------------------------------------------------------------------
+
+def filter_outliers(
+    all_odds: List[OddsEntry],
+    z_threshold: float = OUTLIER_Z_THRESHOLD,
+    min_books: int = OUTLIER_MIN_BOOKS,
+    min_spread: float = OUTLIER_MIN_SPREAD,
+) -> Tuple[List[OddsEntry], List[OutlierRejection]]:
+    """
+    Split quotes into (kept, rejected) using per-outcome robust z-scores.
+
+    Entries with odds <= 1.0 are passed through untouched; the arbitrage
+    scan already discards them.
+    """
+    if not all_odds:
+        return [], []
+
+    odds = np.fromiter((e.decimal_odds for e in all_odds), dtype=float, count=len(all_odds))
+    valid = odds > 1.0
+    prob = np.where(valid, 1.0 / np.where(valid, odds, 2.0), np.nan)
+
+    codes, n_groups = encode_groups([(market_key(e), e.outcome) for e in all_odds])
+    # Invalid entries get their own throwaway group so they do not skew medians
+    codes = np.where(valid, codes, n_groups)
+    n_groups += 1
+
+    z, median, counts = robust_z(np.nan_to_num(prob), codes, n_groups, min_spread)
+    reject = valid & (counts[codes] >= min_books) & (np.abs(z) > z_threshold)
+
+    if not reject.any():
+        return list(all_odds), []
+
+    kept: List[OddsEntry] = []
+    rejected: List[OutlierRejection] = []
+    for i in np.flatnonzero(~reject):
+        kept.append(all_odds[i])
+    for i in np.flatnonzero(reject):
+        entry = all_odds[i]
+        consensus_odds = round(1.0 / median[codes[i]], 3)
+        reason = 'price {} consensus {:.3f} from {} books (z={:.1f})'.format(
+            'above' if z[i] < 0 else 'below',
+            consensus_odds, int(counts[codes[i]]), z[i],
+        )
+        rejected.append(OutlierRejection(
+            entry=entry,
+            consensus_odds=consensus_odds,
+            z_score=round(float(z[i]), 2),
+            reason=reason,
+        ))
+        message.log_warning(
+            'Dropping {} {} @ {} for {} — {}'.format(
+                entry.bookmaker, outcome_label(entry), entry.decimal_odds,
+                entry.event_name, reason,
+            ),
+            'outliers',
+        )
+    return kept, rejected
@@ -0,0 +1,160 @@
+"""
+Machine-readable output (--output jsonl|csv).
+
+Records are written to stdout as they are produced: each scraper's quotes
+as soon as it returns, then the scan's opportunities. Log messages go to
+stderr in this mode, so stdout holds nothing but records. Nothing here
+imports rich, display.py or plyer.
+
+JSON Lines, one object per line, discriminated by "type":
+
+    {"type": "quote", "scan": 1, "ts": ..., "bookmaker_id": ..., "decimal_odds": ..., ...}
+    {"type": "opportunity", "scan": 1, "ts": ..., "profit_pct": ..., "legs": [...], ...}
+    {"type": "scan", "scan": 1, "ts": ..., "seconds": ..., "quotes": ..., "opportunities": ...}
+
+CSV, one header row then one row per quote and one per opportunity leg
+(legs of one opportunity share its "opportunity" number); see CSV_COLUMNS.
+"""
+import csv
+import json
+import os
+import sys
+from typing import IO, List, Optional
+
+from arbitrage import ArbitrageOpportunity, OddsEntry
+
+OUTPUT_FORMATS = ('jsonl', 'csv')
+
+CSV_COLUMNS = (
+    'record', 'scan', 'ts', 'opportunity', 'sport', 'event_id', 'event_name',
+    'commence_time', 'market', 'line', 'outcome', 'bookmaker_id', 'bookmaker',
+    'decimal_odds', 'stake', 'profit_pct', 'profit', 'url',
+)
+
+
+def opportunity_to_dict(opp: ArbitrageOpportunity) -> dict:
+    """JSON-ready view of an opportunity, one leg per outcome."""
+    first = next(iter(opp.best_offers.values()))
+    return {
+        'event_id': first.event_id,
+        'event_name': opp.event_name,
+        'sport': opp.sport,
+        'commence_time': opp.commence_time,
+        'market': opp.market,
+        'line': opp.line,
+        'profit_pct': opp.profit_pct,
+        'profit': opp.profit,
+        'total_stake': opp.total_stake,
+        'survival': opp.survival,
+        'legs': [
+            {
+                'outcome': outcome,
+                'bookmaker': e.bookmaker,
+                'bookmaker_id': e.bookmaker_id,
+                'line': e.line,
+                'decimal_odds': e.decimal_odds,
+                'stake': opp.stakes.get(outcome),
+                'url': e.url,
+            }
+            for outcome, e in opp.best_offers.items()
+        ],
+    }
+
+
+class RecordWriter:
+    """Base class: tracks the scan and stops quietly when the reader goes away."""
+
+    def __init__(self, stream: Optional[IO[str]] = None):
+        self.stream = stream or sys.stdout
+        self.closed = False
+        self.scan = 0
+        self.ts = 0.0
+
+    def begin_scan(self, scan: int, ts: float) -> None:
+        self.scan, self.ts = scan, ts
+
+    def write_quotes(self, entries: List[OddsEntry]) -> None:
+        self._guard(self._quotes, entries)
+
+    def write_opportunities(self, opportunities: List[ArbitrageOpportunity]) -> None:
+        self._guard(self._opportunities, opportunities)
+
+    def end_scan(self, seconds: float, quotes: int, opportunities: int) -> None:
+        self._guard(self._end_scan, seconds, quotes, opportunities)
+        self._guard(self.stream.flush)
+
+    def _guard(self, write, *args) -> None:
+        if self.closed:
+            return
+        try:
+            write(*args)
+        except BrokenPipeError:
+            # `... | head` closed the pipe: stop writing, let the caller exit.
+            # Point the descriptor at devnull so the flush at interpreter exit
+            # does not raise again.
+            self.closed = True
+            try:
+                os.dup2(os.open(os.devnull, os.O_WRONLY), self.stream.fileno())
+            except (AttributeError, OSError, ValueError):
+                pass
+
+    def _quotes(self, entries):
+        raise NotImplementedError
+
+    def _opportunities(self, opportunities):
+        raise NotImplementedError
+
+    def _end_scan(self, seconds, quotes, opportunities):
+        pass
+
+
+class JsonlWriter(RecordWriter):
+    def _write(self, record: dict) -> None:
+        self.stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def _quotes(self, entries):
+        head = {'type': 'quote', 'scan': self.scan, 'ts': self.ts}
+        self.stream.write(''.join(
+            json.dumps({**head, **vars(e)}, separators=(',', ':')) + '\n' for e in entries
+        ))
+
+    def _opportunities(self, opportunities):
+        for opp in opportunities:
+            self._write({'type': 'opportunity', 'scan': self.scan, 'ts': self.ts,
+                         **opportunity_to_dict(opp)})
+
+    def _end_scan(self, seconds, quotes, opportunities):
+        self._write({'type': 'scan', 'scan': self.scan, 'ts': self.ts,
+                     'seconds': round(seconds, 3), 'quotes': quotes,
+                     'opportunities': opportunities})
+
+
+class CsvWriter(RecordWriter):
+    def __init__(self, stream: Optional[IO[str]] = None):
+        super().__init__(stream)
+        self._csv = csv.writer(self.stream, lineterminator='\n')
+        self._opportunity = 0
+        self._guard(self._csv.writerow, CSV_COLUMNS)
+
+    def _quotes(self, entries):
+        self._csv.writerows(
+            ('quote', self.scan, self.ts, '', e.sport, e.event_id, e.event_name,
+             e.commence_time, e.market, e.line, e.outcome, e.bookmaker_id, e.bookmaker,
+             e.decimal_odds, '', '', '', e.url)
+            for e in entries
+        )
+
+    def _opportunities(self, opportunities):
+        for opp in opportunities:
+            self._opportunity += 1
+            self._csv.writerows(
+                ('opportunity', self.scan, self.ts, self._opportunity, opp.sport,
+                 e.event_id, opp.event_name, opp.commence_time, opp.market, e.line, outcome,
+                 e.bookmaker_id, e.bookmaker, e.decimal_odds, opp.stakes.get(outcome),
+                 opp.profit_pct, opp.profit, e.url)
+                for outcome, e in opp.best_offers.items()
+            )
+
+
+def open_writer(fmt: str, stream: Optional[IO[str]] = None) -> RecordWriter:
+    return {'jsonl': JsonlWriter, 'csv': CsvWriter}[fmt](stream)
@@ -0,0 +1,258 @@
+"""
+Sampling profiler for the scan pipeline (--profile).
+
+    python main.py --profile 3 --amount 250                  # three live scans
+    python main.py --replay scan.rec.gz --profile 5          # reproducible (see recording.py)
+
+A background thread takes the Python stack of every other thread every
+PROFILE_INTERVAL seconds, for the scans being profiled. That is wall-clock
+time: a scraper thread waiting on a socket or in its politeness delay is
+sampled as well. Nothing is instrumented, and the cost is one stack walk per
+thread per sample.
+
+Every sample is assigned to a stage, by the innermost frame of the scanner's
+own code on its stack:
+
+    fetch     BaseScraper._get: requests, connections, sleeps, retries
+    parse     get_soup / get_json and the scrapers' own code turning payloads
+              into OddsEntry objects
+    match     group_odds, bad-price filtering, snapshot diffs, the watchlist
+    detect    scan_for_arbitrage, value bets, middles
+    render    display.py (dashboard, --live thread) and --output writers
+    other     the rest of the scanner's code (bookkeeping, history, ...)
+    idle      threads with none of the scanner's code on their stack, and the
+              main thread waiting for the scrapers
+
+Two files are written with the output prefix PREFIX:
+
+    PREFIX.collapsed   one 'stage;outer;...;inner count' line per distinct
+                       stack, for flamegraph.pl, speedscope or inferno
+    PREFIX.txt         seconds per stage and the top functions of each stage,
+                       also printed when the profile ends
+"""
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import PROFILE_INTERVAL, PROFILE_TOP
+from message import message
+
+STAGES = ('fetch', 'parse', 'match', 'detect', 'render', 'other', 'idle')
+
+_ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# Scanner file -> stage of all its functions, or {function name: stage}.
+# Names are bare (co_name): co_qualname only exists from Python 3.11.
+# Functions not listed (or files not listed) do not decide the stage: the
+# search continues outwards, and ends at 'other'.
+_STAGE_RULES = {
+    'scrapers/base_scraper.py': {'_get': 'fetch', 'get_soup': 'parse', 'get_json': 'parse'},
+    'timings.py': 'fetch',
+    'recording.py': 'fetch',
+    'collectors.py': 'fetch',
+    'nodes.py': 'fetch',
+    'wire.py': 'fetch',
+    'arbitrage.py': {'group_odds': 'match', 'scan_for_arbitrage': 'detect',
+                     'find_arbitrage': 'detect'},
+    'outliers.py': 'match',
+    'snapshots.py': 'match',
+    'watchlist.py': 'match',
+    'value_bets.py': 'detect',
+    'middles.py': 'detect',
+    'display.py': 'render',
+    'output.py': 'render',
+    'scan.py': {'collect_odds_parallel': 'idle'},
+}
+
+_SELF = ('profiling.py',)
+
+
+class StackSampler:
+    """Counts the stacks of all other threads every interval seconds."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.elapsed = 0.0
+        self.threads = set()
+        self._stacks: Counter = Counter()    # tuple of code objects (innermost first) -> samples
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'StackSampler':
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        stacks = self._stacks
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                stacks[tuple(codes)] += 1
+                self.threads.add(ident)
+            self.samples += 1
+
+    @property
+    def seconds_per_sample(self) -> float:
+        """Measured time between samples (the sampler runs late when the GIL is busy)."""
+        return self.elapsed / self.samples if self.samples else self.interval
+
+    def profile(self) -> 'Profile':
+        return Profile(self._stacks, self.seconds_per_sample, self.samples, self.elapsed,
+                       len(self.threads))
+
+
+class Profile:
+    """Sampled stacks labelled with function names and stages."""
+
+    def __init__(self, stacks: Dict[tuple, int], seconds_per_sample: float, samples: int,
+                 elapsed: float, threads: int):
+        self.seconds_per_sample = seconds_per_sample
+        self.samples = samples
+        self.elapsed = elapsed
+        self.threads = threads
+        self._labels: Dict[object, Tuple[str, Optional[str], str]] = {}
+        # (stage, labels innermost first) -> samples
+        self.stacks: Counter = Counter()
+        for codes, count in stacks.items():
+            labelled = [self._label(c) for c in codes]
+            self.stacks[(_stage(labelled), tuple(label for label, _, _ in labelled))] += count
+
+    def _label(self, code) -> Tuple[str, Optional[str], str]:
+        """(frame label, scanner file or None, function name), cached per code."""
+        cached = self._labels.get(code)
+        if cached is None:
+            name = getattr(code, 'co_qualname', code.co_name)
+            path = code.co_filename
+            own = path.startswith(_ROOT) and 'site-packages' not in path
+            if own:
+                short = path[len(_ROOT):].replace(os.sep, '/')
+            elif 'site-packages' in path:
+                short = path.split('site-packages' + os.sep, 1)[1].replace(os.sep, '/')
+            else:
+                head, short = os.path.split(path)
+                if short == '__init__.py':
+                    short = os.path.basename(head) + '/' + short
+            label = '{} ({})'.format(name, short).replace(';', ':')
+            cached = self._labels[code] = (label, short if own else None, code.co_name)
+        return cached
+
+    def stage_seconds(self) -> Dict[str, float]:
+        totals = Counter()
+        for (stage, _), count in self.stacks.items():
+            totals[stage] += count
+        return {s: totals[s] * self.seconds_per_sample for s in STAGES}
+
+    def top_functions(self, stage: str, n: int = PROFILE_TOP) -> List[Tuple[str, float, float]]:
+        """(function, self seconds, total seconds) of one stage, by self time."""
+        own, total = Counter(), Counter()
+        for (s, labels), count in self.stacks.items():
+            if s != stage or not labels:
+                continue
+            own[labels[0]] += count
+            for label in set(labels):
+                total[label] += count
+        sps = self.seconds_per_sample
+        return [(label, count * sps, total[label] * sps) for label, count in own.most_common(n)]
+
+    def collapsed_lines(self) -> List[str]:
+        lines = []
+        for (stage, labels), count in sorted(self.stacks.items()):
+            lines.append('{};{} {}'.format(stage, ';'.join(reversed(labels)), count))
+        return lines
+
+    def format_report(self, n: int = PROFILE_TOP) -> str:
+        seconds = self.stage_seconds()
+        busy = sum(v for s, v in seconds.items() if s != 'idle') or 1.0
+        lines = [
+            'Profile: {:.1f}s, {} samples every {:.1f}ms across {} threads'.format(
+                self.elapsed, self.samples, 1e3 * self.seconds_per_sample, self.threads),
+            'Thread-seconds by stage (share of non-idle time):',
+        ]
+        for stage in STAGES:
+            share = '' if stage == 'idle' else '{:6.1f}%'.format(100.0 * seconds[stage] / busy)
+            lines.append('  {:<7} {:9.2f}s {}'.format(stage, seconds[stage], share))
+        for stage in STAGES[:-1]:
+            top = self.top_functions(stage, n)
+            if not top:
+                continue
+            lines.append('')
+            lines.append('{} — top functions by self time (self s / total s):'.format(stage))
+            for label, own, total in top:
+                lines.append('  {:8.2f} {:8.2f}  {}'.format(own, total, label))
+        return '\n'.join(lines)
+
+
+def _stage(labelled: list) -> str:
+    """Stage of one stack: the innermost scanner frame with a rule decides."""
+    seen_own = False
+    for _, short, name in labelled:
+        if short is None or short in _SELF:
+            continue
+        seen_own = True
+        rule = _STAGE_RULES.get(short)
+        if rule is None and short.startswith('scrapers/'):
+            return 'parse'
+        if isinstance(rule, dict):
+            rule = rule.get(name)
+        if rule is not None:
+            return rule
+    return 'other' if seen_own else 'idle'
+
+
+# ---------------------------------------------------------------------------
+# --profile
+# ---------------------------------------------------------------------------
+
+_active: Optional[Tuple[StackSampler, str]] = None
+
+
+def start(prefix: str, interval: float = PROFILE_INTERVAL) -> StackSampler:
+    """Start sampling; stop() (also run at exit) writes PREFIX.collapsed and PREFIX.txt."""
+    global _active
+    sampler = StackSampler(interval).start()
+    _active = (sampler, prefix)
+    atexit.register(stop)
+    return sampler
+
+
+def stop() -> Optional[Profile]:
+    """Stop sampling, write the profile files and print the report."""
+    global _active
+    if _active is None:
+        return None
+    sampler, prefix = _active
+    _active = None
+    sampler.stop()
+    profile = sampler.profile()
+    report = profile.format_report()
+    try:
+        with open(prefix + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(profile.collapsed_lines()) + '\n')
+        with open(prefix + '.txt', 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+    except OSError as e:
+        message.log_error('Could not write profile {}.*: {}'.format(prefix, e), 'profile')
+    print('\n' + report, file=message.console or sys.stdout)
+    message.log_result(
+        'Profile written to {0}.collapsed (flamegraph) and {0}.txt'.format(prefix), 'profile'
+    )
+    return profile
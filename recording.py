@@ -0,0 +1,166 @@
+"""
+Record the scrapers' HTTP responses and replay them instead of the live sites.
+
+    python main.py --record scan.rec.gz --amount 250        # live scan, responses saved
+    python main.py --replay scan.rec.gz --amount 250        # the same scan, no network
+    python main.py --replay scan.rec.gz --profile 5         # reproducible profile
+
+A recording is a gzipped JSON Lines file with one response per line:
+method, URL (with RECORD_REDACT_PARAMS such as apiKey removed), status,
+headers and body. Everything a scraper fetches goes through its session, so
+HttpRecorder only adds a response hook to each scraper session.
+
+In replay every scraper session is served by ReplayAdapter. Responses to
+the same URL come back in the order they were recorded, so a recording of
+several watch-mode scans replays scan by scan; once they run out the last
+one repeats. A URL that was never recorded gets a 404. The politeness delay
+is dropped. A replayed scan runs the scrapers' real parsing code, and
+everything after it, on the same bytes every time.
+"""
+import atexit
+import base64
+import gzip
+import json
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import RECORD_REDACT_PARAMS
+from message import message
+
+# The recorded body is already decoded, and its length is known
+_DROP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+
+def recording_key(method: str, url: str) -> str:
+    """'GET url' with redacted query parameters removed, so no key is saved."""
+    parts = urlsplit(url)
+    if parts.query:
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if k not in RECORD_REDACT_PARAMS]
+        parts = parts._replace(query=urlencode(query))
+    return '{} {}'.format(method.upper(), urlunsplit(parts))
+
+
+class HttpRecorder:
+    """Appends every response of the attached sessions to a recording file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses = 0
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def attach(self, session) -> None:
+        session.hooks['response'].append(self._on_response)
+
+    def _on_response(self, resp, *args, **kwargs):
+        record = {
+            'key': recording_key(resp.request.method, resp.request.url),
+            'status': resp.status_code,
+            'reason': resp.reason,
+            'headers': {k: v for k, v in resp.headers.items()
+                        if k.lower() not in _DROP_HEADERS},
+        }
+        body = resp.content
+        try:
+            record['text'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            record['b64'] = base64.b64encode(body).decode('ascii')
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self.responses += 1
+        return resp
+
+    def close(self) -> None:
+        """Finish the file (also run at exit)."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+        message.log_debug(
+            'Recorded {} responses to {}'.format(self.responses, self.path), 'recording'
+        )
+
+
+class Recording:
+    """Recorded responses by request, each served in recorded order."""
+
+    def __init__(self, responses: Dict[str, List[dict]]):
+        self._responses = responses
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._responses.values())
+
+    def next(self, method: str, url: str) -> Tuple[str, dict]:
+        """(key, record) of the next response for this request; record is None if absent."""
+        key = recording_key(method, url)
+        records = self._responses.get(key)
+        if not records:
+            return key, None
+        with self._lock:
+            i = self._served[key]
+            self._served[key] = i + 1
+        return key, records[min(i, len(records) - 1)]
+
+
+def load_recording(path: str) -> Recording:
+    responses: Dict[str, List[dict]] = defaultdict(list)
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            responses[record['key']].append(record)
+    return Recording(dict(responses))
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests adapter answering from a Recording instead of the network."""
+
+    def __init__(self, recording: Recording):
+        super().__init__()
+        self.recording = recording
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key, record = self.recording.next(request.method, request.url)
+        resp = Response()
+        resp.request = request
+        resp.url = request.url
+        resp.connection = self
+        if record is None:
+            message.log_debug('Not in the recording: {}'.format(key), 'recording')
+            resp.status_code, resp.reason = 404, 'Not Recorded'
+            resp._content = b''
+        else:
+            resp.status_code, resp.reason = record['status'], record.get('reason')
+            resp.headers = CaseInsensitiveDict(record['headers'])
+            if 'text' in record:
+                resp._content = record['text'].encode('utf-8')
+            else:
+                resp._content = base64.b64decode(record['b64'])
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content_consumed = True
+        return resp
+
+    def close(self):
+        pass
+
+
+def install_replay(scrapers: list, recording: Recording) -> None:
+    """Serve every scraper from the recording, without request delays."""
+    adapter = ReplayAdapter(recording)
+    for scraper in scrapers:
+        scraper.session.mount('http://', adapter)
+        scraper.session.mount('https://', adapter)
+        scraper.delay = 0.0
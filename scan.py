@@ -0,0 +1,126 @@
+"""
+Running the scrapers for one scan: shared by the watch loop (main.py),
+collector worker processes (collectors.py) and collector nodes (nodes.py).
+
+run_scraper() runs one scraper and records its ScraperTiming and trace
+spans; collect_odds_parallel() runs a list of them in a thread pool.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tracing
+from config import ODDS_API_KEY
+from message import message
+from timings import ScraperTiming
+
+
+# ---------------------------------------------------------------------------
+# Scraper construction
+# ---------------------------------------------------------------------------
+
+def build_scrapers(use_api: bool):
+    """Instantiate all scrapers. Imports are deferred to keep startup fast."""
+    scrapers = []
+
+    # Primary: The Odds API (covers DraftKings, FanDuel, BetMGM, PointsBet, BetRivers)
+    if use_api:
+        if not ODDS_API_KEY:
+            message.log_warning(
+                'ODDS_API_KEY not set. Set it via the environment variable for '
+                'best coverage of DraftKings, FanDuel, BetMGM, PointsBet, BetRivers.',
+                'main',
+            )
+        from scrapers.odds_api import OddsAPIScraper
+        scrapers.append(OddsAPIScraper())
+
+    # Secondary: OddsChecker (covers Bet365, Sports Interaction, Betway, Bodog, top-10)
+    from scrapers.oddschecker import OddsCheckerScraper
+    scrapers.append(OddsCheckerScraper())
+
+    # Direct site scrapers (supplement OddsChecker; gracefully return [] if blocked)
+    from scrapers.sports_interaction import SportsInteractionScraper
+    from scrapers.bodog import BodogScraper
+    from scrapers.thescore import TheScoreScraper
+    from scrapers.betway import BetwayScraper
+    from scrapers.betrivers import BetRiversScraper
+    from scrapers.bet365 import Bet365Scraper
+    from scrapers.draftkings import DraftKingsScraper
+    from scrapers.fanduel import FanDuelScraper
+    from scrapers.betmgm import BetMGMScraper
+    from scrapers.pointsbet import PointsBetScraper
+
+    scrapers += [
+        SportsInteractionScraper(),
+        BodogScraper(),
+        TheScoreScraper(),
+        BetwayScraper(),
+        BetRiversScraper(),
+        Bet365Scraper(),
+        DraftKingsScraper(),
+        FanDuelScraper(),
+        BetMGMScraper(),
+        PointsBetScraper(),
+    ]
+    return scrapers
+
+
+# ---------------------------------------------------------------------------
+# Parallel odds collection
+# ---------------------------------------------------------------------------
+
+def run_scraper(scraper, sport_keys, submitted=None):
+    """
+    Worker: run one scraper and return (name, entries, error, timing).
+    submitted is the perf_counter() time the run was queued, for the trace.
+    """
+    timing = scraper.timing = ScraperTiming(scraper.name)
+    started = time.perf_counter()
+    if submitted is not None:
+        tracing.complete('queued', submitted, started, 'scraper')
+    try:
+        with tracing.span(scraper.name, 'scraper'):
+            entries = scraper.get_odds(sport_keys)
+        timing.entries = len(entries)
+        return scraper.name, entries, None, timing
+    except Exception as exc:
+        timing.error = '{}: {}'.format(type(exc).__name__, exc)
+        return scraper.name, [], exc, timing
+    finally:
+        timing.wall = time.perf_counter() - started
+
+
+def collect_odds_parallel(scrapers, sport_keys, on_entries=None, timings=None):
+    """
+    Run all scrapers concurrently in a thread pool.
+    Returns all OddsEntry objects combined.
+
+    Using threads (not asyncio) because the scrapers use the blocking
+    `requests` library. All scrapers fire at the same time — 5-10x faster
+    than sequential collection.
+
+    on_entries, if given, is called (in the calling thread) with each
+    scraper's entries as soon as that scraper finishes. If a timings list
+    is given, each scraper's ScraperTiming for this scan is appended to it.
+    """
+    all_odds = []
+    with ThreadPoolExecutor(max_workers=len(scrapers)) as pool:
+        futures = {
+            pool.submit(run_scraper, scraper, sport_keys, time.perf_counter()): scraper.name
+            for scraper in scrapers
+        }
+        for future in as_completed(futures):
+            name, entries, error, timing = future.result()
+            if timings is not None:
+                timings.append(timing)
+            if error:
+                message.log_error(
+                    'Scraper {} raised: {}'.format(name, error), 'main'
+                )
+            else:
+                message.log_debug(
+                    '{} returned {} entries'.format(name, len(entries)), 'main'
+                )
+                all_odds.extend(entries)
+                if on_entries is not None:
+                    on_entries(entries)
+    return all_odds
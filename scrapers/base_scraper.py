@@ -1,7 +1,9 @@
 """
 Abstract base class for all betting site scrapers.
-Provides shared HTTP utilities, rate limiting, and retry logic.
+Provides shared HTTP utilities, rate limiting, retry logic, and helpers for
+recognising spread / total markets in site payloads.
 """
+import re
 import time
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
@@ -9,9 +11,60 @@ from typing import Dict, List, Optional
 import requests
 from bs4 import BeautifulSoup
 
-from arbitrage import OddsEntry
+import tracing
+from arbitrage import MARKET_MONEYLINE, MARKET_SPREAD, MARKET_TOTAL, OddsEntry
 from config import DEFAULT_HEADERS, REQUEST_DELAY, MAX_RETRIES, REQUEST_TIMEOUT
 from message import message
+from timings import ScraperTiming, instrument_session
+
+
+# ---------------------------------------------------------------------------
+# Market helpers
+# ---------------------------------------------------------------------------
+
+_SPREAD_KEYWORDS = ('SPREAD', 'HANDICAP', 'PUCK LINE', 'RUN LINE', 'GOAL LINE')
+_TOTAL_KEYWORDS = ('TOTAL', 'OVER/UNDER', 'OVER / UNDER')
+# Period, half and team markets share labels with full-game lines but are
+# different bets; only full-game spreads and totals are extracted.
+_PARTIAL_KEYWORDS = (
+    '1ST', '2ND', '3RD', '4TH', 'HALF', 'QUARTER', 'PERIOD', 'INNING', 'TEAM',
+)
+_LINE_RE = re.compile(r'([+-]?\d+(?:\.\d+)?)\s*$')
+
+
+def classify_market(label: str, moneyline_keywords) -> Optional[str]:
+    """
+    Map a site's market label to MARKET_MONEYLINE / MARKET_SPREAD /
+    MARKET_TOTAL, or None for markets we do not scan.
+    moneyline_keywords are the site-specific labels of its moneyline market.
+    """
+    upper = label.upper()
+    if not any(k in upper for k in _PARTIAL_KEYWORDS):
+        if any(k in upper for k in _SPREAD_KEYWORDS):
+            return MARKET_SPREAD
+        if any(k in upper for k in _TOTAL_KEYWORDS):
+            return MARKET_TOTAL
+    if any(k in upper for k in moneyline_keywords):
+        return MARKET_MONEYLINE
+    return None
+
+
+def parse_line(value) -> Optional[float]:
+    """Parse a line such as -1.5, '+1.5', 'o6.5' or 'Over 6.5'; None if absent."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _LINE_RE.search(str(value).strip())
+    return float(match.group(1)) if match else None
+
+
+def split_outcome_line(name: str):
+    """Split 'Maple Leafs -1.5' / 'Over 6.5' into ('Maple Leafs', -1.5)."""
+    match = _LINE_RE.search(name.strip())
+    if not match:
+        return name, None
+    return name[:match.start()].strip(), float(match.group(1))
 
 
 class BaseScraper(ABC):
@@ -29,26 +82,49 @@ class BaseScraper(ABC):
         self.delay = delay
         self.session = requests.Session()
         self.session.headers.update(headers or DEFAULT_HEADERS)
+        instrument_session(self.session)
+        self.timing = ScraperTiming(name)     # replaced at the start of every scan
 
     # ------------------------------------------------------------------
     # HTTP helpers
     # ------------------------------------------------------------------
 
     def _get(self, url: str, params: Optional[dict] = None) -> Optional[requests.Response]:
-        """GET a URL with retry logic and rate limiting."""
-        time.sleep(self.delay)
+        """GET a URL with retry logic and rate limiting; timed into self.timing."""
+        timing = self.timing
+        with tracing.span('sleep', 'sleep'):
+            time.sleep(self.delay)
+        timing.sleep += self.delay
         for attempt in range(1, MAX_RETRIES + 1):
+            request = timing.begin_request()
+            started = time.perf_counter()
             try:
                 resp = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
                 resp.raise_for_status()
+                timing.end_request(request, started, resp)
+                if tracing.enabled:
+                    tracing.complete('GET', started, time.perf_counter(), 'http', {
+                        'url': resp.url, 'attempt': attempt, 'status': resp.status_code,
+                        'bytes': len(resp.content),
+                    })
                 return resp
             except requests.RequestException as exc:
+                timing.end_request(request, started)
+                if tracing.enabled:
+                    status = exc.response.status_code if exc.response is not None else None
+                    tracing.complete('GET', started, time.perf_counter(), 'http', {
+                        'url': url, 'attempt': attempt, 'status': status,
+                        'error': type(exc).__name__,
+                    })
                 message.log_warning(
                     "Attempt {}/{} failed for {}: {}".format(attempt, MAX_RETRIES, url, exc),
                     self.name,
                 )
                 if attempt < MAX_RETRIES:
-                    time.sleep(self.delay * attempt)
+                    timing.retries += 1
+                    with tracing.span('backoff', 'sleep'):
+                        time.sleep(self.delay * attempt)
+                    timing.sleep += self.delay * attempt
         message.log_error("All retries exhausted for: {}".format(url), self.name)
         return None
 
@@ -57,18 +133,28 @@ class BaseScraper(ABC):
         resp = self._get(url, params)
         if resp is None:
             return None
-        return BeautifulSoup(resp.text, 'html.parser')
+        started = time.perf_counter()
+        soup = BeautifulSoup(resp.text, 'html.parser')
+        ended = time.perf_counter()
+        self.timing.parse += ended - started
+        tracing.complete('parse html', started, ended, 'parse')
+        return soup
 
     def get_json(self, url: str, params: Optional[dict] = None) -> Optional[dict]:
         """Fetch a URL and return parsed JSON."""
         resp = self._get(url, params)
         if resp is None:
             return None
+        started = time.perf_counter()
         try:
             return resp.json()
         except ValueError as exc:
             message.log_error("JSON parse error for {}: {}".format(url, exc), self.name)
             return None
+        finally:
+            ended = time.perf_counter()
+            self.timing.parse += ended - started
+            tracing.complete('parse json', started, ended, 'parse')
 
     # ------------------------------------------------------------------
     # Interface every scraper must implement
@@ -13,6 +13,7 @@ gracefully to an empty list, so the rest of the scrapers keep running.
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -82,7 +83,8 @@ class Bet365Scraper(BaseScraper):
         all_entries: List[OddsEntry] = []
         for label in sport_labels:
             message.log_debug("Probing Bet365 for {}…".format(label), self.name)
-            entries = self._fetch_sport(label)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label)
             all_entries.extend(entries)
 
         if not all_entries:
@@ -3,14 +3,16 @@ BetMGM scraper  —  https://sports.on.betmgm.ca  (Ontario)
 BetMGM is licensed in Ontario with expansion to other Canadian provinces.
 
 BetMGM uses the Roar Digital (Entain) platform. Their public API returns
-event/market data in JSON format.
+event/market data in JSON format. Each fixture carries its moneyline, spread
+and total offers; all three are extracted from the same response.
 """
 from typing import List, Optional
 
-from arbitrage import OddsEntry
+import tracing
+from arbitrage import MARKET_MONEYLINE, MARKET_TOTAL, OddsEntry
 from config import SPORTS
 from message import message
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BaseScraper, classify_market, parse_line, split_outcome_line
 
 
 _BETMGM_BASE = 'https://sports.on.betmgm.ca'
@@ -27,7 +29,7 @@ _BETMGM_SPORT_IDS = {
 
 
 class BetMGMScraper(BaseScraper):
-    """Scrapes moneyline odds from BetMGM Canada."""
+    """Scrapes moneyline, spread and total odds from BetMGM Canada."""
 
     def __init__(self):
         super().__init__(
@@ -64,7 +66,8 @@ class BetMGMScraper(BaseScraper):
             if not sport_id:
                 continue
             message.log_debug("Fetching {} from BetMGM…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_id)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_id)
             all_entries.extend(entries)
         return all_entries
 
@@ -123,11 +126,26 @@ class BetMGMScraper(BaseScraper):
                     if offer_category.get('offerGroups') else []:
                 market_name = offer.get('name', {}).get('value', '') if isinstance(
                     offer.get('name'), dict) else offer.get('name', '')
-                if not any(k in market_name.upper() for k in ('MONEYLINE', 'WINNER', 'MATCH')):
+                market = classify_market(
+                    market_name, ('MONEYLINE', 'MONEY LINE', 'WINNER', 'MATCH')
+                )
+                if market is None:
                     continue
                 for outcome in offer.get('outcomes', []):
                     name_obj = outcome.get('name', {})
-                    name = name_obj.get('value', '') if isinstance(name_obj, dict) else str(name_obj)
+                    name = (name_obj.get('value', '') if isinstance(name_obj, dict)
+                            else str(name_obj))
+                    line = None
+                    if market != MARKET_MONEYLINE:
+                        # Line is in 'attr' ("-1.5") or appended to the name ("Over 6.5")
+                        name, name_line = split_outcome_line(name)
+                        line = parse_line(outcome.get('attr'))
+                        if line is None:
+                            line = name_line
+                        if line is None:
+                            continue
+                        if market == MARKET_TOTAL:
+                            line = abs(line)
                     price = outcome.get('odds', {})
                     if isinstance(price, dict):
                         decimal = price.get('decimal', price.get('dec'))
@@ -148,5 +166,7 @@ class BetMGMScraper(BaseScraper):
                             outcome=name,
                             decimal_odds=decimal,
                             url=_BETMGM_BASE + '/en/sports',
+                            market=market,
+                            line=line,
                         ))
         return entries
@@ -3,13 +3,16 @@ BetRivers scraper  —  https://on.betrivers.com  (Ontario)
 BetRivers (Rush Street Gaming) is licensed in Ontario, Alberta, and more.
 
 BetRivers uses the SBTech platform, which exposes a clean REST API.
+Kambi bet offers include handicap and over/under lines next to the moneyline;
+all three are extracted from the same response.
 """
 from typing import List, Optional
 
-from arbitrage import OddsEntry
+import tracing
+from arbitrage import MARKET_MONEYLINE, OddsEntry
 from config import SPORTS
 from message import message
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BaseScraper, classify_market
 
 
 _BETRIVERS_BASE = 'https://on.betrivers.com'
@@ -37,7 +40,7 @@ _BETRIVERS_LEAGUE_IDS = {
 
 
 class BetRiversScraper(BaseScraper):
-    """Scrapes moneyline odds from BetRivers Canada (Ontario)."""
+    """Scrapes moneyline, spread and total odds from BetRivers Canada (Ontario)."""
 
     def __init__(self):
         super().__init__(
@@ -74,7 +77,8 @@ class BetRiversScraper(BaseScraper):
             if not sport_code:
                 continue
             message.log_debug("Fetching {} from BetRivers…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_code, league_id)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_code, league_id)
             all_entries.extend(entries)
         return all_entries
 
@@ -124,10 +128,19 @@ class BetRiversScraper(BaseScraper):
         for betoffer in event.get('betOffers', []):
             criterion = betoffer.get('criterion', {})
             label = criterion.get('label', betoffer.get('betOfferType', {}).get('name', ''))
-            if 'Full Time' not in label and 'Moneyline' not in label and 'Winner' not in label:
+            market = classify_market(label, ('FULL TIME', 'MONEYLINE', 'WINNER'))
+            if market is None:
                 continue
             for outcome in betoffer.get('outcomes', []):
                 label_out = outcome.get('label', outcome.get('englishLabel', ''))
+                line = None
+                if market != MARKET_MONEYLINE:
+                    # Kambi stores lines ×1000 like odds; handicaps name the team
+                    # in 'participant' and totals use 'Over' / 'Under' labels
+                    if not isinstance(outcome.get('line'), (int, float)):
+                        continue
+                    line = outcome['line'] / 1000.0
+                    label_out = outcome.get('participant', label_out)
                 # Kambi stores decimal odds as integer × 1000 (milliodds)
                 odds_raw = outcome.get('odds', outcome.get('decimalOdds', 0))
                 if isinstance(odds_raw, (int, float)) and odds_raw > 0:
@@ -143,5 +156,7 @@ class BetRiversScraper(BaseScraper):
                             outcome=label_out,
                             decimal_odds=round(decimal, 4),
                             url=_BETRIVERS_BASE + '/#/sports/event/' + event_id,
+                            market=market,
+                            line=line,
                         ))
         return entries
@@ -7,6 +7,7 @@ We target the public JSON feed used for the pre-match lobby.
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -63,7 +64,8 @@ class BetwayScraper(BaseScraper):
             if not sport_path:
                 continue
             message.log_debug("Fetching {} from Betway…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_path)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_path)
             all_entries.extend(entries)
         return all_entries
 
@@ -7,6 +7,7 @@ Bodog exposes a public JSON API used by their web client:
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -64,7 +65,8 @@ class BodogScraper(BaseScraper):
             if not code:
                 continue
             message.log_debug("Fetching {} from Bodog…".format(label), self.name)
-            entries = self._fetch_sport(label, code)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, code)
             all_entries.extend(entries)
         return all_entries
 
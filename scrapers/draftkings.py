@@ -6,13 +6,17 @@ DraftKings exposes a public odds API used by their web client:
   https://sportsbook.draftkings.com/api/odds/v1/leagues/{leagueId}/offers/gamelines
 Note: odds are also fully covered by The Odds API (use OddsAPIScraper for
 reliability). This direct scraper provides a fallback when no API key is set.
+
+The gamelines payload carries moneyline, spread and total offers together;
+all three are extracted from the same response.
 """
 from typing import List, Optional
 
-from arbitrage import OddsEntry
+import tracing
+from arbitrage import MARKET_MONEYLINE, MARKET_SPREAD, MARKET_TOTAL, OddsEntry
 from config import SPORTS
 from message import message
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BaseScraper, classify_market, parse_line
 
 
 _DK_BASE = 'https://sportsbook.draftkings.com'
@@ -30,7 +34,7 @@ _DK_LEAGUE_IDS = {
 
 
 class DraftKingsScraper(BaseScraper):
-    """Scrapes moneyline odds directly from the DraftKings public API."""
+    """Scrapes moneyline, spread and total odds from the DraftKings public API."""
 
     def __init__(self):
         super().__init__(
@@ -65,7 +69,8 @@ class DraftKingsScraper(BaseScraper):
             if not league_id:
                 continue
             message.log_debug("Fetching {} from DraftKings…".format(label), self.name)
-            entries = self._fetch_league(label, league_id)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_league(label, league_id)
             all_entries.extend(entries)
         return all_entries
 
@@ -86,7 +91,12 @@ class DraftKingsScraper(BaseScraper):
         offers = data.get('offers', [])
         for offer_group in offers:
             for offer in offer_group.get('offers', [offer_group]):
-                if offer.get('label', '').upper() not in ('MONEYLINE', 'GAME LINES', ''):
+                label = offer.get('label', '')
+                market = (
+                    classify_market(label, ('MONEYLINE', 'GAME LINES'))
+                    if label else MARKET_MONEYLINE
+                )
+                if market is None:
                     continue
                 outcomes = offer.get('outcomes', [])
                 # DraftKings wraps event info in a parallel 'eventGroup' structure;
@@ -101,6 +111,10 @@ class DraftKingsScraper(BaseScraper):
                     odds_decimal = outcome.get('oddsDecimal', outcome.get('decimal'))
 
                     decimal = self._to_decimal(odds_decimal, odds_american)
+                    line = parse_line(outcome.get('line'))
+                    outcome_market = self._outcome_market(market, participant, line)
+                    if outcome_market != MARKET_MONEYLINE and line is None:
+                        continue
                     if decimal and decimal > 1.0:
                         entries.append(OddsEntry(
                             bookmaker='DraftKings',
@@ -112,9 +126,20 @@ class DraftKingsScraper(BaseScraper):
                             outcome=participant,
                             decimal_odds=decimal,
                             url=_DK_BASE + '/featured',
+                            market=outcome_market,
+                            line=line if outcome_market != MARKET_MONEYLINE else None,
                         ))
         return entries
 
+    @staticmethod
+    def _outcome_market(market: str, participant: str, line: Optional[float]) -> str:
+        """'Game Lines' offers mix all three markets; tell them apart per outcome."""
+        if market != MARKET_MONEYLINE or line is None:
+            return market
+        if participant.upper() in ('OVER', 'UNDER'):
+            return MARKET_TOTAL
+        return MARKET_SPREAD
+
     @staticmethod
     def _to_decimal(
         decimal_val: Optional[float], american_val: Optional[int]
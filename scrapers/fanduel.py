@@ -7,6 +7,7 @@ direct scraper provides a fallback and may capture additional markets.
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -65,7 +66,8 @@ class FanDuelScraper(BaseScraper):
                 continue
             sport_slug, league_slug = sport_info
             message.log_debug("Fetching {} from FanDuel…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_slug, league_slug)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_slug, league_slug)
             all_entries.extend(entries)
         return all_entries
 
@@ -4,14 +4,19 @@ Free tier: 500 requests/month. Set ODDS_API_KEY in your environment.
 
 Covers these Canadian bookmakers:
   draftkings, fanduel, betmgm, pointsbetus, betrivers
+
+Moneyline, spread and total markets are requested in a single call per sport
+(see ODDS_API_MARKETS).
 """
 from typing import List, Optional
 
-from arbitrage import OddsEntry
+import tracing
+from arbitrage import MARKET_MONEYLINE, OddsEntry
 from config import (
     ODDS_API_KEY,
     ODDS_API_BASE_URL,
     ODDS_API_CANADIAN_BOOKMAKERS,
+    ODDS_API_MARKETS,
     SPORTS,
 )
 from message import message
@@ -48,7 +53,8 @@ class OddsAPIScraper(BaseScraper):
         for sport_key in target_sports:
             sport_label = SPORTS.get(sport_key, sport_key)
             message.log_debug("Fetching {} odds via Odds API…".format(sport_label), self.name)
-            entries = self._fetch_sport(sport_key, sport_label)
+            with tracing.span(sport_label, 'sport'):
+                entries = self._fetch_sport(sport_key, sport_label)
             all_entries.extend(entries)
             message.log_debug(
                 "  {} entries collected for {}".format(len(entries), sport_label), self.name
@@ -65,7 +71,7 @@ class OddsAPIScraper(BaseScraper):
         params = {
             'apiKey': self.api_key,
             'regions': 'us',          # 'us' region includes Canadian operators
-            'markets': 'h2h',         # head-to-head (moneyline) markets
+            'markets': ','.join(ODDS_API_MARKETS),   # h2h, spreads, totals
             'oddsFormat': 'decimal',
             'bookmakers': ','.join(ODDS_API_CANADIAN_BOOKMAKERS),
         }
@@ -91,12 +97,16 @@ class OddsAPIScraper(BaseScraper):
             bm_key = bm.get('key', '')
             bm_title = bm.get('title', bm_key)
             for market in bm.get('markets', []):
-                if market.get('key') != 'h2h':
+                market_type = market.get('key')
+                if market_type not in ODDS_API_MARKETS:
                     continue
                 for outcome in market.get('outcomes', []):
                     price = float(outcome.get('price', 0))
                     if price <= 1.0:
                         continue
+                    point = outcome.get('point')
+                    if market_type != MARKET_MONEYLINE and point is None:
+                        continue
                     entries.append(
                         OddsEntry(
                             bookmaker=bm_title,
@@ -118,6 +128,8 @@ class OddsAPIScraper(BaseScraper):
                                 if 'pointsbetus' in bm_key else
                                 'https://on.betrivers.com'
                             ),
+                            market=market_type,
+                            line=float(point) if point is not None else None,
                         )
                     )
         return entries
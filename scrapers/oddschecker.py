@@ -17,6 +17,7 @@ from typing import Dict, List, Optional
 
 from bs4 import BeautifulSoup
 
+import tracing
 from arbitrage import OddsEntry
 from config import ODDSCHECKER_CANADIAN_BOOKMAKERS, ODDSCHECKER_SPORT_URLS, SPORTS
 from message import message
@@ -58,7 +59,8 @@ class OddsCheckerScraper(BaseScraper):
                 continue
             url = ODDSCHECKER_SPORT_URLS[label]
             message.log_debug("Scanning OddsChecker: {}".format(label), self.name)
-            entries = self._scrape_sport(label, url)
+            with tracing.span(label, 'sport'):
+                entries = self._scrape_sport(label, url)
             all_entries.extend(entries)
             message.log_debug("  {} entries for {}".format(len(entries), label), self.name)
         return all_entries
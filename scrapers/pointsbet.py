@@ -6,6 +6,7 @@ PointsBet exposes a public JSON API used by their web client.
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -75,7 +76,8 @@ class PointsBetScraper(BaseScraper):
             if not sport_slug:
                 continue
             message.log_debug("Fetching {} from PointsBet…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_slug, league_slug)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_slug, league_slug)
             all_entries.extend(entries)
         return all_entries
 
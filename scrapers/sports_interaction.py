@@ -9,6 +9,7 @@ Headers required: X-Platform, X-Brand
 import hashlib
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -67,7 +68,8 @@ class SportsInteractionScraper(BaseScraper):
             if not sid:
                 continue
             message.log_debug("Fetching {} from Sports Interaction…".format(label), self.name)
-            entries = self._fetch_sport(label, sid)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sid)
             all_entries.extend(entries)
         return all_entries
 
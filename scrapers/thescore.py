@@ -7,6 +7,7 @@ at api.bets.thescore.com (same infrastructure as Barstool/ESPN Bet CA).
 """
 from typing import List, Optional
 
+import tracing
 from arbitrage import OddsEntry
 from config import SPORTS
 from message import message
@@ -64,7 +65,8 @@ class TheScoreScraper(BaseScraper):
             if not sport_path:
                 continue
             message.log_debug("Fetching {} from theScore Bet…".format(label), self.name)
-            entries = self._fetch_sport(label, sport_path)
+            with tracing.span(label, 'sport'):
+                entries = self._fetch_sport(label, sport_path)
             all_entries.extend(entries)
         return all_entries
 
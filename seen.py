@@ -0,0 +1,140 @@
+"""
+Bounded, expiring "already alerted" set for watch mode.
+
+A plain set of opportunity keys grows for as long as the session runs and
+never forgets an opportunity that disappeared and came back. SeenSet keeps,
+per key, when it was last observed and when its event starts:
+
+    is new        key unknown, or back after missing a scan, last observed at
+                  least REALERT_AFTER seconds ago
+    expires       not observed for SEEN_TTL seconds, or the event has started
+    bounded       at most SEEN_MAX_ENTRIES keys; least recently observed go first
+
+Every scan calls expire() and then observe() for each opportunity it finds.
+expire() flags the keys the previous scan did not observe as gone, so an
+opportunity that stays up is never re-alerted, however long it lasts and
+however long the scan interval. State is saved as JSON (atomically) so a
+restart does not re-alert everything still open; restored keys count as
+gone, since nothing observed them in between.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from config import REALERT_AFTER, SEEN_MAX_ENTRIES, SEEN_TTL
+from message import message
+
+
+def commence_timestamp(time_str: str) -> Optional[float]:
+    """Parse an ISO-8601 commence time to a UNIX timestamp (None if unparseable)."""
+    if not time_str:
+        return None
+    try:
+        return datetime.fromisoformat(time_str.replace('Z', '+00:00')).timestamp()
+    except (ValueError, TypeError):
+        return None
+
+
+class SeenSet:
+    """Keys already alerted on, with time- and commence-based expiry."""
+
+    def __init__(
+        self,
+        ttl: float = SEEN_TTL,
+        realert_after: float = REALERT_AFTER,
+        max_entries: int = SEEN_MAX_ENTRIES,
+        path: Optional[str] = None,
+    ):
+        self.ttl = ttl
+        self.realert_after = realert_after
+        self.max_entries = max_entries
+        self.path = path
+        # key -> [last_seen, commence_ts or None, gone]; ordered by last_seen
+        self._entries: 'OrderedDict[str, list]' = OrderedDict()
+        self._last_expire: Optional[float] = None   # start of the previous scan
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def observe(self, key: str, commence_time: str = '', now: Optional[float] = None) -> bool:
+        """
+        Record that `key` is up right now.
+        Returns True when it should be alerted: never seen, or back after
+        being gone, with its last observation at least realert_after
+        seconds ago.
+        """
+        now = time.time() if now is None else now
+        record = self._entries.get(key)
+        is_new = record is None or (record[2] and now - record[0] >= self.realert_after)
+        if record is None:
+            self._entries[key] = [now, commence_timestamp(commence_time), False]
+        else:
+            record[0], record[2] = now, False
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return is_new
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Start of a scan: flag keys the previous scan did not observe as
+        gone, then drop keys not observed within ttl and events that have
+        started.
+        """
+        now = time.time() if now is None else now
+        previous, self._last_expire = self._last_expire, now
+        stale = []
+        for key, record in self._entries.items():
+            last_seen, commence, _ = record
+            if now - last_seen >= self.ttl or (commence is not None and commence <= now):
+                stale.append(key)
+            elif previous is not None and last_seen < previous:
+                record[2] = True
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """Restore state from self.path; a missing or corrupt file is ignored."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = sorted(data.get('entries', {}).items(), key=lambda kv: kv[1][0])
+        except (OSError, ValueError, AttributeError, TypeError, IndexError) as e:
+            message.log_warning('Ignoring seen-state file {}: {}'.format(self.path, e), 'seen')
+            return
+        self._entries = OrderedDict(
+            (k, [v[0], v[1], True]) for k, v in entries[-self.max_entries:]
+        )
+        self.expire()
+        message.log_debug(
+            'Restored {} seen opportunities from {}'.format(len(self._entries), self.path), 'seen'
+        )
+
+    def save(self) -> None:
+        """Write state to self.path (via a temp file, so a crash cannot truncate it)."""
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self._entries}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            message.log_warning('Could not save seen-state to {}: {}'.format(self.path, e), 'seen')
@@ -0,0 +1,327 @@
+"""
+Local HTTP/JSON service over the latest scan (--serve).
+
+The watch loop publishes every scan as an immutable ServiceSnapshot; request
+handlers only read the current snapshot reference, so they never wait for
+(or slow down) a scan. Everything a request returns is encoded to JSON when
+the snapshot is built; a request at most filters and joins bytes.
+
+    GET /health                         scanner status and age of the last scan
+    GET /opportunities                  current arbs, best first
+        ?sport=NHL                      only this sport (repeatable)
+        &book=fanduel                   only arbs with a leg at this bookmaker (repeatable)
+        &min_profit=1.5                 only arbs at or above this profit %
+    GET /events                         events in the last scan
+    GET /events/<event_id>/quotes       every quote of one event
+    GET /stream                         server-sent events: each NEW opportunity as it
+                                        is found (same sport/book/min_profit filters)
+
+The stream is fed by the same new-opportunity detection as the desktop
+alerts. broadcast() encodes each opportunity once and enqueues, per
+subscriber, one frame holding just the events that match its filters. Every
+subscriber has its own bounded queue (STREAM_BUFFER scans' worth of frames)
+drained by its connection thread. A subscriber whose queue is full is
+disconnected instead of being waited for, so a slow or stalled client can
+never hold up the scan loop or the other clients.
+
+The server binds to SERVE_HOST (localhost by default) and uses only the
+standard library.
+"""
+import json
+import queue
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from arbitrage import ArbitrageOpportunity, OddsEntry
+from config import (
+    SERVE_HOST, SERVE_PORT, STREAM_BUFFER, STREAM_HEARTBEAT, STREAM_WRITE_TIMEOUT,
+)
+from message import message
+from output import opportunity_to_dict
+
+
+def _encode(obj) -> bytes:
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+@dataclass
+class _EncodedOpportunity:
+    sport: str
+    books: frozenset
+    profit_pct: float
+    body: bytes
+
+    def matches(self, sports, books, min_profit: Optional[float]) -> bool:
+        return (
+            (not sports or self.sport in sports)
+            and (not books or not self.books.isdisjoint(books))
+            and (min_profit is None or self.profit_pct >= min_profit)
+        )
+
+
+def _encode_opportunity(opp: ArbitrageOpportunity) -> _EncodedOpportunity:
+    return _EncodedOpportunity(
+        sport=opp.sport,
+        books=frozenset(e.bookmaker_id for e in opp.best_offers.values()),
+        profit_pct=opp.profit_pct,
+        body=_encode(opportunity_to_dict(opp)),
+    )
+
+
+@dataclass
+class ServiceSnapshot:
+    """Everything the service answers for one scan, pre-encoded."""
+    scan: int
+    ts: float
+    scan_seconds: float
+    quotes: int
+    opportunities: List[_EncodedOpportunity] = field(default_factory=list)
+    all_opportunities: bytes = b'[]'
+    events: bytes = b'[]'
+    event_quotes: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, scan: int, ts: float, scan_seconds: float,
+              all_odds: List[OddsEntry], opportunities: List[ArbitrageOpportunity]):
+        encoded = [_encode_opportunity(o) for o in opportunities]
+        by_event: Dict[str, list] = {}
+        for e in all_odds:
+            by_event.setdefault(e.event_id, []).append(e)
+        events = [
+            {
+                'event_id': event_id,
+                'event_name': entries[0].event_name,
+                'sport': entries[0].sport,
+                'commence_time': entries[0].commence_time,
+                'quotes': len(entries),
+            }
+            for event_id, entries in by_event.items()
+        ]
+        return cls(
+            scan=scan,
+            ts=ts,
+            scan_seconds=scan_seconds,
+            quotes=len(all_odds),
+            opportunities=encoded,
+            all_opportunities=b'[' + b','.join(o.body for o in encoded) + b']',
+            events=_encode(events),
+            event_quotes={k: _encode([vars(e) for e in v]) for k, v in by_event.items()},
+        )
+
+    def select(self, sports=(), books=(), min_profit: Optional[float] = None) -> bytes:
+        """JSON array of the opportunities matching every given filter."""
+        if not sports and not books and min_profit is None:
+            return self.all_opportunities
+        sports, books = set(sports), set(books)
+        return b'[' + b','.join(
+            o.body for o in self.opportunities if o.matches(sports, books, min_profit)
+        ) + b']'
+
+
+class _Subscriber:
+    """One /stream client: its filters and bounded queue of encoded events."""
+
+    def __init__(self, sports, books, min_profit: Optional[float], size: int):
+        self.sports = set(sports)
+        self.books = set(books)
+        self.min_profit = min_profit
+        self.queue: queue.Queue = queue.Queue(maxsize=size)
+        self.dropped = False
+
+
+class OpportunityService:
+    """Threaded HTTP server answering from the latest published snapshot."""
+
+    def __init__(self, host: str = SERVE_HOST, port: int = SERVE_PORT,
+                 scan_interval: Optional[float] = None):
+        self.host = host
+        self.port = port
+        self.scan_interval = scan_interval
+        self.started = time.time()
+        self.snapshot: Optional[ServiceSnapshot] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._event_id = 0
+        self.dropped_subscribers = 0
+
+    def start(self) -> 'OpportunityService':
+        handler = type('Handler', (_Handler,), {'service': self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='opportunity-service', daemon=True
+        )
+        self._thread.start()
+        message.log_debug('Serving on http://{}:{}/'.format(self.host, self.port), 'service')
+        return self
+
+    def publish(self, scan: int, ts: float, scan_seconds: float,
+                all_odds: List[OddsEntry], opportunities: List[ArbitrageOpportunity]) -> None:
+        """Build the snapshot for a finished scan and make it current."""
+        # A single reference swap: handlers see either the old or the new scan
+        self.snapshot = ServiceSnapshot.build(scan, ts, scan_seconds, all_odds, opportunities)
+
+    def broadcast(self, opportunities: List[ArbitrageOpportunity]) -> None:
+        """Push newly found opportunities to every matching /stream subscriber."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers or not opportunities:
+            return
+        frames = []
+        for opp in opportunities:
+            self._event_id += 1
+            enc = _encode_opportunity(opp)
+            frames.append(
+                (enc, b'id: %d\nevent: opportunity\ndata: %s\n\n' % (self._event_id, enc.body))
+            )
+        for sub in subscribers:
+            batch = b''.join(
+                frame for enc, frame in frames
+                if enc.matches(sub.sports, sub.books, sub.min_profit)
+            )
+            if not batch:
+                continue
+            try:
+                sub.queue.put_nowait(batch)
+            except queue.Full:
+                self._drop(sub, 'send buffer full')
+
+    def subscribe(self, sports=(), books=(), min_profit: Optional[float] = None) -> _Subscriber:
+        sub = _Subscriber(sports, books, min_profit, STREAM_BUFFER)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: _Subscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def _drop(self, sub: _Subscriber, reason: str) -> None:
+        """Disconnect a subscriber; its connection thread exits on its next event."""
+        sub.dropped = True
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+            self.dropped_subscribers += 1
+        message.log_warning('Dropped stream subscriber: {}'.format(reason), 'service')
+
+    def health(self) -> dict:
+        snap = self.snapshot
+        now = time.time()
+        age = now - snap.ts if snap else None
+        stale = (
+            snap is None
+            or (self.scan_interval is not None and age > 3 * self.scan_interval + snap.scan_seconds)
+        )
+        return {
+            'status': 'stale' if stale else 'ok',
+            'uptime': round(now - self.started, 1),
+            'scan': snap.scan if snap else 0,
+            'last_scan': snap.ts if snap else None,
+            'last_scan_age': round(age, 1) if snap else None,
+            'scan_seconds': round(snap.scan_seconds, 2) if snap else None,
+            'quotes': snap.quotes if snap else 0,
+            'opportunities': len(snap.opportunities) if snap else 0,
+            'subscribers': len(self._subscribers),
+            'dropped_subscribers': self.dropped_subscribers,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for sub in subscribers:
+            sub.dropped = True
+            try:
+                sub.queue.put_nowait(None)      # wake an idle connection thread
+            except queue.Full:
+                pass
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: OpportunityService = None      # set per server in OpportunityService.start
+    server_version = 'ArbScanner'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        query = parse_qs(url.query)
+        snap = self.service.snapshot
+
+        if parts == ['health']:
+            return self._send(200, _encode(self.service.health()))
+        if parts in (['opportunities'], ['stream']):
+            try:
+                min_profit = float(query['min_profit'][0]) if 'min_profit' in query else None
+            except ValueError:
+                return self._error(400, 'min_profit must be a number')
+            if parts == ['stream']:
+                return self._stream(query.get('sport', ()), query.get('book', ()), min_profit)
+        if snap is None:
+            return self._error(503, 'no scan has completed yet')
+        if parts == ['opportunities']:
+            body = snap.select(query.get('sport', ()), query.get('book', ()), min_profit)
+            return self._send(200, body, snap.scan)
+        if parts == ['events']:
+            return self._send(200, snap.events, snap.scan)
+        if len(parts) == 3 and parts[0] == 'events' and parts[2] == 'quotes':
+            body = snap.event_quotes.get(parts[1])
+            if body is None:
+                return self._error(404, 'unknown event {}'.format(parts[1]))
+            return self._send(200, body, snap.scan)
+        return self._error(404, 'unknown path {}'.format(url.path))
+
+    def _stream(self, sports, books, min_profit: Optional[float]):
+        """Serve /stream until the client leaves or is dropped as too slow."""
+        sub = self.service.subscribe(sports, books, min_profit)
+        self.close_connection = True
+        try:
+            # A client that stops reading makes writes time out instead of hanging
+            self.connection.settimeout(STREAM_WRITE_TIMEOUT)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(b': connected\n\n')
+            while not sub.dropped:
+                try:
+                    frame = sub.queue.get(timeout=STREAM_HEARTBEAT)
+                except queue.Empty:
+                    frame = b': keepalive\n\n'    # also detects vanished clients
+                if frame is None or sub.dropped:
+                    break
+                self.wfile.write(frame)
+        except socket.timeout:
+            self.service._drop(sub, 'client stopped reading')
+        except OSError:
+            pass            # client went away
+        finally:
+            self.service.unsubscribe(sub)
+
+    def _error(self, status: int, text: str):
+        self._send(status, _encode({'error': text}))
+
+    def _send(self, status: int, body: bytes, scan: Optional[int] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        if scan is not None:
+            self.send_header('X-Scan', str(scan))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        message.log_debug(fmt % args, 'service')
@@ -0,0 +1,297 @@
+"""
+Delta encoding between consecutive scans.
+
+Each scan returns the full list of quotes, but between two scans only a small
+fraction of prices move. SnapshotDiffer keeps the previous scan keyed by
+
+    (event_id, market, line, outcome, bookmaker_id)
+
+and turns every new scan into a SnapshotDelta of added, changed and removed
+quotes, so downstream consumers work in proportion to market movement
+rather than market size.
+
+DeltaWriter / read_deltas store the stream in a compact binary log. Strings
+and quote keys are written once and referred to by integer id afterwards, so
+a price change costs 9 bytes:
+
+    file     MAGIC, then frames
+    frame    <I payload length> <d scan timestamp> op*
+    op       0x01 STR  <H length> utf-8 bytes           string id = next id
+             0x02 KEY  <9I string ids> <i line*1000>   key id = next id
+             0x03 ADD  <I key id> <I odds*1000>
+             0x04 CHG  <I key id> <I odds*1000>
+             0x05 DEL  <I key id>
+
+Odds and lines are stored in thousandths (every book quotes at most three
+decimals). A truncated final frame, e.g. after a crash, is ignored.
+
+Opening an existing log continues it. The writer checks MAGIC, rebuilds its
+string and key ids from the frames already there, and cuts off a truncated
+final frame. The first scan after a restart diffs against nothing, so its
+frame also deletes every quote still open in the log that the scan no longer
+has. Replaying the whole file then gives the right state.
+"""
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+from arbitrage import OddsEntry
+
+MAGIC = b'ODDSDELTA1\n'
+
+OP_STR = 0x01
+OP_KEY = 0x02
+OP_ADD = 0x03
+OP_CHG = 0x04
+OP_DEL = 0x05
+
+_NO_LINE = -2 ** 31
+_FRAME = struct.Struct('<I')
+_TS = struct.Struct('<d')
+_STR = struct.Struct('<BH')
+_KEY = struct.Struct('<B9Ii')
+_PRICE = struct.Struct('<BII')
+_DEL = struct.Struct('<BI')
+
+# OddsEntry fields stored in a KEY record, in order (decimal_odds and line aside)
+_KEY_FIELDS = (
+    'bookmaker', 'bookmaker_id', 'sport', 'event_id', 'event_name',
+    'commence_time', 'outcome', 'url', 'market',
+)
+
+
+def quote_key(entry: OddsEntry) -> tuple:
+    """Identity of a quote across scans."""
+    return entry.event_id, entry.market, entry.line, entry.outcome, entry.bookmaker_id
+
+
+@dataclass
+class SnapshotDelta:
+    """Difference between two consecutive scans."""
+    added: List[OddsEntry] = field(default_factory=list)
+    changed: List[OddsEntry] = field(default_factory=list)    # new values
+    removed: List[OddsEntry] = field(default_factory=list)    # last values seen
+    ts: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    def summary(self) -> str:
+        return '+{} ~{} -{}'.format(len(self.added), len(self.changed), len(self.removed))
+
+
+# ---------------------------------------------------------------------------
+# Diffing
+# ---------------------------------------------------------------------------
+
+class SnapshotDiffer:
+    """Turns full scans into deltas against the previous scan."""
+
+    def __init__(self):
+        self._previous: Dict[tuple, OddsEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._previous)
+
+    def diff(self, all_odds: List[OddsEntry], ts: float = 0.0) -> SnapshotDelta:
+        """
+        Diff a full scan against the previous one and make it the new
+        baseline. A quote counts as changed when any field differs (price,
+        commence time, link); duplicates within a scan keep the last one.
+        """
+        current = {quote_key(e): e for e in all_odds}
+        previous = self._previous
+        delta = SnapshotDelta(ts=ts)
+        for key, entry in current.items():
+            old = previous.get(key)
+            if old is None:
+                delta.added.append(entry)
+            elif old != entry:
+                delta.changed.append(entry)
+        delta.removed = [e for k, e in previous.items() if k not in current]
+        self._previous = current
+        return delta
+
+    def snapshot(self) -> List[OddsEntry]:
+        """The current baseline as a full quote list."""
+        return list(self._previous.values())
+
+
+def apply_delta(state: Dict[tuple, OddsEntry], delta: SnapshotDelta) -> None:
+    """Bring a quote_key -> OddsEntry mapping forward by one delta."""
+    for entry in delta.removed:
+        state.pop(quote_key(entry), None)
+    for entry in delta.added:
+        state[quote_key(entry)] = entry
+    for entry in delta.changed:
+        state[quote_key(entry)] = entry
+
+
+# ---------------------------------------------------------------------------
+# On-disk encoding
+# ---------------------------------------------------------------------------
+
+def _milli(value: float) -> int:
+    return int(round(value * 1000))
+
+
+class DeltaWriter:
+    """Appends SnapshotDeltas to a compact binary log (see module docstring)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._strings: Dict[str, int] = {}
+        self._keys: Dict[tuple, int] = {}
+        self._open: set = set()     # key ids open at the end of an existing log
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            end = self._resume()
+            self._file: BinaryIO = open(path, 'r+b')
+            self._file.seek(end)
+            self._file.truncate()
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC)
+
+    def _resume(self) -> int:
+        """Rebuild ids and open quotes from an existing log; returns where to append."""
+        end = len(MAGIC)
+        with open(self.path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('{} exists and is not an odds delta log'.format(self.path))
+            strings: List[str] = []
+            for payload, end in _frames(f):
+                for op, *values in _ops(payload, self.path):
+                    if op == OP_STR:
+                        self._strings[values[0]] = len(strings)
+                        strings.append(values[0])
+                    elif op == OP_KEY:
+                        sids, line = values
+                        fields = tuple(strings[sid] for sid in sids) + (line,)
+                        self._keys.setdefault(fields, len(self._keys))
+                    elif op == OP_DEL:
+                        self._open.discard(values[0])
+                    else:
+                        self._open.add(values[0])
+        return end
+
+    def write(self, delta: SnapshotDelta) -> int:
+        """Append one frame; returns its size in bytes."""
+        out = bytearray(_TS.pack(delta.ts))
+        written = set()
+        for op, entries in ((OP_ADD, delta.added), (OP_CHG, delta.changed)):
+            for entry in entries:
+                key_id = self._key_id(entry, out)
+                written.add(key_id)
+                out += _PRICE.pack(op, key_id, _milli(entry.decimal_odds))
+        for entry in delta.removed:
+            out += _DEL.pack(OP_DEL, self._key_id(entry, out))
+        if self._open:
+            # First frame after a restart: close what the previous run left open
+            for key_id in sorted(self._open - written):
+                out += _DEL.pack(OP_DEL, key_id)
+            self._open = set()
+        self._file.write(_FRAME.pack(len(out)))
+        self._file.write(out)
+        self._file.flush()
+        return _FRAME.size + len(out)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _string_id(self, value: str, out: bytearray) -> int:
+        sid = self._strings.get(value)
+        if sid is None:
+            sid = self._strings[value] = len(self._strings)
+            raw = value.encode('utf-8')
+            out += _STR.pack(OP_STR, len(raw))
+            out += raw
+        return sid
+
+    def _key_id(self, entry: OddsEntry, out: bytearray) -> int:
+        fields = tuple(getattr(entry, name) for name in _KEY_FIELDS) + (entry.line,)
+        kid = self._keys.get(fields)
+        if kid is None:
+            kid = self._keys[fields] = len(self._keys)
+            sids = [self._string_id(value or '', out) for value in fields[:-1]]
+            line = _NO_LINE if entry.line is None else _milli(entry.line)
+            out += _KEY.pack(OP_KEY, *sids, line)
+        return kid
+
+
+def _frames(f: BinaryIO) -> Iterator[Tuple[bytes, int]]:
+    """(payload, file offset after it) of every complete frame; stops at a truncated one."""
+    pos = f.tell()
+    while True:
+        header = f.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            return
+        (size,) = _FRAME.unpack(header)
+        payload = f.read(size)
+        if len(payload) < size:
+            return
+        pos += _FRAME.size + size
+        yield payload, pos
+
+
+def _ops(payload: bytes, path: str) -> Iterator[tuple]:
+    """
+    Records of one frame after its timestamp: (OP_STR, text),
+    (OP_KEY, string ids, line or None), (OP_ADD / OP_CHG, key id, odds)
+    and (OP_DEL, key id).
+    """
+    pos, size = _TS.size, len(payload)
+    while pos < size:
+        op = payload[pos]
+        if op == OP_STR:
+            _, length = _STR.unpack_from(payload, pos)
+            pos += _STR.size
+            yield op, payload[pos:pos + length].decode('utf-8')
+            pos += length
+        elif op == OP_KEY:
+            values = _KEY.unpack_from(payload, pos)
+            pos += _KEY.size
+            yield op, values[1:-1], None if values[-1] == _NO_LINE else values[-1] / 1000.0
+        elif op in (OP_ADD, OP_CHG):
+            _, key_id, odds = _PRICE.unpack_from(payload, pos)
+            pos += _PRICE.size
+            yield op, key_id, odds / 1000.0
+        elif op == OP_DEL:
+            _, key_id = _DEL.unpack_from(payload, pos)
+            pos += _DEL.size
+            yield op, key_id
+        else:
+            raise ValueError('Corrupt delta log {} (op {:#x})'.format(path, op))
+
+
+def read_deltas(path: str) -> Iterator[SnapshotDelta]:
+    """Decode a log written by DeltaWriter, one SnapshotDelta per frame."""
+    strings: List[str] = []
+    keys: List[Tuple[dict, float]] = []
+    last_odds: Dict[int, float] = {}    # key id -> latest price, for DEL records
+
+    def entry(key_id: int, odds: float) -> OddsEntry:
+        fields, line = keys[key_id]
+        return OddsEntry(decimal_odds=odds, line=line, **fields)
+
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{} is not an odds delta log'.format(path))
+        for payload, _ in _frames(f):
+            (ts,) = _TS.unpack_from(payload, 0)
+            delta = SnapshotDelta(ts=ts)
+            for op, *values in _ops(payload, path):
+                if op == OP_STR:
+                    strings.append(values[0])
+                elif op == OP_KEY:
+                    sids, line = values
+                    fields = {name: strings[sid] for name, sid in zip(_KEY_FIELDS, sids)}
+                    keys.append((fields, line))
+                elif op in (OP_ADD, OP_CHG):
+                    key_id, odds = values
+                    last_odds[key_id] = odds
+                    (delta.added if op == OP_ADD else delta.changed).append(entry(key_id, odds))
+                else:
+                    key_id = values[0]
+                    delta.removed.append(entry(key_id, last_odds.pop(key_id, 0.0)))
+            yield delta
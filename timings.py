@@ -0,0 +1,256 @@
+"""
+Per-scraper timing and throughput instrumentation.
+
+Every scraper carries a ScraperTiming for the current scan. BaseScraper._get
+fills it per request:
+
+    dns        name resolution of new connections
+    connect    TCP connect + TLS handshake of new connections
+    ttfb       request sent -> response headers (failed attempts count here)
+    download   response headers -> body read
+    bytes      body size
+    sleep      politeness delay and retry backoff
+    parse      BeautifulSoup / JSON decoding in get_soup / get_json
+
+The collection loop adds wall time, entries produced and any error. DNS
+and connect times come from the scraper session's connection class, which
+writes into the request being timed on the current thread (each scraper
+runs in its own thread). A reused keep-alive connection costs no DNS or
+connect time.
+
+ScraperHealth keeps the last TIMING_WINDOW scans of every scraper and
+summarises them for the --health panel; format_scan_report() is the
+per-scan breakdown written to the debug log.
+"""
+import socket
+import statistics
+import threading
+from collections import deque
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Deque, Dict, List, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import tracing
+from config import TIMING_SLOW_FACTOR, TIMING_WINDOW
+
+_current = threading.local()    # .request: the _RequestTiming being measured on this thread
+
+
+@dataclass
+class _RequestTiming:
+    dns: float = 0.0
+    connect: float = 0.0
+
+
+@dataclass
+class ScraperTiming:
+    """Where one scraper's time went during one scan (seconds, bytes, counts)."""
+    name: str
+    wall: float = 0.0
+    requests: int = 0
+    failures: int = 0       # attempts that raised (each may be retried)
+    retries: int = 0
+    dns: float = 0.0
+    connect: float = 0.0
+    ttfb: float = 0.0
+    download: float = 0.0
+    bytes: int = 0
+    parse: float = 0.0
+    sleep: float = 0.0
+    entries: int = 0
+    error: Optional[str] = None
+
+    @property
+    def network(self) -> float:
+        return self.dns + self.connect + self.ttfb + self.download
+
+    @property
+    def ok(self) -> bool:
+        """No exception, and at least one request got through (if any were made)."""
+        return self.error is None and (self.requests == 0 or self.failures < self.requests)
+
+    def begin_request(self) -> _RequestTiming:
+        request = _current.request = _RequestTiming()
+        return request
+
+    def end_request(self, request: _RequestTiming, started: float, resp=None) -> None:
+        """Account one attempt; resp is None when it raised before a usable response."""
+        _current.request = None
+        total = perf_counter() - started
+        self.requests += 1
+        self.dns += request.dns
+        self.connect += request.connect
+        setup = request.dns + request.connect
+        if resp is None:
+            self.failures += 1
+            self.ttfb += max(0.0, total - setup)
+            return
+        headers_at = resp.elapsed.total_seconds()
+        self.ttfb += max(0.0, headers_at - setup)
+        self.download += max(0.0, total - headers_at)
+        self.bytes += len(resp.content)
+
+
+# ---------------------------------------------------------------------------
+# Connection-level timing (DNS, connect + TLS)
+# ---------------------------------------------------------------------------
+
+class _TimedConnectionMixin:
+    """Resolves the host itself to time DNS apart from connect + TLS."""
+
+    _dns_time = 0.0
+
+    def connect(self):
+        started = perf_counter()
+        self._dns_time = 0.0
+        try:
+            super().connect()
+        finally:
+            ended = perf_counter()
+            request = getattr(_current, 'request', None)
+            if request is not None:
+                request.dns += self._dns_time
+                request.connect += ended - started - self._dns_time
+            if tracing.enabled:
+                tracing.complete('connect', started, ended, 'http', {
+                    'host': self.host, 'dns_ms': round(self._dns_time * 1e3, 2),
+                })
+
+    def _new_conn(self):
+        host = self._dns_host
+        started = perf_counter()
+        try:
+            address = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            address = None      # let urllib3 resolve again and raise its own error
+        self._dns_time = perf_counter() - started
+        if address is None:
+            return super()._new_conn()
+        # Connect to the resolved address; TLS still verifies self.host
+        self._dns_host = address
+        try:
+            return super()._new_conn()
+        except Exception:
+            self._dns_host = host
+            return super()._new_conn()      # other addresses of the host, if any
+        finally:
+            self._dns_host = host
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """requests adapter whose connections report DNS and connect time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool, 'https': _TimedHTTPSConnectionPool,
+        }
+
+
+def instrument_session(session) -> None:
+    """Mount TimedAdapter on a requests.Session for http and https."""
+    adapter = TimedAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def format_scan_report(timings: List[ScraperTiming]) -> str:
+    """One line per scraper, slowest first."""
+    lines = []
+    for t in sorted(timings, key=lambda t: t.wall, reverse=True):
+        lines.append(
+            '{:<20} {:6.1f}s | {} req {} fail {} retry | dns {:.2f} conn {:.2f} ttfb {:.2f} '
+            'dl {:.2f} | {:.2f} MB | parse {:.2f} | sleep {:.1f} | {} entries{}'.format(
+                t.name, t.wall, t.requests, t.failures, t.retries, t.dns, t.connect, t.ttfb,
+                t.download, t.bytes / 1e6, t.parse, t.sleep, t.entries,
+                ' | ' + t.error if t.error else '',
+            )
+        )
+    return '\n'.join(lines)
+
+
+@dataclass
+class HealthRow:
+    """Rolling-window summary of one scraper (see ScraperHealth.rows)."""
+    name: str
+    scans: int
+    ok_pct: float
+    wall_p50: float
+    wall_max: float
+    ttfb_mean: float        # per request
+    mb_per_scan: float
+    entries: int            # last scan
+    retries: int            # whole window
+    sleep_share: float      # of wall time
+    status: str             # ok / slow / empty / failing
+
+
+class ScraperHealth:
+    """Last TIMING_WINDOW scans of every scraper."""
+
+    def __init__(self, window: int = TIMING_WINDOW):
+        self.window = window
+        self._history: Dict[str, Deque[ScraperTiming]] = {}
+
+    def record(self, timings: List[ScraperTiming]) -> None:
+        for t in timings:
+            self._history.setdefault(t.name, deque(maxlen=self.window)).append(t)
+
+    def rows(self) -> List[HealthRow]:
+        """One row per scraper, slowest (median wall time) first."""
+        rows = []
+        for name, scans in self._history.items():
+            walls = [t.wall for t in scans]
+            requests = sum(t.requests for t in scans)
+            total_wall = sum(walls)
+            rows.append(HealthRow(
+                name=name,
+                scans=len(scans),
+                ok_pct=100.0 * sum(t.ok for t in scans) / len(scans),
+                wall_p50=statistics.median(walls),
+                wall_max=max(walls),
+                ttfb_mean=sum(t.ttfb for t in scans) / requests if requests else 0.0,
+                mb_per_scan=sum(t.bytes for t in scans) / len(scans) / 1e6,
+                entries=scans[-1].entries,
+                retries=sum(t.retries for t in scans),
+                sleep_share=sum(t.sleep for t in scans) / total_wall if total_wall else 0.0,
+                status='',
+            ))
+        if rows:
+            typical = statistics.median(r.wall_p50 for r in rows)
+            for r in rows:
+                last = self._history[r.name][-1]
+                if r.ok_pct < 50:
+                    r.status = 'failing'
+                elif last.entries == 0:
+                    r.status = 'empty'
+                elif typical and r.wall_p50 > TIMING_SLOW_FACTOR * typical:
+                    r.status = 'slow'
+                else:
+                    r.status = 'ok'
+        rows.sort(key=lambda r: r.wall_p50, reverse=True)
+        return rows
@@ -0,0 +1,203 @@
+"""
+Timeline trace of the scan pipeline (--trace FILE).
+
+Records spans in the Chrome trace-event format, which opens in Perfetto
+(https://ui.perfetto.dev) or chrome://tracing. Every thread gets its own track:
+
+    scan        one scan of the watch loop, and its collect phase
+    scraper     a scraper's run (get_odds), preceded by the time it was
+                queued in the thread pool before it started
+    sport       one sport (league) of a scraper
+    http        one request attempt (args: url, attempt, status) and, for a
+                new connection, its DNS + connect + TLS time
+    sleep       politeness delay and retry backoff
+    parse       BeautifulSoup / JSON decoding
+    match       group_odds: quotes grouped into events and markets
+    detect      scan_for_arbitrage, value bets, middles
+    render      the dashboard: printed, or drawn by the --live thread
+
+Instrumented code uses the module attributes, never `from tracing import`:
+
+    with tracing.span('scan_for_arbitrage', 'detect'):
+        ...
+    tracing.complete('queued', submitted, started, 'scraper')  # already measured
+    if tracing.enabled:
+        ...build span args only when someone is recording...
+
+Until start() is called, span() returns a shared do-nothing context manager
+and complete() returns at once, so the instrumentation costs one function
+call per span. start() rebinds both to the recording versions. Spans are
+appended to one in-memory list (bounded by TRACE_MAX_EVENTS) and the file is
+written once, by stop() or at exit. --workers processes do not record: the
+trace shows the collection from the main process's side.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from config import TRACE_MAX_EVENTS
+from message import message
+
+enabled = False
+_tracer = None      # the active Tracer
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _null_span(name: str, cat: str = '', args: Optional[dict] = None) -> _NullSpan:
+    return _NULL_SPAN
+
+
+def _null_complete(name: str, start: float, end: float, cat: str = '',
+                   args: Optional[dict] = None) -> None:
+    pass
+
+
+# Rebound by start() / stop()
+span = _null_span
+complete = _null_complete
+
+
+class _Span:
+    """Context manager recording one span on the current thread."""
+
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name: str, cat: str, args: Optional[dict]):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = perf_counter()
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        tracer = _tracer
+        if tracer is not None:
+            tracer.add(self.name, self.start, end, self.cat, args)
+        return False
+
+
+def _span(name: str, cat: str = '', args: Optional[dict] = None) -> _Span:
+    return _Span(name, cat, args)
+
+
+class Tracer:
+    """In-memory spans of this process, written out as Chrome trace-event JSON."""
+
+    def __init__(self, path: str, max_events: int = TRACE_MAX_EVENTS):
+        self.path = path
+        self.max_events = max_events
+        self.dropped = 0
+        self._events: list = []          # (name, cat, start, end, thread ident, args)
+        self._threads: Dict[int, str] = {}
+        self._t0 = perf_counter()
+        self._wall0 = time.time()
+
+    def add(self, name: str, start: float, end: float, cat: str = '',
+            args: Optional[dict] = None) -> None:
+        """Record a span measured with perf_counter (any thread)."""
+        ident = threading.get_ident()
+        if ident not in self._threads:
+            self._threads[ident] = threading.current_thread().name
+        if len(self._events) < self.max_events:
+            self._events.append((name, cat, start, end, ident, args))
+        else:
+            self.dropped += 1
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def trace_events(self) -> List[dict]:
+        """The recorded spans as trace events (times in microseconds from start)."""
+        pid = os.getpid()
+        tids = {ident: i for i, ident in enumerate(self._threads, 1)}
+        events = [{'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+                   'args': {'name': 'arbitrage scanner'}}]
+        for ident, tid in tids.items():
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid,
+                           'args': {'name': self._threads[ident]}})
+            events.append({'ph': 'M', 'name': 'thread_sort_index', 'pid': pid, 'tid': tid,
+                           'args': {'sort_index': tid}})
+        t0 = self._t0
+        for name, cat, start, end, ident, args in list(self._events):
+            event = {
+                'ph': 'X', 'name': name, 'cat': cat, 'pid': pid, 'tid': tids[ident],
+                'ts': round((start - t0) * 1e6, 1), 'dur': round((end - start) * 1e6, 1),
+            }
+            if args:
+                event['args'] = args
+            events.append(event)
+        return events
+
+    def write(self) -> None:
+        """Write the trace file (via a temp file, so a crash cannot leave half of it)."""
+        doc = {
+            'traceEvents': self.trace_events(),
+            'displayTimeUnit': 'ms',
+            'otherData': {'started': self._wall0, 'dropped_spans': self.dropped},
+        }
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, separators=(',', ':'), default=str)
+        os.replace(tmp, self.path)
+
+
+def start(path: str, max_events: int = TRACE_MAX_EVENTS) -> Tracer:
+    """Begin recording spans of this process; written to path by stop() or at exit."""
+    global enabled, span, complete, _tracer
+    _tracer = Tracer(path, max_events)
+    span, complete, enabled = _span, _tracer.add, True
+    atexit.register(stop)
+    return _tracer
+
+
+def stop() -> None:
+    """Stop recording and write the trace file (safe to call more than once)."""
+    global enabled, span, complete, _tracer
+    tracer = _tracer
+    if tracer is None:
+        return
+    span, complete, enabled, _tracer = _null_span, _null_complete, False, None
+    try:
+        tracer.write()
+    except (OSError, TypeError, ValueError) as e:
+        message.log_error('Could not write trace {}: {}'.format(tracer.path, e), 'trace')
+        return
+    message.log_result(
+        'Trace of {} spans written to {}{} (open it in https://ui.perfetto.dev)'.format(
+            len(tracer), tracer.path,
+            ', {} dropped past TRACE_MAX_EVENTS'.format(tracer.dropped) if tracer.dropped else '',
+        ),
+        'trace',
+    )
+
+
+def _after_fork() -> None:
+    # A forked --workers process must not record into (or write) the parent's trace
+    global enabled, span, complete, _tracer
+    span, complete, enabled, _tracer = _null_span, _null_complete, False, None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,129 @@
+"""
+Consensus fair-price and value-bet detection.
+
+Pure arbs need two books to disagree by more than both margins combined. A
+value bet only needs one book to be longer than the market's fair price. For
+every market in a GroupedOdds (the same grouping scan_for_arbitrage uses):
+
+    overround_b  = sum(1 / odds_b,i)  over the outcomes book b quotes
+    no-vig p_b,i = (1 / odds_b,i) / overround_b
+    fair p_i     = median over books of p_b,i, renormalised to sum to 1
+    edge_b,i     = odds_b,i * fair p_i - 1
+
+Only books quoting every outcome of a market contribute to the consensus,
+since their margin cannot be removed otherwise. A book quoting one outcome
+more than once (e.g. two scraped sources) counts once, at its best price.
+The whole computation is a handful of numpy passes over all events at once.
+"""
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from arbitrage import GroupedOdds, OddsEntry
+from config import VALUE_MIN_BOOKS, VALUE_MIN_EDGE_PCT
+from outliers import encode_groups, group_median
+
+
+@dataclass
+class ValueBet:
+    """A quote priced longer than the consensus fair price."""
+    event_name: str
+    sport: str
+    commence_time: str
+    entry: OddsEntry
+    fair_prob: float        # margin-free consensus probability
+    fair_odds: float        # 1 / fair_prob
+    edge_pct: float         # expected return per unit staked, in %
+    book_overround: float   # sum of implied probs at this book (1.05 = 5% margin)
+    n_books: int            # books in the consensus
+
+
+def find_value_bets(
+    groups: GroupedOdds,
+    min_edge_pct: float = VALUE_MIN_EDGE_PCT,
+    min_books: int = VALUE_MIN_BOOKS,
+) -> List[ValueBet]:
+    """
+    Return every quote whose expected value against the consensus fair
+    price is at least min_edge_pct, sorted by edge.
+    """
+    entries: List[OddsEntry] = []
+    event_keys: List[tuple] = []
+    for key, outcomes in groups.events.items():
+        if len(outcomes) < 2:
+            continue
+        for entry_list in outcomes.values():
+            best = {}
+            for e in entry_list:
+                kept = best.get(e.bookmaker_id)
+                if kept is None or e.decimal_odds > kept.decimal_odds:
+                    best[e.bookmaker_id] = e
+            entries.extend(best.values())
+            event_keys.extend([(key,)] * len(best))
+    if not entries:
+        return []
+
+    n = len(entries)
+    odds = np.fromiter((e.decimal_odds for e in entries), dtype=float, count=n)
+    implied = 1.0 / odds
+
+    event_code, n_events = encode_groups(event_keys)
+    outcome_code, n_outcomes = encode_groups(
+        [(k[0], e.outcome) for k, e in zip(event_keys, entries)]
+    )
+    book_code, n_books = encode_groups(
+        [(k[0], e.bookmaker_id) for k, e in zip(event_keys, entries)]
+    )
+
+    # Outcomes per event, and outcomes quoted per (event, book)
+    outcome_event = np.zeros(n_outcomes, dtype=np.int64)
+    outcome_event[outcome_code] = event_code
+    outcomes_per_event = np.bincount(outcome_event, minlength=n_events)
+    quoted_per_book = np.bincount(book_code, minlength=n_books)
+    book_event = np.zeros(n_books, dtype=np.int64)
+    book_event[book_code] = event_code
+    complete = (quoted_per_book == outcomes_per_event[book_event])[book_code]
+
+    overround = np.bincount(book_code, weights=implied, minlength=n_books)
+    no_vig = implied / overround[book_code]
+
+    # Consensus from complete books only; others go to a throwaway group
+    consensus_code = np.where(complete, outcome_code, n_outcomes)
+    fair, book_count = group_median(no_vig, consensus_code, n_outcomes + 1)
+    fair, book_count = fair[:n_outcomes], book_count[:n_outcomes]
+
+    usable = book_count >= min_books
+    event_total = np.bincount(
+        outcome_event, weights=np.where(usable, fair, 0.0), minlength=n_events
+    )
+    # An event only gets a fair price if every outcome has a consensus
+    event_usable = np.bincount(outcome_event, weights=usable, minlength=n_events) \
+        == outcomes_per_event
+    fair = np.where(
+        usable & event_usable[outcome_event],
+        fair / np.where(event_total > 0, event_total, 1.0)[outcome_event],
+        np.nan,
+    )
+
+    edge = odds * fair[outcome_code] - 1.0
+    hits = np.flatnonzero(np.nan_to_num(edge, nan=-1.0) * 100.0 >= min_edge_pct)
+
+    value_bets: List[ValueBet] = []
+    for i in hits:
+        entry = entries[i]
+        name, sport, time = groups.meta[event_keys[i][0]]
+        p = float(fair[outcome_code[i]])
+        value_bets.append(ValueBet(
+            event_name=name,
+            sport=sport,
+            commence_time=time,
+            entry=entry,
+            fair_prob=round(p, 4),
+            fair_odds=round(1.0 / p, 3),
+            edge_pct=round(float(edge[i]) * 100.0, 3),
+            book_overround=round(float(overround[book_code[i]]), 4),
+            n_books=int(book_count[outcome_code[i]]),
+        ))
+    value_bets.sort(key=lambda v: v.edge_pct, reverse=True)
+    return value_bets
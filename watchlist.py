@@ -0,0 +1,309 @@
+"""
+Near-arbitrage watchlist.
+
+find_arbitrage() only reports markets that are already profitable. The
+watchlist keeps the best price per outcome for every market (arbitrage.market_key)
+it has seen and an index of markets ordered by their margin to break-even:
+
+    margin_pct = (sum(1 / best_odds_i) - 1) * 100
+
+A negative margin is an arb. Price updates are applied one quote at a time and
+only the touched market is re-evaluated, so a single moved price never costs a
+full rescan. Every market sits in one of three zones:
+
+    'arb'   margin_pct <= -min_profit_pct
+    'near'  margin_pct <   near_margin_pct
+    'far'   everything else
+
+Subscribers are called whenever an update moves a market into another zone.
+"""
+import bisect
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from arbitrage import MARKET_MONEYLINE, OddsEntry, market_key
+from config import MIN_PROFIT_PCT, NEAR_ARB_MARGIN_PCT
+
+
+ZONE_ARB = 'arb'
+ZONE_NEAR = 'near'
+ZONE_FAR = 'far'
+
+
+# ---------------------------------------------------------------------------
+# Data classes
+# ---------------------------------------------------------------------------
+
+@dataclass
+class WatchEntry:
+    """Current state of one market on the watchlist."""
+    event_id: str
+    event_name: str
+    sport: str
+    commence_time: str
+    margin_pct: float                   # < 0 means an arb exists
+    zone: str
+    best_offers: Dict[str, OddsEntry]   # outcome -> best OddsEntry
+    market: str = MARKET_MONEYLINE
+    line: Optional[float] = None        # see arbitrage.market_point
+
+
+@dataclass
+class ZoneCrossing:
+    """Fired when a price update moves a market from one zone to another."""
+    event_id: str
+    event_name: str
+    sport: str
+    old_zone: str
+    new_zone: str
+    margin_pct: float
+    market: str = MARKET_MONEYLINE
+    line: Optional[float] = None
+
+
+# ---------------------------------------------------------------------------
+# Watchlist
+# ---------------------------------------------------------------------------
+
+class NearArbWatchlist:
+    """Indexed view of every market ordered by margin to break-even."""
+
+    def __init__(
+        self,
+        near_margin_pct: float = NEAR_ARB_MARGIN_PCT,
+        min_profit_pct: float = MIN_PROFIT_PCT,
+    ):
+        self.near_margin_pct = near_margin_pct
+        self.min_profit_pct = min_profit_pct
+        # market key -> outcome -> bookmaker_id -> latest OddsEntry
+        self._quotes: Dict[tuple, Dict[str, Dict[str, OddsEntry]]] = {}
+        self._margin: Dict[tuple, float] = {}
+        self._zone: Dict[tuple, str] = {}
+        self._index: List[Tuple[float, tuple]] = []   # sorted (margin_pct, market key)
+        self._listeners: List[Callable[[ZoneCrossing], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def subscribe(self, callback: Callable[[ZoneCrossing], None]) -> None:
+        """Register a callback fired on every zone crossing."""
+        self._listeners.append(callback)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update(self, entry: OddsEntry) -> Optional[ZoneCrossing]:
+        """Apply one price update; returns the crossing it caused, if any."""
+        if not self._apply(entry):
+            return None
+        return self._reevaluate(market_key(entry))
+
+    def update_many(self, entries: Iterable[OddsEntry]) -> List[ZoneCrossing]:
+        """
+        Apply a batch of price updates.
+        Each touched market is re-evaluated once, however many quotes moved.
+        """
+        touched = set()
+        for entry in entries:
+            if self._apply(entry):
+                touched.add(market_key(entry))
+        crossings = []
+        for key in touched:
+            crossing = self._reevaluate(key)
+            if crossing:
+                crossings.append(crossing)
+        return crossings
+
+    def sync(self, entries: List[OddsEntry]) -> List[ZoneCrossing]:
+        """
+        Apply a full scan snapshot: quotes missing from it are withdrawn and
+        the rest are applied as updates. Unchanged markets are not re-evaluated.
+        """
+        present = {(market_key(e), e.outcome, e.bookmaker_id) for e in entries}
+        touched = set()
+        for key, outcomes in list(self._quotes.items()):
+            for outcome, books in list(outcomes.items()):
+                for book in [b for b in books if (key, outcome, b) not in present]:
+                    del books[book]
+                    touched.add(key)
+                if not books:
+                    del outcomes[outcome]
+        for entry in entries:
+            if self._apply(entry):
+                touched.add(market_key(entry))
+        crossings = []
+        for key in touched:
+            crossing = self._reevaluate(key)
+            if crossing:
+                crossings.append(crossing)
+            if not self._quotes.get(key):
+                self.remove_market(key)
+        return crossings
+
+    def apply_delta(self, delta) -> List[ZoneCrossing]:
+        """
+        Apply a snapshots.SnapshotDelta: equivalent to sync() with the full
+        scan, but costs time in proportion to the quotes that moved.
+        """
+        touched = set()
+        for entry in delta.removed:
+            key = market_key(entry)
+            books = self._quotes.get(key, {}).get(entry.outcome)
+            if books and entry.bookmaker_id in books:
+                del books[entry.bookmaker_id]
+                if not books:
+                    del self._quotes[key][entry.outcome]
+                touched.add(key)
+        for entries in (delta.added, delta.changed):
+            for entry in entries:
+                if self._apply(entry):
+                    touched.add(market_key(entry))
+        crossings = []
+        for key in touched:
+            crossing = self._reevaluate(key)
+            if crossing:
+                crossings.append(crossing)
+            if not self._quotes.get(key):
+                self.remove_market(key)
+        return crossings
+
+    def remove_quote(self, entry: OddsEntry) -> Optional[ZoneCrossing]:
+        """Withdraw one bookmaker's price (e.g. the market was suspended)."""
+        key = market_key(entry)
+        books = self._quotes.get(key, {}).get(entry.outcome)
+        if not books or entry.bookmaker_id not in books:
+            return None
+        del books[entry.bookmaker_id]
+        if not books:
+            del self._quotes[key][entry.outcome]
+        return self._reevaluate(key)
+
+    def remove_event(self, event_id: str) -> None:
+        """Drop every market of an event (e.g. it has started)."""
+        for key in [k for k in self._quotes if k[0] == event_id]:
+            self.remove_market(key)
+
+    def remove_market(self, key: tuple) -> None:
+        """Drop one market (see arbitrage.market_key)."""
+        self._unindex(key)
+        self._quotes.pop(key, None)
+        self._zone.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def top(self, n: int = 10, zone: Optional[str] = None) -> List[WatchEntry]:
+        """Return up to n markets closest to (or furthest past) break-even."""
+        result: List[WatchEntry] = []
+        for margin, key in self._index:
+            if len(result) >= n:
+                break
+            if zone is not None and self._zone[key] != zone:
+                continue
+            result.append(self._snapshot(key, margin))
+        return result
+
+    def hot_event_ids(self, n: int = 10) -> List[str]:
+        """Events with a market in the 'arb' or 'near' zone — candidates for focused polling."""
+        hot: List[str] = []
+        for _, key in self._index[:n]:
+            if self._zone[key] != ZONE_FAR and key[0] not in hot:
+                hot.append(key[0])
+        return hot
+
+    def zone_of(self, key: tuple) -> str:
+        return self._zone.get(key, ZONE_FAR)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _apply(self, entry: OddsEntry) -> bool:
+        """Store a quote. Returns False when it leaves the market unchanged."""
+        if entry.decimal_odds <= 1.0:
+            return False
+        books = self._quotes.setdefault(market_key(entry), {}).setdefault(entry.outcome, {})
+        prev = books.get(entry.bookmaker_id)
+        books[entry.bookmaker_id] = entry
+        return prev is None or prev.decimal_odds != entry.decimal_odds
+
+    def _best(self, key: tuple) -> Dict[str, OddsEntry]:
+        return {
+            outcome: max(books.values(), key=lambda e: e.decimal_odds)
+            for outcome, books in self._quotes.get(key, {}).items()
+            if books
+        }
+
+    def _classify(self, margin_pct: float) -> str:
+        if margin_pct <= -self.min_profit_pct:
+            return ZONE_ARB
+        if margin_pct < self.near_margin_pct:
+            return ZONE_NEAR
+        return ZONE_FAR
+
+    def _unindex(self, key: tuple) -> None:
+        margin = self._margin.pop(key, None)
+        if margin is None:
+            return
+        pos = bisect.bisect_left(self._index, (margin, key))
+        if pos < len(self._index) and self._index[pos][1] == key:
+            del self._index[pos]
+
+    def _reevaluate(self, key: tuple) -> Optional[ZoneCrossing]:
+        best = self._best(key)
+        self._unindex(key)
+        old_zone = self._zone.get(key, ZONE_FAR)
+
+        if len(best) < 2:
+            new_zone, margin = ZONE_FAR, float('inf')
+        else:
+            implied = sum(1.0 / e.decimal_odds for e in best.values())
+            margin = (implied - 1.0) * 100.0
+            new_zone = self._classify(margin)
+            self._margin[key] = margin
+            bisect.insort(self._index, (margin, key))
+        self._zone[key] = new_zone
+
+        if new_zone == old_zone:
+            return None
+        sample = next(iter(best.values()), None) or self._any_entry(key)
+        crossing = ZoneCrossing(
+            event_id=key[0],
+            event_name=sample.event_name if sample else '',
+            sport=sample.sport if sample else '',
+            old_zone=old_zone,
+            new_zone=new_zone,
+            margin_pct=margin,
+            market=key[1],
+            line=key[2],
+        )
+        for callback in self._listeners:
+            callback(crossing)
+        return crossing
+
+    def _any_entry(self, key: tuple) -> Optional[OddsEntry]:
+        for books in self._quotes.get(key, {}).values():
+            for entry in books.values():
+                return entry
+        return None
+
+    def _snapshot(self, key: tuple, margin: float) -> WatchEntry:
+        best = self._best(key)
+        sample = next(iter(best.values()))
+        return WatchEntry(
+            event_id=key[0],
+            event_name=sample.event_name,
+            sport=sample.sport,
+            commence_time=sample.commence_time,
+            margin_pct=round(margin, 3),
+            zone=self._zone[key],
+            best_offers=best,
+            market=key[1],
+            line=key[2],
+        )
@@ -0,0 +1,350 @@
+"""
+HTTP webhook notification sinks (--webhook).
+
+A WebhookSink posts every notification from the dispatcher (see notify.py)
+to one URL, as a generic JSON document or in the Slack ("text") or Discord
+("content") incoming-webhook format. send() only encodes the payload and
+queues it: WEBHOOK_CONCURRENCY sender threads share one requests.Session
+whose keep-alive pool holds that many connections, so an alert goes out as
+soon as a connection is free, without a new TCP/TLS handshake, and one
+slow response does not hold up the next alert.
+
+A delivery that fails (connection error, timeout, HTTP 429 or 5xx) goes to
+a retry queue with exponential backoff, at most WEBHOOK_MAX_ATTEMPTS tries.
+The queue holds at most WEBHOOK_RETRY_MAX payloads (oldest dropped first)
+and is saved to a JSON file whenever it changes, so a restart resumes it.
+The file is named after a hash of the URL and style, and every queued
+payload carries both, so adding, removing or reordering --webhook flags
+never sends a saved payload to a different endpoint.
+Other 4xx answers mean the payload itself is wrong and are not retried.
+
+metrics() reports delivery latency, from detection of the oldest alert in
+a notification to the endpoint's answer, over the last
+WEBHOOK_LATENCY_SAMPLES deliveries.
+"""
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    WEBHOOK_COALESCE_WINDOW, WEBHOOK_CONCURRENCY, WEBHOOK_LATENCY_SAMPLES, WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_RETRY_BASE, WEBHOOK_RETRY_FILE, WEBHOOK_RETRY_MAX, WEBHOOK_TIMEOUT,
+)
+from message import message
+from notify import Notification
+
+WEBHOOK_STYLES = ('json', 'slack', 'discord')
+
+_DISCORD_LIMIT = 2000       # characters per Discord message
+_STOP = object()
+
+
+def detect_style(url: str) -> str:
+    """Payload style from a well-known webhook host; generic JSON otherwise."""
+    host = urlsplit(url).hostname or ''
+    if host == 'hooks.slack.com':
+        return 'slack'
+    if host.endswith('discord.com') or host.endswith('discordapp.com'):
+        return 'discord'
+    return 'json'
+
+
+def parse_webhook(spec: str) -> tuple:
+    """'[STYLE=]URL' -> (style, url); without STYLE= the style is detected from the URL."""
+    style, sep, url = spec.partition('=')
+    if sep and style in WEBHOOK_STYLES:
+        return style, url
+    return detect_style(spec), spec
+
+
+def encode_payload(notification: Notification, style: str) -> bytes:
+    """Request body for one notification in the given style."""
+    if style == 'slack':
+        doc = {'text': '*{}*\n{}'.format(notification.title, notification.body)}
+    elif style == 'discord':
+        text = '**{}**\n{}'.format(notification.title, notification.body)
+        doc = {'content': text[:_DISCORD_LIMIT]}
+    else:
+        doc = {
+            'title': notification.title,
+            'body': notification.body,
+            'dropped': notification.dropped,
+            'alerts': [
+                {'kind': a.kind, 'title': a.title, 'body': a.body, 'priority': a.priority,
+                 'ts': a.ts, **a.data}
+                for a in notification.alerts
+            ],
+        }
+    return json.dumps(doc, separators=(',', ':')).encode('utf-8')
+
+
+@dataclass
+class _Delivery:
+    body: str               # encoded payload (kept as text so the retry file stays JSON)
+    first_ts: float         # detection time of the oldest alert
+    url: str = ''           # endpoint and style the payload was encoded for
+    style: str = ''
+    attempts: int = 0
+    next_at: float = 0.0
+
+
+class WebhookSink:
+    """Notification sink posting to one webhook URL from pooled sender threads."""
+
+    min_interval = 0.0
+    coalesce_window = WEBHOOK_COALESCE_WINDOW
+
+    def __init__(
+        self,
+        url: str,
+        style: Optional[str] = None,
+        name: Optional[str] = None,
+        retry_path: Optional[str] = None,
+        concurrency: int = WEBHOOK_CONCURRENCY,
+        timeout: float = WEBHOOK_TIMEOUT,
+        retry_max: int = WEBHOOK_RETRY_MAX,
+    ):
+        self.url = url
+        self.style = style or detect_style(url)
+        self.name = name or 'webhook:{}'.format(urlsplit(url).hostname)
+        self.retry_path = retry_path
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.retry_max = retry_max
+        self.delivered = 0
+        self.failed = 0             # attempts that failed (each may be retried)
+        self.given_up = 0           # payloads dropped: rejected, out of attempts or queue full
+        self.on_delivered = None    # (name, latency) callback, set by the dispatcher
+        self._latencies: deque = deque(maxlen=WEBHOOK_LATENCY_SAMPLES)
+        self._work: queue.Queue = queue.Queue()
+        self._retry: List[_Delivery] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._threads: List[threading.Thread] = []
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._session.headers['Content-Type'] = 'application/json'
+
+    # ------------------------------------------------------------------
+    # Sink interface (called by notify.NotificationDispatcher)
+    # ------------------------------------------------------------------
+
+    def start(self) -> 'WebhookSink':
+        self._load_retry()
+        for i in range(self.concurrency):
+            t = threading.Thread(target=self._sender, name='{}-{}'.format(self.name, i),
+                                 daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._retrier, name=self.name + '-retry', daemon=True)
+        t.start()
+        self._threads.append(t)
+        return self
+
+    def send(self, notification: Notification) -> None:
+        """Queue the notification for the sender threads; never waits on the network."""
+        body = encode_payload(notification, self.style).decode('utf-8')
+        self._work.put(_Delivery(body, notification.first_ts, self.url, self.style))
+
+    def metrics(self) -> dict:
+        """Delivery counters and detection-to-delivery latency (seconds)."""
+        lat = sorted(self._latencies)
+        pick = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 4) if lat else None
+        with self._lock:
+            retrying = len(self._retry)
+        return {
+            'webhook_delivered': self.delivered,
+            'webhook_failed_attempts': self.failed,
+            'webhook_given_up': self.given_up,
+            'webhook_retry_queue': retrying,
+            'latency_p50': pick(0.50),
+            'latency_p95': pick(0.95),
+            'latency_max': round(lat[-1], 4) if lat else None,
+        }
+
+    def close(self, timeout: float = WEBHOOK_TIMEOUT) -> None:
+        """Send what is queued (up to timeout), then persist anything undelivered."""
+        self._closing = True
+        for _ in range(self.concurrency):
+            self._work.put(_STOP)
+        self._wake.set()
+        deadline = time.time() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.time()))
+        # Whatever the senders did not reach is kept for the next run
+        leftover = []
+        while True:
+            try:
+                item = self._work.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            with self._lock:
+                self._retry.extend(leftover)
+                self._trim_retry()
+        self._save_retry()
+        self._session.close()
+
+    # ------------------------------------------------------------------
+    # Delivery
+    # ------------------------------------------------------------------
+
+    def _sender(self) -> None:
+        while True:
+            item = self._work.get()
+            if item is _STOP:
+                return
+            self._deliver(item)
+
+    def _deliver(self, item: _Delivery) -> None:
+        item.attempts += 1
+        try:
+            resp = self._session.post(self.url, data=item.body.encode('utf-8'),
+                                      timeout=self.timeout)
+            status, error = resp.status_code, None
+            resp.close()
+        except requests.RequestException as exc:
+            status, error = None, '{}: {}'.format(type(exc).__name__, exc)
+
+        if status is not None and status < 300:
+            with self._lock:
+                self.delivered += 1
+            latency = time.time() - item.first_ts
+            self._latencies.append(latency)
+            if self.on_delivered is not None:
+                self.on_delivered(self.name, latency)
+            return
+        retryable = status is None or status == 429 or status >= 500
+        reason = error or 'HTTP {}'.format(status)
+        given_up = not retryable or item.attempts >= WEBHOOK_MAX_ATTEMPTS
+        with self._lock:
+            self.failed += 1
+            if given_up:
+                self.given_up += 1
+        if given_up:
+            message.log_error(
+                '{} dropped a notification after {} attempt(s): {}'.format(
+                    self.name, item.attempts, reason),
+                'webhooks',
+            )
+            return
+        item.next_at = time.time() + WEBHOOK_RETRY_BASE * 2 ** (item.attempts - 1)
+        message.log_warning(
+            '{} delivery failed ({}); retrying in {:.0f}s'.format(
+                self.name, reason, item.next_at - time.time()),
+            'webhooks',
+        )
+        with self._lock:
+            self._retry.append(item)
+            self._trim_retry()
+        self._save_retry()
+        self._wake.set()
+
+    def _retrier(self) -> None:
+        """Move retries whose backoff has expired back onto the work queue."""
+        while not self._closing:
+            now = time.time()
+            with self._lock:
+                due = [d for d in self._retry if d.next_at <= now]
+                self._retry = [d for d in self._retry if d.next_at > now]
+                wait = min((d.next_at for d in self._retry), default=now + 60.0) - now
+            if due:
+                self._save_retry()
+                for d in due:
+                    self._work.put(d)
+            self._wake.wait(max(0.05, wait))
+            self._wake.clear()
+
+    def _trim_retry(self) -> None:
+        """Keep the newest retry_max payloads (caller holds the lock)."""
+        excess = len(self._retry) - self.retry_max
+        if excess > 0:
+            self._retry.sort(key=lambda d: d.first_ts)
+            del self._retry[:excess]
+            self.given_up += excess
+            message.log_warning(
+                '{} retry queue full; dropped {} oldest notification(s)'.format(self.name, excess),
+                'webhooks',
+            )
+
+    # ------------------------------------------------------------------
+    # Persistence of the retry queue
+    # ------------------------------------------------------------------
+
+    def _load_retry(self) -> None:
+        if not self.retry_path or not os.path.exists(self.retry_path):
+            return
+        try:
+            with open(self.retry_path, 'r', encoding='utf-8') as f:
+                items = [_Delivery(**d) for d in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            message.log_warning(
+                'Ignoring webhook retry file {}: {}'.format(self.retry_path, e), 'webhooks'
+            )
+            return
+        # Never post a payload encoded for another endpoint or style
+        foreign = [d for d in items if (d.url, d.style) != (self.url, self.style)]
+        if foreign:
+            items = [d for d in items if (d.url, d.style) == (self.url, self.style)]
+            message.log_warning(
+                '{}: dropped {} saved notification(s) meant for another webhook'.format(
+                    self.name, len(foreign)),
+                'webhooks',
+            )
+        with self._lock:
+            self._retry = items
+            self._trim_retry()
+        if items:
+            message.log_debug(
+                '{}: {} notification(s) to retry from {}'.format(
+                    self.name, len(items), self.retry_path),
+                'webhooks',
+            )
+
+    def _save_retry(self) -> None:
+        """Write the retry queue (via a temp file, so a crash cannot truncate it)."""
+        if not self.retry_path:
+            return
+        with self._lock:
+            data = [asdict(d) for d in self._retry]
+            tmp = self.retry_path + '.tmp'
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.retry_path)
+            except OSError as e:
+                message.log_warning(
+                    'Could not save webhook retry queue to {}: {}'.format(self.retry_path, e),
+                    'webhooks',
+                )
+
+
+def retry_file(url: str, style: str) -> str:
+    """Retry file of one endpoint: named by a hash of style and URL, not flag position."""
+    digest = hashlib.sha1('{} {}'.format(style, url).encode('utf-8')).hexdigest()[:12]
+    return WEBHOOK_RETRY_FILE.format(digest)
+
+
+def build_webhook_sinks(specs: List[str]) -> List[WebhookSink]:
+    """One sink per --webhook [STYLE=]URL, each with its own retry file."""
+    sinks = []
+    for spec in specs:
+        style, url = parse_webhook(spec)
+        sinks.append(WebhookSink(url, style=style, retry_path=retry_file(url, style)))
+    return sinks
@@ -0,0 +1,108 @@
+"""
+Compact binary encoding of OddsEntry batches.
+
+Used wherever odds cross a process boundary (collector worker processes,
+see collectors.py; collector nodes, see nodes.py). A batch is a string table followed by fixed-size
+records; every repeated string (bookmaker, sport, event, start time,
+outcome, url, market) is stored once per batch:
+
+    header    <II       number of strings, number of entries
+    strings   <H + utf-8, repeated
+    entries   <9Idd     9 string indexes, decimal odds, line (NaN = no line)
+
+Each entry is a 52-byte record plus its share of the string table, a
+fraction of its pickled size.
+
+Over TCP every message is a frame: <IB> payload length and message type,
+then the payload (see send_frame / recv_frame).
+"""
+import math
+import socket
+import struct
+from typing import Dict, List, Tuple
+
+from arbitrage import OddsEntry
+
+_HEADER = struct.Struct('<II')
+_STRLEN = struct.Struct('<H')
+_ENTRY = struct.Struct('<9Idd')
+_FRAME = struct.Struct('<IB')
+
+MAX_FRAME = 256 * 1024 * 1024       # refuse frames larger than this (corrupt stream)
+
+_STRING_FIELDS = (
+    'bookmaker', 'bookmaker_id', 'sport', 'event_id', 'event_name',
+    'commence_time', 'outcome', 'url', 'market',
+)
+
+
+def encode_entries(entries: List[OddsEntry]) -> bytes:
+    """Encode a batch of entries to bytes (see module docstring)."""
+    table: Dict[str, int] = {}
+    records = []
+    for e in entries:
+        idx = [table.setdefault(getattr(e, f), len(table)) for f in _STRING_FIELDS]
+        records.append(_ENTRY.pack(
+            *idx, e.decimal_odds, math.nan if e.line is None else e.line
+        ))
+    strings = []
+    for s in table:
+        raw = s.encode('utf-8')
+        strings.append(_STRLEN.pack(len(raw)) + raw)
+    return _HEADER.pack(len(table), len(records)) + b''.join(strings) + b''.join(records)
+
+
+def decode_entries(data: bytes) -> List[OddsEntry]:
+    """Inverse of encode_entries()."""
+    n_strings, n_entries = _HEADER.unpack_from(data, 0)
+    pos = _HEADER.size
+    table = []
+    for _ in range(n_strings):
+        (length,) = _STRLEN.unpack_from(data, pos)
+        pos += _STRLEN.size
+        table.append(data[pos:pos + length].decode('utf-8'))
+        pos += length
+    body = memoryview(data)[pos:pos + n_entries * _ENTRY.size]
+    entries = []
+    for (bm, bm_id, sport, ev_id, ev_name, start, outcome, url, market,
+         odds, line) in _ENTRY.iter_unpack(body):
+        entries.append(OddsEntry(
+            bookmaker=table[bm],
+            bookmaker_id=table[bm_id],
+            sport=table[sport],
+            event_id=table[ev_id],
+            event_name=table[ev_name],
+            commence_time=table[start],
+            outcome=table[outcome],
+            decimal_odds=odds,
+            url=table[url],
+            market=table[market],
+            line=None if math.isnan(line) else line,
+        ))
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Length-prefixed frames
+# ---------------------------------------------------------------------------
+
+def send_frame(sock: socket.socket, kind: int, payload: bytes = b'') -> None:
+    sock.sendall(_FRAME.pack(len(payload), kind) + payload)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionError('connection closed')
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    """Read one frame; raises ConnectionError when the peer closes or sends garbage."""
+    length, kind = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    if length > MAX_FRAME:
+        raise ConnectionError('frame of {} bytes exceeds the limit'.format(length))
+    return kind, _recv_exact(sock, length)